@@ -0,0 +1,417 @@
+"""Caches for the /ask pipeline.
+
+``EmbeddingCache`` has two tiers: a bounded in-process LRU with a TTL, backed
+by a SQLite table that every uvicorn worker on the host shares. Keys are the
+normalized question text plus the embedding model name, so a model change
+never serves stale vectors. Expired SQLite rows are purged on write, at most
+once per ``purge_interval_s``, so the shared file stays bounded by the TTL.
+
+``AnswerCache`` is a semantic cache: it reuses a stored GPT-4o answer when a
+new question's embedding is close enough to one already answered for the
+same page. Lookups score only that page's vectors, held in a per-page matrix
+that stores and evictions keep up to date.
+
+``PageCache`` holds page rows for ``/read`` with a strong ETag per row. An
+entry is served without touching the database until it is older than the
+revalidation window; after that a one-column ``updated_at`` check decides
+whether it is still good.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import get_settings
+
+
+def normalize(text: str) -> str:
+    """Casefold and collapse whitespace so trivial variants share a key."""
+    return " ".join(text.casefold().split())
+
+
+class EmbeddingCache:
+    """LRU/TTL memory tier in front of an optional persistent SQLite tier."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 1024,
+        ttl_s: float = 86400.0,
+        purge_interval_s: float = 3600.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.purge_interval_s = purge_interval_s
+        self._last_purge = 0.0
+        self._mem: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits_memory = 0
+        self.hits_persistent = 0
+        self.misses = 0
+
+        if path:
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embedding_cache_created_at "
+                "ON embedding_cache (created_at)"
+            )
+            self._purge(time.time())
+            self._db.commit()
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\x00{normalize(text)}".encode()).hexdigest()
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        """Return the cached vector for ``text`` or None on a miss."""
+        key = self.key(text, model)
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and now - entry[0] < self.ttl_s:
+                self._mem.move_to_end(key)
+                self.hits_memory += 1
+                return entry[1]
+            if entry is not None:
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector, created_at FROM embedding_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl_s:
+                    vec = array("d", row[0]).tolist()
+                    self._remember(key, row[1], vec)
+                    self.hits_persistent += 1
+                    return vec
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, model: str, vector: List[float]) -> None:
+        key = self.key(text, model)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, list(vector))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?, ?)",
+                    (key, model, array("d", vector).tobytes(), now),
+                )
+                if now - self._last_purge >= self.purge_interval_s:
+                    self._purge(now)
+                self._db.commit()
+
+    def _purge(self, now: float) -> None:
+        """Delete persisted rows past their TTL (caller holds the lock)."""
+        self._db.execute(
+            "DELETE FROM embedding_cache WHERE created_at < ?", (now - self.ttl_s,)
+        )
+        self._last_purge = now
+
+    def _remember(self, key: str, created_at: float, vec: List[float]) -> None:
+        self._mem[key] = (created_at, vec)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embedding_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits_memory + self.hits_persistent + self.misses
+        hits = self.hits_memory + self.hits_persistent
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_persistent": self.hits_persistent,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._mem),
+        }
+
+
+class _ScopeMatrix:
+    """Unit vectors of one scope's entries, as rows of a growable matrix.
+
+    Rows are appended on store and swap-removed on eviction, so a lookup is a
+    single matrix-vector product over that scope alone.
+    """
+
+    def __init__(self, dim: int):
+        self.keys: List[int] = []
+        self._rows: Dict[int, int] = {}
+        self._matrix = np.empty((8, dim), dtype=np.float32)
+
+    @property
+    def dim(self) -> int:
+        return self._matrix.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: int, vector: np.ndarray) -> None:
+        n = len(self.keys)
+        if n == len(self._matrix):
+            grown = np.empty((2 * n, self.dim), dtype=np.float32)
+            grown[:n] = self._matrix
+            self._matrix = grown
+        self._matrix[n] = vector
+        self._rows[key] = n
+        self.keys.append(key)
+
+    def remove(self, key: int) -> None:
+        i = self._rows.pop(key)
+        last = len(self.keys) - 1
+        if i != last:
+            moved = self.keys[last]
+            self._matrix[i] = self._matrix[last]
+            self.keys[i] = moved
+            self._rows[moved] = i
+        self.keys.pop()
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        return self._matrix[: len(self.keys)] @ q
+
+
+class AnswerCache:
+    """LRU/TTL cache of answers looked up by cosine similarity within a scope.
+
+    The scope is the page the question was asked from, so near-identical
+    questions about different pages never share an answer. Each scope keeps
+    its own vector matrix, so a lookup only scores that page's entries, and
+    expired entries are dropped from the front of an insertion-ordered queue.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 512,
+        ttl_s: float = 3600.0,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        # key -> (created_at, scope, answer, metadata), least recently used first
+        self._entries: "OrderedDict[int, Tuple[float, Any, str, Dict]]" = OrderedDict()
+        # (created_at, key) in store order, which is also expiry order
+        self._expiry: "deque[Tuple[float, int]]" = deque()
+        self._scopes: Dict[Any, _ScopeMatrix] = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def _remove(self, key: int) -> None:
+        _, scope, _, _ = self._entries.pop(key)
+        rows = self._scopes[scope]
+        rows.remove(key)
+        if not len(rows):
+            del self._scopes[scope]
+
+    def _expire(self, now: float) -> None:
+        while self._expiry and now - self._expiry[0][0] >= self.ttl_s:
+            _, key = self._expiry.popleft()
+            if key in self._entries:  # may already be gone through LRU eviction
+                self._remove(key)
+
+    def lookup(self, vector: List[float], scope: Any) -> Optional[Dict[str, Any]]:
+        """Return ``{answer, metadata, score}`` for the closest match, if any."""
+        q = self._unit(vector)
+        with self._lock:
+            self._expire(time.time())
+            rows = self._scopes.get(scope)
+            if rows is not None and rows.dim == len(q):
+                scores = rows.scores(q)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = rows.keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    _, _, answer, metadata = self._entries[key]
+                    return {
+                        "answer": answer,
+                        "metadata": dict(metadata),
+                        "score": float(scores[best]),
+                    }
+
+            self.misses += 1
+            return None
+
+    def store(
+        self, vector: List[float], scope: Any, answer: str, metadata: Dict[str, Any]
+    ) -> None:
+        v = self._unit(vector)
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            rows = self._scopes.get(scope)
+            if rows is not None and rows.dim != len(v):
+                # a different embedding model: the old vectors can't be compared
+                for key in list(rows.keys):
+                    self._remove(key)
+                rows = None
+            if rows is None:
+                rows = self._scopes[scope] = _ScopeMatrix(len(v))
+
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = (now, scope, answer, dict(metadata))
+            self._expiry.append((now, key))
+            rows.add(key, v)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+class PageCache:
+    """Bounded LRU of page rows, each with its ETag and ``updated_at``."""
+
+    def __init__(self, max_entries: int = 1024, revalidate_s: float = 60.0):
+        self.max_entries = max_entries
+        self.revalidate_s = revalidate_s
+        # page id -> (checked_at, updated_at, etag, row)
+        self._entries: "OrderedDict[int, Tuple[float, Any, str, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(row: Dict[str, Any]) -> str:
+        body = json.dumps(row, sort_keys=True, separators=(",", ":"))
+        return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+    def get(self, page_id: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Return ``({row, etag, updated_at}, fresh)``, or ``(None, False)``.
+
+        A stale entry must be revalidated (``touch``) or replaced (``put``)
+        before it is served.
+        """
+        with self._lock:
+            entry = self._entries.get(page_id)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(page_id)
+            checked_at, updated_at, etag, row = entry
+            fresh = time.time() - checked_at < self.revalidate_s
+            if fresh:
+                self.hits += 1
+            return {"row": row, "etag": etag, "updated_at": updated_at}, fresh
+
+    def put(self, page_id: int, row: Dict[str, Any], updated_at: Any) -> str:
+        etag = self.etag(row)
+        with self._lock:
+            self._entries[page_id] = (time.time(), updated_at, etag, row)
+            self._entries.move_to_end(page_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def touch(self, page_id: int) -> None:
+        """Mark a stale entry as checked against the database just now."""
+        with self._lock:
+            entry = self._entries.get(page_id)
+            if entry is not None:
+                self._entries[page_id] = (time.time(), *entry[1:])
+                self.revalidated += 1
+
+    def invalidate(self, page_id: int) -> None:
+        with self._lock:
+            self._entries.pop(page_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache:
+    s = get_settings()
+    return EmbeddingCache(
+        path=s.embedding_cache_path or None,
+        max_entries=s.embedding_cache_size,
+        ttl_s=s.embedding_cache_ttl_s,
+    )
+
+
+@lru_cache
+def get_answer_cache() -> AnswerCache:
+    s = get_settings()
+    return AnswerCache(
+        threshold=s.answer_cache_threshold,
+        max_entries=s.answer_cache_size,
+        ttl_s=s.answer_cache_ttl_s,
+    )
+
+
+@lru_cache
+def get_page_cache() -> PageCache:
+    s = get_settings()
+    return PageCache(
+        max_entries=s.page_cache_size, revalidate_s=s.page_cache_revalidate_s
+    )
@@ -10,6 +10,63 @@ class Settings(BaseSettings):
     supabase_key: str = ""  # Will be populated from SUPABASE_ANON_KEY
     openai_api_key: str = ""  # Will be populated from OPENAI_API_KEY
 
+    # Query-embedding cache (empty path disables the shared SQLite tier)
+    embedding_cache_path: str = "cache/embeddings.sqlite3"
+    embedding_cache_size: int = 1024
+    embedding_cache_ttl_s: float = 7 * 24 * 3600
+
+    # Micro-batching of concurrent query embeddings (0 ms wait disables it)
+    embed_batch_max_size: int = 16
+    embed_batch_max_wait_ms: float = 5.0
+
+    # Semantic answer cache for /ask
+    answer_cache_threshold: float = 0.95  # cosine similarity needed for a hit
+    answer_cache_size: int = 512
+    answer_cache_ttl_s: float = 3600
+    answer_cache_seed_from_vault: int = 0  # warm with N recent vault rows
+    answer_cache_seed_concurrency: int = 8  # embedding calls in flight at startup
+
+    # /read page cache: rows are rechecked against updated_at after this long
+    page_cache_size: int = 1024
+    page_cache_revalidate_s: float = 60
+    read_max_age_s: int = 300  # Cache-Control max-age sent to browsers
+
+    # JSONL logs (openai usage, errors) written in batches off the request path
+    log_dir: str = "logs"
+    log_batch_size: int = 100
+    log_flush_interval_s: float = 1.0
+    log_queue_size: int = 10000
+
+    # Per-request spans exported to logs/traces-<date>.jsonl
+    tracing_enabled: bool = True
+
+    # Query embeddings: "openai" or "local" (sentence-transformers on CPU).
+    # Dual write makes scripts/embed_seed.py fill both providers' columns.
+    embedding_provider: str = "openai"
+    local_embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_dual_write: bool = False
+
+    # Retrieval backend for similar_pages: "supabase" (match_pages RPC) or "local"
+    vector_backend: str = "supabase"
+    # Local vector and BM25 indexes are rebuilt this often (0 = never), so
+    # re-embedded or added pages show up in both without a restart
+    local_index_ttl_s: float = 300
+
+    # similar_pages: "vector", "lexical" (BM25 / Postgres full-text) or "hybrid"
+    # (both in parallel, merged by reciprocal rank fusion). The lexical side
+    # follows vector_backend: in-process BM25 for "local", match_pages_text RPC
+    # for "supabase".
+    retrieval_mode: str = "vector"
+    hybrid_candidates: int = 20  # hits taken from each retriever before fusion
+    rrf_k: int = 60
+
+    # Gift-event producer: batch for up to linger_ms or batch_size bytes
+    kafka_bootstrap: str = "kafka:29092"  # "memory" uses the in-process emulator
+    kafka_emulator_faults: str = ""  # e.g. "latency=lognormal:5,0.5;error_rate=0.01"
+    kafka_linger_ms: int = 5
+    kafka_batch_size: int = 16384
+    kafka_compression: str = "gzip"  # "" disables; lz4/snappy need extra libs
+
     model_config = {
         "env_file": ".env",
         "extra": "ignore",
@@ -1,29 +1,45 @@
 import os
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import HTTPException
-from supabase import Client, create_client
+from supabase import AsyncClient, Client, acreate_client, create_client
 
 from .config import get_settings
 
 
+def _credentials() -> Tuple[str, str]:
+    s = get_settings()
+    url = os.environ.get("SUPABASE_URL") or s.supabase_url
+    key = os.environ.get("SUPABASE_ANON_KEY") or s.supabase_key
+
+    if not url or not key:
+        raise ValueError("Supabase URL and key must be provided")
+    return url, key
+
+
 class Supabase:
     _client: Optional[Client] = None
+    _async_client: Optional[AsyncClient] = None
 
     @classmethod
     def client(cls) -> Client:
         if cls._client is None:
             try:
-                s = get_settings()
-                url = os.environ.get("SUPABASE_URL") or s.supabase_url
-                key = os.environ.get("SUPABASE_ANON_KEY") or s.supabase_key
-
-                if not url or not key:
-                    raise ValueError("Supabase URL and key must be provided")
-
-                cls._client = create_client(url, key)
+                cls._client = create_client(*_credentials())
             except Exception as e:
                 raise HTTPException(
                     status_code=500, detail=f"Database connection error: {str(e)}"
                 )
         return cls._client
+
+    @classmethod
+    async def aclient(cls) -> AsyncClient:
+        """Async variant for request handlers that must not block the loop."""
+        if cls._async_client is None:
+            try:
+                cls._async_client = await acreate_client(*_credentials())
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500, detail=f"Database connection error: {str(e)}"
+                )
+        return cls._async_client
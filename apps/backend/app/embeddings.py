@@ -0,0 +1,160 @@
+"""Embedding providers.
+
+``EMBEDDING_PROVIDER`` picks the model that embeds questions at query time:
+
+- ``openai``: ``text-embedding-3-small`` over the network, stored in
+  ``pages.embedding``.
+- ``local``: a sentence-transformers model on CPU, stored in
+  ``pages.embedding_local``. The model is loaded once per process, and short
+  queries then embed in a few milliseconds with no network.
+
+Each provider owns its own set of ``pages`` columns (vector, content hash and
+model) and its own ``match_pages`` function. Switching providers therefore
+never compares vectors from different models. ``EMBEDDING_DUAL_WRITE`` makes
+``scripts/embed_seed.py`` fill both column sets, so the local vectors can be
+backfilled and compared before the read path is flipped (see
+``docs/backlog/Zero_Downtime_Embedding_Rollout_Plan.md``).
+
+This module imports nothing else from ``app`` (and numpy only when the local
+model runs), so scripts/embed_seed.py can use it with just ``openai``
+installed.
+"""
+
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, List, Optional, Tuple
+
+from openai import AsyncOpenAI
+
+
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into vectors and says where those vectors live."""
+
+    name: str
+    model: str
+    column: str  # pages column holding this provider's vectors
+    hash_column: str  # sha256 of the content each vector was built from
+    model_column: str  # model each vector was built with
+    rpc: str  # Postgres function searching ``column``
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """One vector per text, in order."""
+
+    async def embed_one(self, text: str) -> List[float]:
+        return (await self.embed([text]))[0]
+
+    async def embed_with_usage(self, texts: List[str]) -> Tuple[List[List[float]], int]:
+        """Vectors plus the billed input tokens of this call alone."""
+        return await self.embed(texts), 0
+
+    def load(self) -> Any:
+        """Do any one-off setup now rather than on the first request."""
+
+
+class OpenAIEmbeddings(EmbeddingProvider):
+    """``embeddings.create`` on an AsyncOpenAI client.
+
+    Args:
+        client: Returns the client to call (resolved per call)
+        model: Embedding model name
+        on_usage: Called as ``on_usage(model, elapsed_ms, usage)`` after each
+            API call, e.g. ``app.metrics.log_usage``
+    """
+
+    name = "openai"
+    column = "embedding"
+    hash_column = "content_hash"
+    model_column = "embedding_model"
+    rpc = "match_pages"
+
+    def __init__(
+        self,
+        client: Callable[[], AsyncOpenAI],
+        model: str = "text-embedding-3-small",
+        on_usage: Optional[Callable[[str, int, Any], Any]] = None,
+    ):
+        self._client = client
+        self.model = model
+        self._on_usage = on_usage
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return (await self._create(texts))[0]
+
+    async def embed_one(self, text: str) -> List[float]:
+        return (await self._create(text))[0][0]
+
+    async def embed_with_usage(self, texts: List[str]) -> Tuple[List[List[float]], int]:
+        return await self._create(texts)
+
+    async def _create(self, texts: Any) -> Tuple[List[List[float]], int]:
+        t0 = time.perf_counter()
+        resp = await self._client().embeddings.create(model=self.model, input=texts)
+        usage = getattr(resp, "usage", None)
+        if self._on_usage is not None:
+            self._on_usage(self.model, int((time.perf_counter() - t0) * 1000), usage)
+        tokens = int(getattr(usage, "total_tokens", 0) or 0)
+        return [d.embedding for d in resp.data], tokens
+
+
+class LocalEmbeddings(EmbeddingProvider):
+    """sentence-transformers model run in-process on CPU.
+
+    Args:
+        model: Hugging Face model id or local path
+        encoder: Already-loaded object with an ``encode`` method (for testing)
+    """
+
+    name = "local"
+    column = "embedding_local"
+    hash_column = "embedding_local_hash"
+    model_column = "embedding_local_model"
+    rpc = "match_pages_local"
+
+    def __init__(
+        self,
+        model: str = DEFAULT_LOCAL_MODEL,
+        encoder: Optional[Any] = None,
+    ):
+        self.model = model
+        self._encoder = encoder
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        if self._encoder is None:
+            with self._lock:
+                if self._encoder is None:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                    except ImportError as e:
+                        raise RuntimeError(
+                            "EMBEDDING_PROVIDER=local needs sentence-transformers "
+                            "(pip install sentence-transformers)"
+                        ) from e
+                    self._encoder = SentenceTransformer(self.model, device="cpu")
+        return self._encoder
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        vectors = self.load().encode(
+            texts, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return np.asarray(vectors, dtype=np.float32).tolist()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        # inference is CPU-bound (and releases the GIL), so keep it off the loop
+        return await asyncio.to_thread(self.encode, texts)
+
+
+def provider_names(primary: str, dual_write: bool = False) -> List[str]:
+    """Providers the page-embedding job fills; both while dual-writing."""
+    names = ["openai", "local"] if dual_write else []
+    if primary not in names:
+        names.append(primary)
+    return names
@@ -0,0 +1,13 @@
+"""Local stand-ins for OpenAI, Supabase (PostgREST) and Kafka.
+
+Each emulator injects configurable latency, server errors and rate limiting
+(see ``faults``), so timeouts, retries and caching can be exercised offline
+with realistic timing. Run the HTTP ones with ``python -m app.emulators``;
+the Kafka broker lives in-process (``KAFKA_BOOTSTRAP=memory``).
+"""
+
+from .broker import MemoryBroker, MemoryProducer, get_memory_broker
+from .faults import Faults
+
+
+__all__ = ["Faults", "MemoryBroker", "MemoryProducer", "get_memory_broker"]
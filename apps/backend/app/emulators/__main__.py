@@ -0,0 +1,73 @@
+"""Run the HTTP emulators.
+
+usage: python -m app.emulators {openai,postgrest,all}
+           [--latency lognormal:250,0.5] [--error-rate 0.01] [--rate-limit 0.02]
+           [--retry-after 1] [--token-latency fixed:20] [--pages 710]
+           [--openai-port 8100] [--postgrest-port 8101] [--seed N]
+
+Then start the backend with:
+
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=emulated \\
+    SUPABASE_URL=http://localhost:8101 SUPABASE_ANON_KEY=a.b.c \\
+    KAFKA_BOOTSTRAP=memory uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+
+import uvicorn
+
+from . import openai_server, postgrest
+from .faults import Faults
+
+
+async def serve(apps):
+    servers = [
+        uvicorn.Server(
+            uvicorn.Config(app, host="0.0.0.0", port=port, log_level="warning")
+        )
+        for app, port in apps
+    ]
+    await asyncio.gather(*(s.serve() for s in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI/PostgREST emulators")
+    parser.add_argument("service", choices=["openai", "postgrest", "all"])
+    parser.add_argument("--latency", default="lognormal:50,0.5", help="per request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 share")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument(
+        "--token-latency", default="fixed:20", help="per streamed token"
+    )
+    parser.add_argument("--pages", type=int, default=710)
+    parser.add_argument("--openai-port", type=int, default=8100)
+    parser.add_argument("--postgrest-port", type=int, default=8101)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    def faults():
+        return Faults(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            retry_after=args.retry_after,
+            seed=args.seed,
+        )
+
+    apps = []
+    if args.service in ("openai", "all"):
+        app = openai_server.create_app(faults(), token_latency=args.token_latency)
+        apps.append((app, args.openai_port))
+    if args.service in ("postgrest", "all"):
+        apps.append(
+            (postgrest.create_app(faults(), pages=args.pages), args.postgrest_port)
+        )
+    for app, port in apps:
+        print(f"{app.title} on http://localhost:{port}")
+    asyncio.run(serve(apps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""In-process stand-in for the Kafka broker behind ``gift_events``.
+
+``MemoryProducer`` implements the part of ``AIOKafkaProducer`` that
+``app.events`` uses (``start``, ``stop``, ``send``, ``send_and_wait``), and
+``install`` hands it to ``app.events`` when ``KAFKA_BOOTSTRAP=memory``.
+Each send is acked after a delay drawn from the configured faults.
+``error_rate`` sends fail with a ``KafkaError``. ``rate_limit`` sends are throttled: the ack waits an extra
+``retry_after`` seconds, like a broker applying a produce quota.
+
+Records stay in memory per topic. ``MemoryBroker.fetch``/``commit`` give tests
+and scripts a consumer-group view of them.
+"""
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiokafka.errors import KafkaError
+
+from .. import events
+from ..config import get_settings
+from .faults import Faults
+
+
+@dataclass
+class Record:
+    topic: str
+    partition: int
+    offset: int
+    timestamp: int
+    key: Optional[bytes]
+    value: Any
+    headers: List[Tuple[str, bytes]] = field(default_factory=list)
+
+
+class MemoryBroker:
+    """Single-partition topics held in lists, with committed group offsets."""
+
+    def __init__(self):
+        self.topics: Dict[str, List[Record]] = defaultdict(list)
+        self._committed: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def append(
+        self,
+        topic: str,
+        value: Any,
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None,
+    ) -> Record:
+        log = self.topics[topic]
+        record = Record(
+            topic, 0, len(log), int(time.time() * 1000), key, value, headers or []
+        )
+        log.append(record)
+        return record
+
+    def fetch(self, topic: str, group: str, max_records: int = 500) -> List[Record]:
+        """Records after ``group``'s committed offset (not committed here)."""
+        start = self._committed[(group, topic)]
+        return self.topics[topic][start : start + max_records]
+
+    def commit(self, topic: str, group: str, offset: int) -> None:
+        """Record ``offset`` as the next one ``group`` will read."""
+        self._committed[(group, topic)] = offset
+
+    def lag(self, topic: str, group: str) -> int:
+        return len(self.topics[topic]) - self._committed[(group, topic)]
+
+
+class MemoryProducer:
+    """``AIOKafkaProducer`` look-alike that appends to a ``MemoryBroker``."""
+
+    def __init__(
+        self,
+        broker: MemoryBroker,
+        faults: Optional[Faults] = None,
+        value_serializer: Optional[Callable[[Any], bytes]] = None,
+    ):
+        self.broker = broker
+        self.faults = faults or Faults()
+        self.value_serializer = value_serializer or (lambda v: v)
+        self._pending: set = set()
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        # like a real producer, flush what's still in flight
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def send(
+        self,
+        topic: str,
+        value: Any = None,
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None,
+        **kwargs: Any,
+    ) -> "asyncio.Future[Record]":
+        """Buffer the record; the returned future resolves on the "ack"."""
+        raw = self.value_serializer(value)
+        fut = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(self._deliver(fut, topic, raw, key, headers))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return fut
+
+    async def send_and_wait(self, topic: str, value: Any = None, **kwargs: Any):
+        return await (await self.send(topic, value, **kwargs))
+
+    async def _deliver(self, fut, topic, raw, key, headers) -> None:
+        delay = self.faults.delay()
+        outcome = self.faults.outcome()
+        if outcome == 429:
+            delay += self.faults.retry_after
+        await asyncio.sleep(delay)
+        if fut.done():
+            return
+        if outcome == 500:
+            fut.set_exception(KafkaError("Injected broker error"))
+            return
+        record = self.broker.append(topic, raw, key, headers)
+        fut.set_result(record)
+
+
+def decode(record: Record) -> Any:
+    """The JSON value of a record produced by ``app.events``."""
+    return json.loads(record.value)
+
+
+@lru_cache
+def get_memory_broker() -> MemoryBroker:
+    return MemoryBroker()
+
+
+def memory_producer(value_serializer: Callable[[Any], bytes]) -> MemoryProducer:
+    """Producer on the shared broker, faults from ``KAFKA_EMULATOR_FAULTS``."""
+    spec = get_settings().kafka_emulator_faults
+    faults = Faults.from_spec(spec) if spec else Faults()
+    return MemoryProducer(get_memory_broker(), faults, value_serializer)
+
+
+def install() -> None:
+    """Make ``app.events`` publish to the shared in-memory broker."""
+    events.set_producer_factory(memory_producer)
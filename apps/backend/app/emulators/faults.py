@@ -0,0 +1,128 @@
+"""Latency, error and rate-limit injection shared by the emulators.
+
+Latency distributions are written as ``kind:args`` in milliseconds:
+
+- ``fixed:50``
+- ``uniform:20,80``
+- ``normal:50,10`` (mean, standard deviation)
+- ``lognormal:50,0.5`` (median, sigma; long right tail like real APIs)
+
+A full fault spec, as used by the ``KAFKA_EMULATOR_FAULTS`` setting, joins
+``key=value`` pairs with semicolons. For example,
+``latency=lognormal:5,0.5;error_rate=0.01;rate_limit=0.05;retry_after=1``.
+"""
+
+import asyncio
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Return a sampler of delays in seconds for a ``kind:args`` spec.
+
+    Raises:
+        ValueError: for an unknown kind or the wrong number of arguments
+    """
+    kind, _, raw = spec.partition(":")
+    args = [float(a) for a in raw.split(",") if a.strip()]
+    samplers = {
+        "fixed": (1, lambda r, ms: ms),
+        "uniform": (2, lambda r, lo, hi: r.uniform(lo, hi)),
+        "normal": (2, lambda r, mean, sd: r.gauss(mean, sd)),
+        "lognormal": (
+            2,
+            lambda r, median, sigma: r.lognormvariate(
+                math.log(max(median, 1e-3)), sigma
+            ),
+        ),
+    }
+    if kind not in samplers or len(args) != samplers[kind][0]:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+    sample = samplers[kind][1]
+    return lambda r: max(sample(r, *args), 0.0) / 1000
+
+
+@dataclass
+class Faults:
+    """What an emulator does to each request before answering it.
+
+    ``error_rate`` requests fail with a server error and ``rate_limit``
+    requests are refused with 429 and ``Retry-After: retry_after``. The two
+    rates are drawn independently of the latency, which is always applied.
+    """
+
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    rate_limit: float = 0.0
+    retry_after: float = 1.0
+    seed: Optional[int] = None
+    counts: Counter = field(init=False, repr=False, default_factory=Counter)
+    _rng: random.Random = field(init=False, repr=False)
+    _sample: Callable[[random.Random], float] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._sample = parse_latency(self.latency)
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "Faults":
+        """Build from ``key=value;key=value`` (see module docstring)."""
+        kwargs = {}
+        for item in filter(None, (p.strip() for p in spec.split(";"))):
+            key, _, value = item.partition("=")
+            if key not in ("latency", "error_rate", "rate_limit", "retry_after"):
+                raise ValueError(f"Unknown fault setting: {key!r}")
+            kwargs[key] = value if key == "latency" else float(value)
+        return cls(**kwargs)
+
+    def delay(self) -> float:
+        return self._sample(self._rng)
+
+    def outcome(self) -> Optional[int]:
+        """429, 500 or None (serve normally) for the next request."""
+        roll = self._rng.random()
+        if roll < self.rate_limit:
+            status = 429
+        elif roll < self.rate_limit + self.error_rate:
+            status = 500
+        else:
+            status = None
+        self.counts[str(status or "ok")] += 1
+        return status
+
+
+def add_fault_middleware(
+    app: FastAPI, faults: Faults, error_body: Callable[[int, str], Dict[str, Any]]
+) -> None:
+    """Delay every request and fail some, shaped like the real API's errors.
+
+    ``/_emulator/stats`` is exempt so harnesses can read the counts.
+    """
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path.startswith("/_emulator"):
+            return await call_next(request)
+        await asyncio.sleep(faults.delay())
+        status = faults.outcome()
+        if status == 429:
+            return JSONResponse(
+                error_body(429, "Rate limit reached (injected)"),
+                status_code=429,
+                headers={"Retry-After": f"{faults.retry_after:g}"},
+            )
+        if status:
+            return JSONResponse(
+                error_body(status, "Server error (injected)"), status_code=status
+            )
+        return await call_next(request)
+
+    @app.get("/_emulator/stats")
+    def emulator_stats():
+        return {"faults": repr(faults), "outcomes": dict(faults.counts)}
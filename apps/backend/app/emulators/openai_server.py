@@ -0,0 +1,170 @@
+"""OpenAI-compatible emulator: ``/v1/embeddings`` and ``/v1/chat/completions``.
+
+Point the backend at it with ``OPENAI_BASE_URL=http://localhost:8100/v1``;
+the SDK picks that up on its own. Embeddings are deterministic unit vectors
+seeded from the input text, so the same question always maps to the same
+vector and the embedding/answer caches behave as they would in production.
+Chat answers are canned sentences and can be streamed as SSE chunks with a
+per-token delay.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from .faults import Faults, add_fault_middleware, parse_latency
+
+
+EMBEDDING_DIM = 1536
+
+SENTENCES = [
+    "The page turns before you finish reading it.",
+    "Every symbol in Gibsey remembers the hand that drew it.",
+    "The narrator pauses, aware that you are listening.",
+    "What was a question becomes a door, and the door opens inward.",
+    "Somewhere a character rewrites the line you just read.",
+    "The vault keeps what you give it, and gives back what you need.",
+]
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """A unit vector that depends only on ``text`` and ``dim``."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+    vec = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def _tokens(text: str) -> int:
+    # roughly what tiktoken reports for English prose
+    return max(1, round(len(text.split()) * 1.3))
+
+
+def _answer(prompt: str, max_tokens: int) -> str:
+    r = random.Random(hashlib.sha256(prompt.encode()).digest())
+    words = " ".join(r.sample(SENTENCES, 3)).split()
+    return " ".join(words[: max(1, round(max_tokens / 1.3))])
+
+
+def _error(status: int, message: str) -> Dict[str, Any]:
+    kinds = {429: "rate_limit_exceeded", 500: "server_error"}
+    return {
+        "error": {
+            "message": message,
+            "type": "requests" if status == 429 else "server_error",
+            "code": kinds.get(status, "server_error"),
+        }
+    }
+
+
+class EmbeddingRequest(BaseModel):
+    model: str
+    input: Union[str, List[str]]
+    encoding_format: str = "float"
+    dimensions: Optional[int] = None
+
+
+class ChatRequest(BaseModel):
+    model: str
+    messages: List[Dict[str, Any]]
+    max_tokens: Optional[int] = None
+    stream: bool = False
+    stream_options: Optional[Dict[str, Any]] = None
+
+    model_config = {"extra": "allow"}
+
+
+def create_app(faults: Optional[Faults] = None, token_latency: str = "fixed:0"):
+    """Build the emulator app.
+
+    Args:
+        faults: Delay and failure injection applied to every request
+        token_latency: Delay between streamed chunks (see ``parse_latency``)
+    """
+    app = FastAPI(title="OpenAI emulator")
+    faults = faults or Faults()
+    add_fault_middleware(app, faults, _error)
+    token_delay = parse_latency(token_latency)
+    rng = random.Random(faults.seed)
+
+    @app.post("/v1/embeddings")
+    def embeddings(req: EmbeddingRequest):
+        texts = [req.input] if isinstance(req.input, str) else req.input
+        dim = req.dimensions or EMBEDDING_DIM
+        data = []
+        for i, text in enumerate(texts):
+            vec = fake_embedding(text, dim)
+            if req.encoding_format == "base64":
+                embedding: Any = base64.b64encode(vec.tobytes()).decode()
+            else:
+                embedding = vec.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        used = sum(_tokens(t) for t in texts)
+        return {
+            "object": "list",
+            "data": data,
+            "model": req.model,
+            "usage": {"prompt_tokens": used, "total_tokens": used},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(req: ChatRequest):
+        prompt = "\n".join(str(m.get("content", "")) for m in req.messages)
+        answer = _answer(prompt, req.max_tokens or 160)
+        usage = {
+            "prompt_tokens": _tokens(prompt),
+            "completion_tokens": _tokens(answer),
+            "total_tokens": _tokens(prompt) + _tokens(answer),
+        }
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "created": int(time.time()),
+            "model": req.model,
+        }
+        if not req.stream:
+            return {
+                **base,
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        include_usage = bool((req.stream_options or {}).get("include_usage"))
+
+        async def stream():
+            def chunk(delta, finish=None, **extra):
+                choices = (
+                    []
+                    if delta is None
+                    else [{"index": 0, "delta": delta, "finish_reason": finish}]
+                )
+                body = {**base, "object": "chat.completion.chunk", "choices": choices}
+                return f"data: {json.dumps({**body, **extra})}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(answer.split()):
+                await asyncio.sleep(token_delay(rng))
+                yield chunk({"content": word if i == 0 else " " + word})
+            yield chunk({}, finish="stop")
+            if include_usage:
+                yield chunk(None, usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
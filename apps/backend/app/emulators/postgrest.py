@@ -0,0 +1,280 @@
+"""In-memory PostgREST stand-in for the Supabase tables the backend reads.
+
+Serves ``/rest/v1/pages``, ``/rest/v1/vault``, ``/rest/v1/rpc/match_pages``
+and ``/rest/v1/rpc/match_pages_text`` with enough of PostgREST's query
+grammar for the supabase client calls in ``app.main``/``app.vector``:
+``select``, ``col=op.value`` filters (eq, neq, lt, lte, gt, gte, in, is),
+``or=(...)`` with nested ``and(...)``, ``order``, ``limit``/``offset`` and
+single-object responses. Point the backend at it with
+``SUPABASE_URL=http://localhost:8101`` and any JWT-shaped
+``SUPABASE_ANON_KEY``.
+
+Pages are synthetic and embedded with the OpenAI emulator's deterministic
+vectors, so ``match_pages`` ranks them consistently between runs;
+``match_pages_text`` stands in for Postgres full-text search with BM25.
+"""
+
+import datetime as dt
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from ..lexical import BM25Index
+from .faults import Faults, add_fault_middleware
+from .openai_server import SENTENCES, fake_embedding
+
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+}
+RESERVED = {"select", "order", "limit", "offset", "or", "and", "on_conflict", "columns"}
+
+
+def _now() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+
+def _error(status: int, message: str) -> Dict[str, Any]:
+    return {"code": f"EMU{status}", "details": None, "hint": None, "message": message}
+
+
+def _split(expr: str) -> List[str]:
+    """Split on commas that aren't inside parentheses or double quotes."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return [p for p in parts if p]
+
+
+def _coerce(value: str, like: Any) -> Any:
+    value = value.strip('"')
+    if isinstance(like, bool):
+        return value == "true"
+    if isinstance(like, int):
+        return int(value)
+    if isinstance(like, float):
+        return float(value)
+    return value
+
+
+def _condition(column: str, expr: str) -> Predicate:
+    """Predicate for ``column`` and ``op.value`` (e.g. ``id``, ``in.(1,2)``)."""
+    op, _, value = expr.partition(".")
+    if op == "in":
+        values = _split(value[1:-1])
+        return lambda row: row.get(column) in [
+            _coerce(v, row.get(column)) for v in values
+        ]
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}[value]
+        return lambda row: row.get(column) is expected
+    if op not in OPS:
+        raise ValueError(f"Unsupported operator: {op}")
+    compare = OPS[op]
+    return lambda row: compare(row.get(column), _coerce(value, row.get(column)))
+
+
+def _logic(kind: str, body: str) -> Predicate:
+    """``or``/``and`` over PostgREST's ``(a.op.v,and(b.op.v,...))`` list."""
+    preds = []
+    for term in _split(body.strip()[1:-1]):
+        if term.startswith(("and(", "or(")):
+            inner_kind, _, rest = term.partition("(")
+            preds.append(_logic(inner_kind, "(" + rest))
+        else:
+            column, _, expr = term.partition(".")
+            preds.append(_condition(column, expr))
+    combine = any if kind == "or" else all
+    return lambda row: combine(p(row) for p in preds)
+
+
+def _apply_order(rows: List[Row], spec: str) -> List[Row]:
+    # stable sorts applied from the last key to the first
+    for term in reversed(spec.split(",")):
+        column, _, direction = term.partition(".")
+        desc = direction.startswith("desc")
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=desc)
+        rows = missing + present if desc else present + missing
+    return rows
+
+
+class Store:
+    """The emulated database: plain lists of dicts per table."""
+
+    def __init__(self, pages: int = 710):
+        self.tables: Dict[str, List[Row]] = {"pages": [], "vault": []}
+        self._ids = {"pages": 0, "vault": 0}
+        self._matrix: Optional[np.ndarray] = None
+        self._lexical: Optional[BM25Index] = None
+        for i in range(1, pages + 1):
+            content = " ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(4))
+            self.insert(
+                "pages",
+                {
+                    "title": f"Page {i}",
+                    "content": f"Shard {i}. {content}",
+                    "symbol_id": (i - 1) % 16 + 1,
+                },
+            )
+
+    def insert(self, table: str, row: Row) -> Row:
+        self._ids[table] += 1
+        row = {"id": self._ids[table], **row}
+        row.setdefault("created_at", _now())
+        if table == "pages":
+            row.setdefault("updated_at", row["created_at"])
+            self._matrix = None
+            self._lexical = None
+        self.tables[table].append(row)
+        return row
+
+    def update(self, table: str, row: Row, changes: Row) -> None:
+        row.update(changes)
+        if table == "pages":
+            # what the updated_at trigger does, so /read revalidation sees it
+            row["updated_at"] = changes.get("updated_at", _now())
+            self._matrix = None
+            self._lexical = None
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack(
+                [fake_embedding(p["content"]) for p in self.tables["pages"]]
+            )
+        return self._matrix
+
+    def match_pages(self, query: List[float], k: int) -> List[Row]:
+        q = np.asarray(query, dtype=np.float32)
+        scores = self.matrix() @ (q / (np.linalg.norm(q) or 1.0))
+        top = np.argsort(-scores)[:k]
+        pages = self.tables["pages"]
+        return [
+            {
+                "id": pages[i]["id"],
+                "title": pages[i]["title"],
+                "content": pages[i]["content"],
+                "score": float(scores[i]),
+            }
+            for i in top
+        ]
+
+    def match_pages_text(self, query: str, k: int) -> List[Row]:
+        if self._lexical is None:
+            self._lexical = BM25Index(self.tables["pages"])
+        return [
+            {key: row[key] for key in ("id", "title", "content", "score")}
+            for row in self._lexical.search(query, k)
+        ]
+
+
+def create_app(faults: Optional[Faults] = None, pages: int = 710) -> FastAPI:
+    """Build the emulator app.
+
+    Args:
+        faults: Delay and failure injection applied to every request
+        pages: How many synthetic pages to seed
+    """
+    app = FastAPI(title="PostgREST emulator")
+    add_fault_middleware(app, faults or Faults(), _error)
+    store = app.state.store = Store(pages)
+
+    def select_rows(table: str, request: Request) -> List[Row]:
+        rows = store.tables[table]
+        params = request.query_params
+        for key, value in params.multi_items():
+            if key in ("or", "and"):
+                pred = _logic(key, value)
+            elif key in RESERVED:
+                continue
+            else:
+                pred = _condition(key, value)
+            rows = [r for r in rows if pred(r)]
+        return rows
+
+    def respond(rows: List[Row], request: Request, status: int = 200) -> Response:
+        columns = request.query_params.get("select", "*")
+        if columns != "*":
+            keep = [c.strip() for c in columns.split(",")]
+            rows = [{c: r.get(c) for c in keep} for r in rows]
+        if request.headers.get("accept") == "application/vnd.pgrst.object+json":
+            if len(rows) != 1:
+                body = _error(
+                    406, "JSON object requested, multiple (or no) rows returned"
+                )
+                body.update(
+                    code="PGRST116", details=f"The result contains {len(rows)} rows"
+                )
+                return JSONResponse(body, status_code=406)
+            return JSONResponse(rows[0], status_code=status)
+        return JSONResponse(rows, status_code=status)
+
+    def check_table(table: str) -> Optional[Response]:
+        if table not in store.tables:
+            body = _error(404, f'relation "public.{table}" does not exist')
+            return JSONResponse({**body, "code": "42P01"}, status_code=404)
+        return None
+
+    @app.post("/rest/v1/rpc/match_pages")
+    def match_pages(payload: Dict[str, Any] = Body(...)):
+        return store.match_pages(payload["query_embedding"], payload.get("match_k", 3))
+
+    @app.post("/rest/v1/rpc/match_pages_text")
+    def match_pages_text(payload: Dict[str, Any] = Body(...)):
+        return store.match_pages_text(payload["query_text"], payload.get("match_k", 3))
+
+    @app.get("/rest/v1/{table}")
+    def read(table: str, request: Request):
+        missing = check_table(table)
+        if missing:
+            return missing
+        rows = select_rows(table, request)
+        if "order" in request.query_params:
+            rows = _apply_order(rows, request.query_params["order"])
+        offset = int(request.query_params.get("offset", 0))
+        limit = request.query_params.get("limit")
+        rows = rows[offset : offset + int(limit) if limit else None]
+        return respond(rows, request)
+
+    @app.post("/rest/v1/{table}")
+    def insert(table: str, request: Request, payload: Any = Body(...)):
+        missing = check_table(table)
+        if missing:
+            return missing
+        items = payload if isinstance(payload, list) else [payload]
+        rows = [store.insert(table, dict(item)) for item in items]
+        if "return=representation" not in request.headers.get("prefer", ""):
+            return Response(status_code=201)
+        return respond(rows, request, status=201)
+
+    @app.patch("/rest/v1/{table}")
+    def update(table: str, request: Request, payload: Dict[str, Any] = Body(...)):
+        missing = check_table(table)
+        if missing:
+            return missing
+        rows = select_rows(table, request)
+        for row in rows:
+            store.update(table, row, payload)
+        return respond(rows, request)
+
+    return app
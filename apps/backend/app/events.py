@@ -0,0 +1,132 @@
+"""Kafka producer for gift events.
+
+``publish_gift_event`` only enqueues: the record goes into aiokafka's
+accumulator and is sent in the background, batched per partition
+(``kafka_linger_ms`` / ``kafka_batch_size``) and compressed. Idempotent
+delivery (acks=all plus producer sequence numbers) keeps per-partition
+ordering across retries without capping in-flight requests at one.
+Delivery outcomes are handled by a done-callback instead of a blocking wait.
+
+``set_producer_factory`` swaps the producer for anything with the same
+interface; the in-process Kafka emulator installs itself that way.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+
+from aiokafka import AIOKafkaProducer
+
+from .config import get_settings
+from .metrics import KAFKA_PUBLISH_LATENCY
+from .retry import GIFT_EVENTS_TOPIC
+from .tracing import span
+
+
+_producer: Optional[AIOKafkaProducer] = None
+_lock = asyncio.Lock()
+# builds a producer from the value serializer; None means AIOKafkaProducer
+_producer_factory: Optional[Callable[[Callable[[Any], bytes]], Any]] = None
+
+delivery_stats: Dict[str, Any] = {
+    "enqueued": 0,
+    "delivered": 0,
+    "failed": 0,
+    "last_error": None,
+}
+
+
+def _serialize(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+def set_producer_factory(
+    factory: Optional[Callable[[Callable[[Any], bytes]], Any]]
+) -> None:
+    """Build the shared producer with ``factory(value_serializer)`` from now on.
+
+    Takes effect the next time the producer is started; pass None to go back
+    to ``AIOKafkaProducer``.
+    """
+    global _producer_factory
+    _producer_factory = factory
+
+
+async def get_kafka_producer() -> AIOKafkaProducer:
+    """Start the shared producer on first use."""
+    global _producer
+    if _producer is None:
+        async with _lock:
+            if _producer is None:
+                s = get_settings()
+                if _producer_factory is not None:
+                    producer = _producer_factory(_serialize)
+                else:
+                    producer = AIOKafkaProducer(
+                        bootstrap_servers=s.kafka_bootstrap,
+                        value_serializer=_serialize,
+                        request_timeout_ms=10000,  # 10 second timeout
+                        retry_backoff_ms=1000,  # Wait 1s between retries
+                        enable_idempotence=True,  # Ordered, exactly-once per partition
+                        linger_ms=s.kafka_linger_ms,
+                        max_batch_size=s.kafka_batch_size,
+                        compression_type=s.kafka_compression or None,
+                    )
+                await producer.start()
+                _producer = producer
+    return _producer
+
+
+async def close_kafka_producer() -> None:
+    """Flush anything still buffered and stop the producer."""
+    global _producer
+    if _producer is not None:
+        await _producer.stop()
+        _producer = None
+
+
+def _on_delivery(payload: dict, enqueued_at: float, fut: asyncio.Future) -> None:
+    if fut.cancelled() or fut.exception() is not None:
+        error = "cancelled" if fut.cancelled() else str(fut.exception())
+        delivery_stats["failed"] += 1
+        delivery_stats["last_error"] = error
+        KAFKA_PUBLISH_LATENCY.observe(
+            time.perf_counter() - enqueued_at, phase="delivery", outcome="error"
+        )
+        print(f"Failed to deliver gift event to Kafka: {error} ({payload})")
+        return
+    elapsed = time.perf_counter() - enqueued_at
+    delivery_stats["delivered"] += 1
+    delivery_stats["last_delivery_ms"] = round(elapsed * 1000, 1)
+    KAFKA_PUBLISH_LATENCY.observe(elapsed, phase="delivery", outcome="ok")
+
+
+async def publish_gift_event(payload: dict) -> asyncio.Future:
+    """Enqueue a gift event on the gift_events topic.
+
+    Returns as soon as the record is buffered; the broker acknowledgement
+    arrives on the returned future, which callers may await if they need it.
+    The current trace context travels as a W3C ``traceparent`` record header.
+
+    Raises:
+        KafkaError: if the producer can't be started or its buffer is full
+    """
+    with span("kafka.publish", topic=GIFT_EVENTS_TOPIC) as sp:
+        producer = await get_kafka_producer()
+        headers = [("traceparent", f"00-{sp.trace_id}-{sp.span_id}-01".encode())]
+        enqueued_at = time.perf_counter()
+        try:
+            fut = await producer.send(GIFT_EVENTS_TOPIC, value=payload, headers=headers)
+        except Exception as e:
+            KAFKA_PUBLISH_LATENCY.observe(
+                time.perf_counter() - enqueued_at, phase="enqueue", outcome="error"
+            )
+            print(f"Failed to send message to Kafka: {e}")
+            raise
+    KAFKA_PUBLISH_LATENCY.observe(
+        time.perf_counter() - enqueued_at, phase="enqueue", outcome="ok"
+    )
+    delivery_stats["enqueued"] += 1
+    fut.add_done_callback(lambda f: _on_delivery(payload, enqueued_at, f))
+    return fut
@@ -1,17 +1,27 @@
 """Faust worker for processing gift events.
 
 This worker consumes messages from the 'gift_events' topic and saves them to the database.
+Events are taken from the stream in batches (up to ``VAULT_BATCH_SIZE`` events or
+``VAULT_FLUSH_INTERVAL`` seconds) and written with one multi-row INSERT per batch.
+
+Database writes go through an asyncpg pool that is opened when the worker starts
+and closed when it stops, so a slow database never blocks the event loop.
+
+Events that still fail are routed through the retry tiers and finally to the
+dead-letter topic (see ``app.retry``).
 """
 
+import asyncio
 import logging
 import os
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
+import asyncpg
 import faust
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import sessionmaker
+
+from .retry import DLQ_TOPIC, GIFT_EVENTS_TOPIC, due_at, retry_topics, route_failure
 
 
 # Configure logging
@@ -20,19 +30,104 @@ logger = logging.getLogger(__name__)
 
 # Database connection
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://gibsey:secret@db:5432/gibsey")
+POOL_MIN_SIZE = int(os.getenv("VAULT_DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("VAULT_DB_POOL_MAX", "5"))
+STATEMENT_TIMEOUT_MS = int(os.getenv("VAULT_DB_STATEMENT_TIMEOUT_MS", "5000"))
 
-# Create SQLAlchemy engine and session
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Batching: flush when this many events are buffered or this many seconds pass
+BATCH_SIZE = int(os.getenv("VAULT_BATCH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.getenv("VAULT_FLUSH_INTERVAL", "1.0"))
 
+DB_ERRORS = (asyncpg.PostgresError, OSError, asyncio.TimeoutError)
+
+# Events are keyed by event_id, so a redelivered event is silently skipped
+INSERT_ONE = """
+INSERT INTO vault
+    (page_id, question, answer, symbol_id, created_at, event_id, updated_at)
+VALUES ($1, $2, $3, $4, $5, $6, NOW())
+ON CONFLICT (event_id) DO NOTHING
+RETURNING id;
+"""
+
+# One statement for the whole batch: parallel arrays unnested into rows
+INSERT_MANY = """
+INSERT INTO vault
+    (page_id, question, answer, symbol_id, created_at, event_id, updated_at)
+SELECT page_id, question, answer, symbol_id, created_at, event_id, NOW()
+FROM unnest(
+    $1::text[], $2::text[], $3::text[], $4::text[], $5::timestamptz[], $6::text[]
+) AS t(page_id, question, answer, symbol_id, created_at, event_id)
+ON CONFLICT (event_id) DO NOTHING
+RETURNING id;
+"""
+
+pool: Optional[asyncpg.Pool] = None
+pool_stats = {"acquires": 0, "waiting": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+
+async def open_pool() -> asyncpg.Pool:
+    """Create the shared connection pool (idempotent)."""
+    global pool
+    if pool is None:
+        pool = await asyncpg.create_pool(
+            DATABASE_URL,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            command_timeout=STATEMENT_TIMEOUT_MS / 1000,
+            server_settings={"statement_timeout": str(STATEMENT_TIMEOUT_MS)},
+        )
+        logger.info(
+            f"[Faust] Opened vault DB pool (min={POOL_MIN_SIZE}, max={POOL_MAX_SIZE})"
+        )
+    return pool
+
+
+async def close_pool() -> None:
+    global pool
+    if pool is not None:
+        await pool.close()
+        pool = None
+        logger.info("[Faust] Closed vault DB pool")
+
+
+class _acquire:
+    """``pool.acquire()`` that records how long callers wait for a connection."""
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        p = await open_pool()
+        pool_stats["waiting"] += 1
+        t0 = time.perf_counter()
+        try:
+            self._conn = await p.acquire()
+        finally:
+            pool_stats["waiting"] -= 1
+        waited = (time.perf_counter() - t0) * 1000
+        pool_stats["acquires"] += 1
+        pool_stats["wait_ms_total"] += waited
+        pool_stats["wait_ms_max"] = max(pool_stats["wait_ms_max"], waited)
+        return self._conn
+
+    async def __aexit__(self, *exc) -> None:
+        await pool.release(self._conn)
 
-def get_db():
-    """Get a database session."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def pool_metrics() -> Dict[str, Any]:
+    """Pool saturation: connections in use vs max, and acquire wait times."""
+    size = pool.get_size() if pool else 0
+    idle = pool.get_idle_size() if pool else 0
+    acquires = pool_stats["acquires"]
+    return {
+        "size": size,
+        "in_use": size - idle,
+        "max_size": POOL_MAX_SIZE,
+        "saturation": round((size - idle) / POOL_MAX_SIZE, 3),
+        "waiting": pool_stats["waiting"],
+        "acquires": acquires,
+        "avg_wait_ms": (
+            round(pool_stats["wait_ms_total"] / acquires, 3) if acquires else 0.0
+        ),
+        "max_wait_ms": round(pool_stats["wait_ms_max"], 3),
+    }
 
 
 # Initialize the Faust application
@@ -41,15 +136,76 @@ app = faust.App(
     broker=["kafka://kafka:29092"],  # Using internal Docker network
     store="memory://",
     topic_partitions=1,
-    broker_commit_every=1,
+    # Offsets are only committed for acked events, and a batch is acked once
+    # the agent moves past it, i.e. after its INSERT has committed.
+    broker_commit_every=BATCH_SIZE,
+    broker_commit_interval=FLUSH_INTERVAL,
     value_serializer="json",
     key_serializer="json",
     broker_request_timeout=10.0,  # 10 second timeout
     broker_heartbeat_interval=3.0,  # 3 second heartbeat
 )
 
-# Create the Kafka topic
-gift_events_topic = app.topic("gift_events", partitions=1, value_type=dict)
+# Create the Kafka topics: the main topic, one per retry tier, and the DLQ
+topics = {
+    name: app.topic(name, partitions=1, value_type=dict)
+    for name in [GIFT_EVENTS_TOPIC, *retry_topics(), DLQ_TOPIC]
+}
+gift_events_topic = topics[GIFT_EVENTS_TOPIC]
+
+
+@app.service
+class VaultPool(faust.Service):
+    """Ties the DB pool's lifetime to the worker's."""
+
+    async def on_start(self) -> None:
+        await open_pool()
+
+    async def on_stop(self) -> None:
+        await close_pool()
+
+
+@app.page("/vault/pool/")
+async def vault_pool_metrics(web, request):
+    return web.json(pool_metrics())
+
+
+def _vault_row(event: Dict[str, Any]) -> tuple:
+    created_at = event.get("created_at")
+    created_at = (
+        datetime.fromisoformat(created_at)
+        if isinstance(created_at, str)
+        else created_at or datetime.now(timezone.utc)
+    )
+    page_id, symbol_id = event.get("page_id"), event.get("symbol_id")
+    return (
+        None if page_id is None else str(page_id),
+        event.get("question"),
+        event.get("answer"),
+        None if symbol_id is None else str(symbol_id),
+        created_at,
+        event.get("event_id"),
+    )
+
+
+async def _insert_one(event: Dict[str, Any]) -> Optional[str]:
+    """Insert a single event; returns the error message, or None on success."""
+    try:
+        async with _acquire() as conn:
+            row_id = await conn.fetchval(INSERT_ONE, *_vault_row(event))
+
+        if row_id is None:
+            logger.info(f"[Faust] Skipped duplicate event {event.get('event_id')}")
+        else:
+            logger.info(f"[Faust] Saved gift event: {row_id}")
+        return None
+
+    except DB_ERRORS as e:
+        logger.error(f"[Faust] Database error saving gift event: {e}")
+        return f"database error: {e}"
+    except Exception as e:
+        logger.error(f"[Faust] Unexpected error saving gift event: {e}")
+        return f"unexpected error: {e}"
 
 
 async def save_to_vault(event: Dict[str, Any]) -> bool:
@@ -61,68 +217,126 @@ async def save_to_vault(event: Dict[str, Any]) -> bool:
     Returns:
         bool: True if the event was saved successfully, False otherwise
     """
-    db = next(get_db())
+    return await _insert_one(event) is None
+
+
+async def save_batch_to_vault(
+    events: List[Dict[str, Any]]
+) -> List[Tuple[Dict[str, Any], str]]:
+    """Save a batch of gift events with a single multi-row INSERT.
+
+    If the batch INSERT fails, the events are retried one at a time so a single
+    bad event can't sink the rest of the batch.
+
+    Args:
+        events: The gift events to save
+
+    Returns:
+        List[Tuple[Dict, str]]: The events that could not be saved, each with
+        the reason it failed
+    """
+    if not events:
+        return []
+
     try:
-        # Prepare the data for insertion
-        query = """
-        INSERT INTO vault (page_id, question, answer, symbol_id, created_at, updated_at)
-        VALUES (:page_id, :question, :answer, :symbol_id, :created_at, NOW())
-        RETURNING id;
-        """
-
-        # Execute the query
-        result = db.execute(
-            text(query),
-            {
-                "page_id": event.get("page_id"),
-                "question": event.get("question"),
-                "answer": event.get("answer"),
-                "symbol_id": event.get("symbol_id"),
-                "created_at": event.get(
-                    "created_at", datetime.now(timezone.utc).isoformat()
-                ),
-            },
+        columns = list(zip(*(_vault_row(e) for e in events)))
+        async with _acquire() as conn:
+            ids = await conn.fetch(INSERT_MANY, *columns)
+        logger.info(
+            f"[Faust] Saved {len(ids)} gift events in one batch "
+            f"({len(events) - len(ids)} duplicates skipped)"
+        )
+        return []
+
+    except (*DB_ERRORS, ValueError, TypeError) as e:
+        logger.warning(
+            f"[Faust] Batch insert of {len(events)} events failed ({e}); "
+            "retrying one by one"
         )
-        db.commit()
 
-        logger.info(f"[Faust] Saved gift event: {result.fetchone()[0]}")
-        return True
+    failed = []
+    for event in events:
+        reason = await _insert_one(event)
+        if reason is not None:
+            failed.append((event, reason))
+    return failed
 
-    except SQLAlchemyError as e:
-        db.rollback()
-        logger.error(f"[Faust] Database error saving gift event: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"[Faust] Unexpected error saving gift event: {e}")
-        return False
-    finally:
-        db.close()
+
+async def route_failures(failed: List[Tuple[Dict[str, Any], str]]) -> None:
+    """Send failed events to their next retry tier, or to the DLQ.
+
+    Waits for the broker to acknowledge each send, so the source offsets are
+    only committed once the event is safe on its new topic.
+    """
+    for event, reason in failed:
+        dest, routed = route_failure(event, reason)
+        await (await topics[dest].send(value=routed))
+        log = logger.error if dest == DLQ_TOPIC else logger.warning
+        log(
+            f"[Faust] Event failed ({reason}); attempt "
+            f"{routed['_retry']['attempts']} routed to {dest}"
+        )
 
 
 @app.agent(gift_events_topic)
 async def process_gift_events(stream):
-    """Process incoming gift events and save them to the database.
+    """Process incoming gift events and save them to the database in batches.
 
     Args:
         stream: Stream of gift events
     """
-    async for event in stream:
+    async for events in stream.take(BATCH_SIZE, within=FLUSH_INTERVAL):
         try:
-            logger.info(f"[Faust] Processing event: {event}")
+            logger.info(f"[Faust] Processing batch of {len(events)} events")
+
+            # Save the batch to the vault
+            failed = await save_batch_to_vault(events)
+
+            logger.info(
+                f"[Faust] Batch processed: {len(events) - len(failed)} saved, "
+                f"{len(failed)} failed"
+            )
+
+        except Exception as e:
+            logger.error(f"[Faust] Error processing batch: {e}", exc_info=True)
+            failed = [(event, f"batch error: {e}") for event in events]
 
-            # Save the event to the vault
-            success = await save_to_vault(event)
+        # Failures go to the first retry tier. If even that send fails the
+        # agent crashes rather than ack events that were never stored.
+        await route_failures(failed)
 
-            if not success:
-                logger.error(f"[Faust] Failed to process event: {event}")
-                # Here you could implement retry logic or dead-letter queue
-                # For now, we'll just log the error and continue
 
-            logger.info("[Faust] Event processed successfully")
+async def process_retries(stream):
+    """Re-attempt events from one retry tier once their delay has passed.
+
+    Events in a tier share one delay and arrive in the order they failed, so
+    waiting for the last event of a batch to come due holds back only this
+    tier, never ``gift_events``.
+    """
+    async for events in stream.take(BATCH_SIZE, within=FLUSH_INTERVAL):
+        try:
+            wait = max(due_at(e) for e in events) - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            failed = await save_batch_to_vault(events)
+
+            logger.info(
+                f"[Faust] Retry batch processed: {len(events) - len(failed)} "
+                f"saved, {len(failed)} failed again"
+            )
 
         except Exception as e:
-            logger.error(f"[Faust] Error processing event: {e}", exc_info=True)
-            # Continue processing other events even if one fails
+            logger.error(f"[Faust] Error processing retry batch: {e}", exc_info=True)
+            failed = [(event, f"batch error: {e}") for event in events]
+
+        await route_failures(failed)
+
+
+for _topic in retry_topics():
+    app.agent(topics[_topic], name=f"process_{_topic.replace('.', '_')}")(
+        process_retries
+    )
 
 
 # For local development
@@ -0,0 +1,143 @@
+"""In-process vector index over ``pages.embedding``.
+
+The corpus is small enough (~710 pages) that a brute-force search over a
+contiguous float32 matrix beats a ``match_pages`` round trip by orders of
+magnitude. Rows are L2-normalised at load time, so cosine similarity is a
+single matrix-vector product.
+
+Pages are re-embedded by scripts/embed_seed.py rather than this process, so
+each index is rebuilt once it is ``LOCAL_INDEX_TTL_S`` old (the same window as
+the BM25 index in ``app.lexical``), or on demand with ``reload_local_index``.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from supabase import Client
+
+from .config import get_settings
+from .db import Supabase
+
+
+PAGE_SIZE = 1000  # PostgREST caps a single response at 1000 rows
+
+
+def _as_vector(value: Any) -> List[float]:
+    # pgvector columns come back from PostgREST as a "[0.1,0.2,...]" string
+    return json.loads(value) if isinstance(value, str) else value
+
+
+class LocalVectorIndex:
+    """Top-k cosine search returning the same rows as ``match_pages``."""
+
+    def __init__(self, rows: Sequence[Dict[str, Any]]):
+        rows = [r for r in rows if r.get("embedding") is not None]
+        self.ids = np.array([r["id"] for r in rows], dtype=np.int64)
+        self.titles = [r.get("title") for r in rows]
+        self.contents = [r.get("content") for r in rows]
+
+        if rows:
+            matrix = np.array(
+                [_as_vector(r["embedding"]) for r in rows], dtype=np.float32
+            )
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = np.ascontiguousarray(matrix / norms)
+        else:
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(
+        cls, sb: Optional[Client] = None, column: str = "embedding"
+    ) -> "LocalVectorIndex":
+        """Read every page embedded in ``column``, 1000 rows at a time."""
+        sb = sb or Supabase.client()
+        rows: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            batch = (
+                sb.table("pages")
+                .select(f"id,title,content,{column}")
+                .not_.is_(column, "null")
+                .order("id")
+                .range(start, start + PAGE_SIZE - 1)
+                .execute()
+                .data
+            ) or []
+            rows.extend({**r, "embedding": r[column]} for r in batch)
+            if len(batch) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        return cls(rows)
+
+    def search(self, query: Sequence[float], k: int = 3) -> List[Dict]:
+        """Return the ``k`` most similar pages, best first."""
+        if not len(self) or k <= 0:
+            return []
+
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+        scores = self.matrix @ q
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "id": int(self.ids[i]),
+                "title": self.titles[i],
+                "content": self.contents[i],
+                "score": float(scores[i]),
+                "page_id": int(self.ids[i]),
+            }
+            for i in top
+        ]
+
+
+# column -> (index, loaded_at)
+_indexes: Dict[str, Tuple[LocalVectorIndex, float]] = {}
+_lock = threading.Lock()
+
+
+def reload_local_index(column: str = "embedding") -> LocalVectorIndex:
+    """Rebuild the process-wide index over ``column`` from ``pages``."""
+    index = LocalVectorIndex.load(column=column)
+    _indexes[column] = (index, time.monotonic())
+    return index
+
+
+def get_local_index(column: str = "embedding") -> LocalVectorIndex:
+    """Process-wide index over ``column``, loaded on first use (or at startup).
+
+    Once older than ``LOCAL_INDEX_TTL_S`` (0 disables this) it is rebuilt by
+    the next caller, while concurrent callers keep searching the previous
+    index. A failed rebuild keeps the previous index.
+    """
+    entry = _indexes.get(column)
+    if entry is None:
+        with _lock:
+            entry = _indexes.get(column)
+            if entry is None:
+                return reload_local_index(column)
+
+    index, loaded_at = entry
+    ttl = get_settings().local_index_ttl_s
+    if ttl > 0 and time.monotonic() - loaded_at >= ttl and _lock.acquire(False):
+        try:
+            index = reload_local_index(column)
+        except Exception as e:
+            print(f"Error reloading local vector index: {str(e)}")
+        finally:
+            _lock.release()
+    return index
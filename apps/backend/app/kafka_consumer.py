@@ -1,24 +1,65 @@
 #!/usr/bin/env python3
+"""Standalone gift-event consumer.
+
+Messages are read from ``gift_events`` in batches with ``consume()``, written
+with one multi-row INSERT per batch, and their offsets committed (asynchronously)
+only once that INSERT has committed. ``--processes N`` starts N consumers in the
+same group so each partition gets its own process (capped at the partition
+count of ``gift_events``, since extra consumers would get no partitions).
+
+Events that fail to save are published to the next retry tier (or the DLQ, see
+``app.retry``) before their offsets are committed. The retry topics are read by
+the same consumers; a partition whose next event isn't due yet is paused rather
+than slept on, so ``gift_events`` keeps flowing.
+
+usage: python -m app.kafka_consumer [--batch-size 500] [--timeout 1.0] [--processes 1]
+"""
+import argparse
 import json
 import logging
-from datetime import datetime
-from typing import Any, Dict
+import multiprocessing
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
-from confluent_kafka import Consumer, KafkaError
-from sqlalchemy import create_engine, text
+from confluent_kafka import (
+    Consumer,
+    KafkaError,
+    KafkaException,
+    Producer,
+    TopicPartition,
+)
+from sqlalchemy import column, create_engine, table, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker
 
+from .retry import DLQ_TOPIC, GIFT_EVENTS_TOPIC, due_at, retry_topics, route_failure
+
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s %(processName)s %(message)s"
+)
 logger = logging.getLogger(__name__)
 
 # Database connection
-DATABASE_URL = "postgresql://gibsey:secret@db:5432/gibsey"
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://gibsey:secret@db:5432/gibsey")
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+vault_table = table(
+    "vault",
+    column("id"),
+    column("page_id"),
+    column("question"),
+    column("answer"),
+    column("symbol_id"),
+    column("created_at"),
+    column("event_id"),
+)
+
 
 def get_db():
     """Get a database session."""
@@ -29,104 +70,390 @@ def get_db():
         db.close()
 
 
-def save_to_vault(event: Dict[str, Any]) -> bool:
-    """Save a gift event to the vault."""
+def _vault_row(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "page_id": event.get("page_id"),
+        "question": event.get("question"),
+        "answer": event.get("answer"),
+        "symbol_id": event.get("symbol_id"),
+        "created_at": event.get("created_at", datetime.now(timezone.utc).isoformat()),
+        "event_id": event.get("event_id"),
+    }
+
+
+def _insert_one(event: Dict[str, Any]) -> Optional[str]:
+    """Insert a single event; returns the error message, or None on success."""
     db = next(get_db())
     try:
         # Prepare the data for insertion
         query = """
-        INSERT INTO vault (page_id, question, answer, symbol_id, created_at, updated_at)
-        VALUES (:page_id, :question, :answer, :symbol_id, :created_at, NOW())
+        INSERT INTO vault
+            (page_id, question, answer, symbol_id, created_at, event_id, updated_at)
+        VALUES
+            (:page_id, :question, :answer, :symbol_id, :created_at, :event_id, NOW())
+        ON CONFLICT (event_id) DO NOTHING
         RETURNING id;
         """
 
         # Execute the query
-        result = db.execute(
-            text(query),
-            {
-                "page_id": event.get("page_id"),
-                "question": event.get("question"),
-                "answer": event.get("answer"),
-                "symbol_id": event.get("symbol_id"),
-                "created_at": event.get("created_at", datetime.utcnow().isoformat()),
-            },
-        )
+        row = db.execute(text(query), _vault_row(event)).fetchone()
         db.commit()
-        logger.info(f"[Kafka Consumer] Saved gift event: {result.fetchone()[0]}")
-        return True
+        if row is None:
+            logger.info(
+                f"[Kafka Consumer] Skipped duplicate event {event.get('event_id')}"
+            )
+        else:
+            logger.info(f"[Kafka Consumer] Saved gift event: {row[0]}")
+        return None
 
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"[Kafka Consumer] Database error saving gift event: {e}")
-        return False
+        return f"database error: {e}"
     except Exception as e:
         logger.error(f"[Kafka Consumer] Unexpected error saving gift event: {e}")
-        return False
+        return f"unexpected error: {e}"
     finally:
         db.close()
 
 
-def main():
+def save_to_vault(event: Dict[str, Any]) -> bool:
+    """Save a gift event to the vault."""
+    return _insert_one(event) is None
+
+
+def save_batch_to_vault(
+    events: List[Dict[str, Any]]
+) -> List[Tuple[Dict[str, Any], str]]:
+    """Save a batch of gift events with a single multi-row INSERT.
+
+    Falls back to one INSERT per event if the batch fails, so one bad event
+    doesn't take the whole batch down with it.
+
+    Args:
+        events: The gift events to save
+
+    Returns:
+        List[Tuple[Dict, str]]: The events that could not be saved, each with
+        the reason it failed
+    """
+    if not events:
+        return []
+
+    db = next(get_db())
+    try:
+        # Redelivered events (same event_id) are skipped, not duplicated
+        db.execute(
+            insert(vault_table)
+            .values([_vault_row(e) for e in events])
+            .on_conflict_do_nothing(index_elements=["event_id"])
+        )
+        db.commit()
+        return []
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(
+            f"[Kafka Consumer] Batch insert of {len(events)} events failed ({e}); "
+            "retrying one by one"
+        )
+    finally:
+        db.close()
+
+    failed = []
+    for event in events:
+        reason = _insert_one(event)
+        if reason is not None:
+            failed.append((event, reason))
+    return failed
+
+
+def route_failures(
+    producer: Producer,
+    failed: List[Tuple[Dict[str, Any], str, bool]],
+    timeout: float = 30.0,
+) -> None:
+    """Publish failed events to their next retry tier or the DLQ.
+
+    Blocks until the broker has acknowledged every event, and raises if any
+    delivery failed, so offsets are never committed for an event that is
+    neither in the vault nor on another topic.
+    """
+    errors = []
+
+    def on_delivery(err, msg):
+        if err is not None:
+            errors.append(err)
+
+    for event, reason, retryable in failed:
+        dest, routed = route_failure(event, reason, retryable=retryable)
+        producer.produce(
+            dest, json.dumps(routed).encode("utf-8"), on_delivery=on_delivery
+        )
+        log = logger.error if dest == DLQ_TOPIC else logger.warning
+        log(
+            f"[Kafka Consumer] Event failed ({reason}); attempt "
+            f"{routed['_retry']['attempts']} routed to {dest}"
+        )
+
+    if producer.flush(timeout) > 0 or errors:
+        raise KafkaException(errors[0] if errors else "timed out routing failed events")
+
+
+class ThroughputStats:
+    """Messages/s and lag, logged every ``interval`` seconds.
+
+    Only messages that were handled (saved, or routed to a retry tier or the
+    DLQ) count; EOF events and retry messages left for a paused partition
+    don't.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.window_start = time.monotonic()
+        self.total = self.window = 0
+        self.e2e_ms: List[float] = []
+
+    def record(self, msgs) -> None:
+        now_ms = time.time() * 1000
+        for msg in msgs:
+            ts_type, ts = msg.timestamp()
+            if ts_type and ts > 0:
+                self.e2e_ms.append(now_ms - ts)
+        self.window += len(msgs)
+        self.total += len(msgs)
+
+    def maybe_report(self, consumer: Consumer) -> None:
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed < self.interval:
+            return
+
+        report = {
+            "msgs_per_sec": round(self.window / elapsed, 1),
+            "total": self.total,
+            "consumer_lag": partition_lag(consumer),
+        }
+        if self.e2e_ms:
+            report["e2e_lag_ms_avg"] = round(sum(self.e2e_ms) / len(self.e2e_ms), 1)
+            report["e2e_lag_ms_max"] = round(max(self.e2e_ms), 1)
+        logger.info(f"[Kafka Consumer] stats {json.dumps(report)}")
+
+        self.window_start, self.window, self.e2e_ms = now, 0, []
+
+
+def partition_lag(consumer: Consumer) -> Dict[int, int]:
+    """Messages between our position and the high watermark, per partition."""
+    lag = {}
+    for tp in consumer.position(consumer.assignment()):
+        try:
+            _, high = consumer.get_watermark_offsets(tp, timeout=1.0)
+        except Exception:
+            continue
+        if tp.offset >= 0:
+            lag[tp.partition] = max(high - tp.offset, 0)
+    return lag
+
+
+def build_consumer() -> Consumer:
     # Kafka consumer configuration
     conf = {
         "bootstrap.servers": "kafka:29092",  # Using the internal Redpanda port
         "group.id": "gibsey-gift-group",
         "auto.offset.reset": "earliest",
         "security.protocol": "PLAINTEXT",  # Explicitly set security protocol
-        "client.id": "faust-worker",  # Set a client ID for debugging
+        "client.id": f"faust-worker-{os.getpid()}",  # Set a client ID for debugging
         "metadata.broker.list": "kafka:29092",  # Explicitly set broker list
         "broker.address.family": "v4",  # Force IPv4 to avoid IPv6 issues
+        # Offsets are committed by hand once a batch is in the database
+        "enable.auto.commit": False,
     }
+    return Consumer(conf)
 
-    # Create Consumer instance
-    consumer = Consumer(conf)
 
-    # Subscribe to topic
-    topic = "gift_events"
-    consumer.subscribe([topic])
+def build_producer() -> Producer:
+    """Producer for retry/DLQ routing; idempotent so retries can't duplicate."""
+    return Producer(
+        {
+            "bootstrap.servers": "kafka:29092",
+            "client.id": f"faust-worker-{os.getpid()}-retry",
+            "broker.address.family": "v4",
+            "enable.idempotence": True,
+            "linger.ms": 5,
+        }
+    )
 
-    logger.info(f"[Kafka Consumer] Started and subscribed to {topic}")
 
-    try:
-        while True:
-            msg = consumer.poll(1.0)
-            if msg is None:
-                continue
-            if msg.error():
-                if msg.error().code() == KafkaError._PARTITION_EOF:
-                    # End of partition event - not an error
-                    logger.info(
-                        f"[Kafka Consumer] Reached end of {msg.topic()} [{msg.partition()}] at offset {msg.offset()}"
-                    )
-                else:
-                    logger.error(f"[Kafka Consumer] Error: {msg.error()}")
-                continue
+def split_batch(
+    consumer: Consumer, msgs, paused: Dict[Tuple[str, int], float]
+) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str, bool]], list, list]:
+    """Sort a consumed batch into events to save now and events to route.
+
+    Retry events that aren't due yet are not processed: their partition is
+    rewound to that event and paused until it comes due.
+
+    Returns:
+        The events to save, undecodable messages bound for the DLQ, the
+        offsets to commit once both are durable, and the messages behind
+        those events (for throughput stats)
+    """
+    ready, poison, handled = [], [], []
+    offsets: Dict[Tuple[str, int], int] = {}
+    now = time.time()
+
+    for msg in msgs:
+        key = (msg.topic(), msg.partition())
+        if msg.error():
+            if msg.error().code() == KafkaError._PARTITION_EOF:
+                # End of partition event - not an error
+                logger.info(
+                    f"[Kafka Consumer] Reached end of {msg.topic()} "
+                    f"[{msg.partition()}] at offset {msg.offset()}"
+                )
+            else:
+                logger.error(f"[Kafka Consumer] Error: {msg.error()}")
+            continue
+        if key in paused:
+            continue  # rewound below; will be consumed again after resume
+
+        try:
+            # Parse the message value (should be a JSON string)
+            event = json.loads(msg.value().decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            logger.error(f"[Kafka Consumer] Error decoding JSON: {e}")
+            raw = {"raw": msg.value().decode("utf-8", errors="replace")}
+            poison.append((raw, f"invalid JSON: {e}", False))
+            handled.append(msg)
+            offsets[key] = msg.offset() + 1
+            continue
+
+        due = due_at(event)
+        if due > now:
+            tp = TopicPartition(msg.topic(), msg.partition(), msg.offset())
+            consumer.pause([tp])
+            consumer.seek(tp)
+            paused[key] = due
+            continue
+
+        ready.append(event)
+        handled.append(msg)
+        offsets[key] = msg.offset() + 1
+
+    commits = [TopicPartition(t, p, o) for (t, p), o in offsets.items()]
+    return ready, poison, commits, handled
+
 
+def resume_due(consumer: Consumer, paused: Dict[Tuple[str, int], float]) -> None:
+    now = time.time()
+    for key, due in list(paused.items()):
+        if due <= now:
+            del paused[key]
             try:
-                # Parse the message value (should be a JSON string)
-                event = json.loads(msg.value().decode("utf-8"))
-                logger.info(f"[Kafka Consumer] Received event: {event}")
+                consumer.resume([TopicPartition(*key)])
+            except KafkaException:
+                pass  # partition was revoked while paused
 
-                # Save the event to the database
-                success = save_to_vault(event)
-                if success:
-                    logger.info("[Kafka Consumer] Successfully processed event")
-                else:
-                    logger.error("[Kafka Consumer] Failed to process event")
 
-                # Commit the offset
-                consumer.commit(msg)
+def partition_count(topic: str = GIFT_EVENTS_TOPIC) -> Optional[int]:
+    """Partitions of ``topic`` according to the broker, or None if unknown."""
+    consumer = build_consumer()
+    try:
+        meta = consumer.list_topics(topic, timeout=10.0).topics.get(topic)
+        if meta is None or meta.error is not None:
+            return None
+        return len(meta.partitions) or None
+    except KafkaException as e:
+        logger.warning(f"[Kafka Consumer] Could not read {topic} metadata: {e}")
+        return None
+    finally:
+        consumer.close()
+
+
+def run_consumer(batch_size: int, timeout: float, stats_interval: float) -> None:
+    """Consume, bulk insert and commit until interrupted."""
+    # Don't reuse connections inherited from a parent process
+    engine.dispose(close=False)
+
+    consumer = build_consumer()
+    producer = build_producer()
+    topics = [GIFT_EVENTS_TOPIC, *retry_topics()]
+    consumer.subscribe(topics)
+    stats = ThroughputStats(stats_interval)
+    paused: Dict[Tuple[str, int], float] = {}
+
+    logger.info(
+        f"[Kafka Consumer] Started and subscribed to {topics} (batch={batch_size})"
+    )
+
+    try:
+        while True:
+            resume_due(consumer, paused)
+            msgs = consumer.consume(num_messages=batch_size, timeout=timeout)
+            if msgs:
+                events, failed, commits, handled = split_batch(consumer, msgs, paused)
+                failed += [(e, r, True) for e, r in save_batch_to_vault(events)]
+                route_failures(producer, failed)
 
-            except json.JSONDecodeError as e:
-                logger.error(f"[Kafka Consumer] Error decoding JSON: {e}")
-            except Exception as e:
-                logger.error(f"[Kafka Consumer] Error processing message: {e}")
+                # The batch is durable: commit its offsets without waiting on
+                # the broker. A crash before this lands replays the batch.
+                if commits:
+                    consumer.commit(offsets=commits, asynchronous=True)
+                stats.record(handled)
+
+            stats.maybe_report(consumer)
 
     except KeyboardInterrupt:
         logger.info("[Kafka Consumer] Shutting down...")
     finally:
-        # Close down consumer to commit final offsets.
+        # Leave the group promptly so partitions rebalance to the others
         consumer.close()
+        producer.flush(10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--timeout", type=float, default=1.0, help="max seconds to fill a batch"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="consumers in the group; capped at the partitions of gift_events",
+    )
+    parser.add_argument("--stats-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    processes = args.processes
+    if processes > 1:
+        partitions = partition_count()
+        if partitions and processes > partitions:
+            logger.warning(
+                f"[Kafka Consumer] {GIFT_EVENTS_TOPIC} has {partitions} "
+                f"partitions; starting {partitions} consumers, not {processes}"
+            )
+            processes = partitions
+
+    worker_args = (args.batch_size, args.timeout, args.stats_interval)
+    if processes <= 1:
+        run_consumer(*worker_args)
+        return
+
+    workers = [
+        multiprocessing.Process(
+            target=run_consumer, args=worker_args, name=f"consumer-{i}"
+        )
+        for i in range(processes)
+    ]
+    for w in workers:
+        w.start()
+    try:
+        for w in workers:
+            w.join()
+    except KeyboardInterrupt:
+        # Ctrl-C reaches the children too; wait for them to close cleanly
+        for w in workers:
+            w.join()
 
 
 if __name__ == "__main__":
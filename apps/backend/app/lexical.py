@@ -0,0 +1,189 @@
+"""Lexical (BM25) retrieval over ``pages`` and rank fusion with vector hits.
+
+Cosine search is weak on exact names ("Scheherazade", "Giallo"): a rare proper
+noun barely moves a sentence embedding. BM25 scores exactly those rare terms
+highest, so ``similar_pages(mode="hybrid")`` runs both searches in parallel
+and merges them with reciprocal rank fusion, which needs no score calibration
+between the two.
+
+``BM25Index`` is the in-process index (``VECTOR_BACKEND=local``); with the
+Supabase backend the same role is played by the ``match_pages_text`` Postgres
+full-text function (scripts/add_pages_fts.sql). Pages are written by the
+ingest scripts rather than this process, so the in-process index is rebuilt
+once it is ``LOCAL_INDEX_TTL_S`` old (like the vector index), or on demand
+with ``reload_lexical_index``.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from supabase import Client
+
+from .config import get_settings
+from .db import Supabase
+
+
+PAGE_SIZE = 1000  # PostgREST caps a single response at 1000 rows
+
+TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+STOPWORDS = frozenset(
+    """a an and are as at be but by did do does for from had has have he her his
+    how i if in into is it its me my no not of on or our she so that the their
+    them then there these they this to was we were what when where which who
+    whom why will with you your""".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords."""
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over page title + content, returning ``match_pages`` rows."""
+
+    def __init__(
+        self, rows: Sequence[Dict[str, Any]], k1: float = 1.5, b: float = 0.75
+    ):
+        self.ids = np.array([r["id"] for r in rows], dtype=np.int64)
+        self.titles = [r.get("title") for r in rows]
+        self.contents = [r.get("content") for r in rows]
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = []
+        for i, row in enumerate(rows):
+            terms = tokenize(f"{row.get('title') or ''} {row.get('content') or ''}")
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings[term].append((i, tf))
+
+        n = len(rows)
+        doc_len = np.array(lengths, dtype=np.float32)
+        avgdl = float(doc_len.mean()) if n else 0.0
+        # per-document length normalisation, precomputed once
+        self._norm = k1 * (1 - b + b * doc_len / (avgdl or 1.0))
+        self.k1 = k1
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for term, docs in postings.items():
+            idx = np.array([d for d, _ in docs], dtype=np.int64)
+            tf = np.array([f for _, f in docs], dtype=np.float32)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            self._postings[term] = (idx, tf, idf)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def doc_freq(self, term: str) -> int:
+        posting = self._postings.get(term)
+        return len(posting[0]) if posting else 0
+
+    @classmethod
+    def load(cls, sb: Optional[Client] = None) -> "BM25Index":
+        """Read every page from Supabase, 1000 rows at a time."""
+        sb = sb or Supabase.client()
+        rows: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            batch = (
+                sb.table("pages")
+                .select("id,title,content")
+                .order("id")
+                .range(start, start + PAGE_SIZE - 1)
+                .execute()
+                .data
+            ) or []
+            rows.extend(batch)
+            if len(batch) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        return cls(rows)
+
+    def search(self, query: str, k: int = 3) -> List[Dict]:
+        """Return up to ``k`` pages sharing a term with ``query``, best first."""
+        if not len(self) or k <= 0:
+            return []
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            idx, tf, idf = posting
+            scores[idx] += idf * tf * (self.k1 + 1) / (tf + self._norm[idx])
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        k = min(k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {
+                "id": int(self.ids[i]),
+                "title": self.titles[i],
+                "content": self.contents[i],
+                "score": float(scores[i]),
+                "page_id": int(self.ids[i]),
+            }
+            for i in top
+        ]
+
+
+_index: Optional[BM25Index] = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def reload_lexical_index() -> BM25Index:
+    """Rebuild the process-wide index from the current ``pages`` rows."""
+    global _index, _loaded_at
+    index = BM25Index.load()
+    _index, _loaded_at = index, time.monotonic()
+    return index
+
+
+def get_lexical_index() -> BM25Index:
+    """Process-wide index, loaded on first use (or at startup).
+
+    Once older than ``LOCAL_INDEX_TTL_S`` (0 disables this) it is rebuilt
+    by the next caller, while concurrent callers keep searching the previous
+    index. A failed rebuild keeps the previous index.
+    """
+    if _index is None:
+        with _lock:
+            if _index is None:
+                return reload_lexical_index()
+
+    ttl = get_settings().local_index_ttl_s
+    if ttl > 0 and time.monotonic() - _loaded_at >= ttl and _lock.acquire(False):
+        try:
+            reload_lexical_index()
+        except Exception as e:
+            print(f"Error reloading lexical index: {str(e)}")
+        finally:
+            _lock.release()
+    return _index
+
+
+def reciprocal_rank_fusion(
+    rankings: Mapping[str, Sequence[Dict[str, Any]]], k: int, rrf_k: int = 60
+) -> List[Dict[str, Any]]:
+    """Merge ranked page lists: each page scores ``sum(1 / (rrf_k + rank))``.
+
+    Returned rows keep the first list's fields, carry the fused ``score`` and
+    record their rank in each list as ``<name>_rank``.
+    """
+    fused: Dict[Any, Dict[str, Any]] = {}
+    for name, ranking in rankings.items():
+        for rank, row in enumerate(ranking, start=1):
+            page_id = row.get("page_id", row.get("id"))
+            entry = fused.setdefault(page_id, {**row, "page_id": page_id, "score": 0.0})
+            entry["score"] += 1.0 / (rrf_k + rank)
+            entry[f"{name}_rank"] = rank
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:k]
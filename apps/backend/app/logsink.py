@@ -0,0 +1,161 @@
+"""Buffered JSONL log writer.
+
+Request handlers hand records to ``LogSink.write``, which only puts them on a
+queue. A background thread drains the queue and appends them to
+``<dir>/<stream>-<date>.jsonl`` in batches, flushing when ``batch_size``
+records are buffered or ``flush_interval_s`` has passed, whichever is first.
+Files rotate daily by record date. The FastAPI lifespan calls
+``close_log_sink`` so buffered records are written before the process exits.
+"""
+
+from __future__ import annotations
+
+import atexit
+import datetime as dt
+import json
+import pathlib
+import queue
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from .config import get_settings
+
+
+_STOP = object()
+
+
+class LogSink:
+    """Queue in front of a background thread that batches JSONL appends."""
+
+    def __init__(
+        self,
+        directory: str = "logs",
+        batch_size: int = 100,
+        flush_interval_s: float = 1.0,
+        max_queue: int = 10000,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._files: Dict[Tuple[str, dt.date], IO[str]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    def write(self, stream: str, record: Dict[str, Any], echo: bool = False) -> None:
+        """Queue ``record`` for ``<stream>-<today>.jsonl``; never blocks.
+
+        ``echo`` also prints the record to stdout from the writer thread.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((stream, dt.date.today(), record, echo))
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="log-sink", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self) -> None:
+        buffer: List[Tuple[str, dt.date, Dict[str, Any], bool]] = []
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(buffer)
+                self._close_files()
+                return
+            if item is not None:
+                buffer.append(item)
+
+            if len(buffer) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(buffer)
+                buffer = []
+                deadline = time.monotonic() + self.flush_interval_s
+
+    def _flush(self, buffer: List[Tuple[str, dt.date, Dict[str, Any], bool]]) -> None:
+        if not buffer:
+            return
+        lines: Dict[Tuple[str, dt.date], List[str]] = defaultdict(list)
+        for stream, day, record, echo in buffer:
+            line = json.dumps(record, default=str)
+            lines[(stream, day)].append(line + "\n")
+            if echo:
+                print(f"[{stream}]", line)
+
+        for key, chunk in lines.items():
+            try:
+                f = self._file(key)
+                f.writelines(chunk)
+                f.flush()
+                self.written += len(chunk)
+            except OSError as e:
+                self.dropped += len(chunk)
+                print(f"Log sink failed to write {key[0]} records: {e}")
+        self.flushes += 1
+
+    def _file(self, key: Tuple[str, dt.date]) -> IO[str]:
+        f = self._files.get(key)
+        if f is None:
+            # A new day for this stream: close yesterday's file
+            for old in [k for k in self._files if k[0] == key[0]]:
+                self._files.pop(old).close()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{key[0]}-{key[1]}.jsonl"
+            f = self._files[key] = open(path, "a", encoding="utf-8")
+        return f
+
+    def _close_files(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write everything still queued and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
+
+
+@lru_cache
+def get_log_sink() -> LogSink:
+    s = get_settings()
+    sink = LogSink(
+        directory=s.log_dir,
+        batch_size=s.log_batch_size,
+        flush_interval_s=s.log_flush_interval_s,
+        max_queue=s.log_queue_size,
+    )
+    atexit.register(sink.close)  # scripts and tests have no lifespan
+    return sink
+
+
+def close_log_sink() -> None:
+    get_log_sink().close()
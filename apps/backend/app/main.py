@@ -1,53 +1,70 @@
+import asyncio
+import base64
 import datetime as dt
 import json
-import pathlib
 import sys
 import textwrap
-from typing import Any, Dict, Optional
-
-from fastapi import Depends, FastAPI, HTTPException, Query, Response
-from kafka import KafkaAdminClient, KafkaProducer
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from kafka import KafkaAdminClient
 from openai import APIError
 from starlette.middleware.cors import CORSMiddleware
 
+from .cache import get_answer_cache, get_embedding_cache, get_page_cache
 from .config import Settings, get_settings
 from .db import Supabase
-from .metrics import instrument
+from .events import close_kafka_producer, delivery_stats, publish_gift_event
+from .index import get_local_index
+from .lexical import get_lexical_index
+from .logsink import close_log_sink, get_log_sink
+from .metrics import HTTP_LATENCY, HTTP_REQUESTS, REGISTRY, Gauge, instrument, log_usage
 from .schemas import AskRequest, AskResponse, VaultEntry, VaultSaveRequest
-from .vector import get_openai_client, similar_pages
-
-
-# Initialize Kafka producer
-producer: Optional[KafkaProducer] = None
-
-
-def get_kafka_producer() -> KafkaProducer:
-    global producer
-    if producer is None:
-        producer = KafkaProducer(
-            bootstrap_servers="kafka:29092",  # Using internal Docker network
-            value_serializer=lambda v: json.dumps(v).encode("utf-8"),
-            api_version=(2, 8, 0),  # Specify a stable API version
-            request_timeout_ms=10000,  # 10 second timeout
-            retry_backoff_ms=1000,  # Wait 1s between retries
-            max_in_flight_requests_per_connection=1,  # Ensure ordering
-        )
-    return producer
+from .tracing import current_trace_id, parse_incoming, span
+from .vector import (
+    _embed,
+    get_embedding_batcher,
+    get_openai_client,
+    get_query_provider,
+    similar_pages,
+)
 
 
-async def publish_gift_event(payload: dict):
-    """Publish a gift event to the gift_events topic."""
-    producer = get_kafka_producer()
-    try:
-        future = producer.send("gift_events", value=payload)
-        # Wait for the message to be sent
-        future.get(timeout=10)
-    except Exception as e:
-        print(f"Failed to send message to Kafka: {e}")
-        raise
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model and page matrix before serving so the first
+    # /ask doesn't pay for them
+    settings = get_settings()
+    if settings.kafka_bootstrap == "memory":
+        # emulator code is only imported when it is asked for
+        from .emulators import broker
+
+        broker.install()
+    provider = get_query_provider()
+    await asyncio.to_thread(provider.load)
+    if settings.vector_backend == "local":
+        await asyncio.to_thread(get_local_index, provider.column)
+        if settings.retrieval_mode != "vector":
+            await asyncio.to_thread(get_lexical_index)
+    if settings.answer_cache_seed_from_vault:
+        try:
+            await _seed_answer_cache(
+                settings.answer_cache_seed_from_vault,
+                settings.answer_cache_seed_concurrency,
+            )
+        except Exception as e:
+            print(f"Answer cache warm-up failed: {e}")
+    yield
+    await close_kafka_producer()
+    await asyncio.to_thread(close_log_sink)
 
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Gibsey Backend",
     version="1.0.0",
     docs_url="/docs",
@@ -109,9 +126,89 @@ async def health(settings: Settings = Depends(get_settings)):
     return {"status": "ok", "environment": settings.env}
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    trace_id, parent_id = parse_incoming(request.headers)
+    with span(
+        "http.request",
+        trace_id=trace_id,
+        parent_id=parent_id,
+        method=request.method,
+        path=request.url.path,
+    ) as root:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Trace-ID"] = root.trace_id
+            return response
+        finally:
+            # label by route template (/read, not /read?id=7) to bound cardinality
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            root.name = f"{request.method} {route}"
+            root.set(status=status)
+            HTTP_LATENCY.observe(
+                time.perf_counter() - t0, method=request.method, route=route
+            )
+            HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
+
+
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    return {
+        ("embedding",): get_embedding_cache().stats()["hit_ratio"],
+        ("answer",): get_answer_cache().stats()["hit_ratio"],
+        ("page",): get_page_cache().stats()["hit_ratio"],
+    }
+
+
+REGISTRY.register(
+    Gauge(
+        "gibsey_cache_hit_ratio",
+        "Hit ratio of the in-process caches since startup",
+        ["cache"],
+        _cache_hit_ratios,
+    )
+)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """All in-process metrics in Prometheus text exposition format."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the embedding, answer and page caches."""
+    return {
+        "embedding": get_embedding_cache().stats(),
+        "answer": get_answer_cache().stats(),
+        "page": get_page_cache().stats(),
+    }
+
+
+@app.get("/embed/stats")
+async def embed_stats() -> Dict[str, Any]:
+    """Queue depth, batch sizes and added wait of the embedding batcher."""
+    return get_embedding_batcher().stats()
+
+
 @app.get("/kafka/status")
 async def kafka_status() -> Dict[str, Any]:
     """Check Kafka broker status and list topics."""
+    if get_settings().kafka_bootstrap == "memory":
+        from .emulators.broker import get_memory_broker
+
+        return {
+            "topics": sorted(get_memory_broker().topics),
+            "gift_events_topic": True,  # created on first send, like auto-create
+            "status": "ok",
+            "emulated": True,
+            "producer": delivery_stats,
+        }
     admin = None
     try:
         admin = KafkaAdminClient(
@@ -125,6 +222,7 @@ async def kafka_status() -> Dict[str, Any]:
             "topics": topics,
             "gift_events_topic": "gift_events" in topics,
             "status": "ok" if "gift_events" in topics else "error",
+            "producer": delivery_stats,
         }
     except Exception as e:
         return {
@@ -162,12 +260,14 @@ async def debug():
     }
 
 
-@app.get("/read")
-async def read_page(id: int = Query(..., gt=0)):
+# Handlers that use the sync Supabase client are plain ``def`` so FastAPI runs
+# them in its threadpool instead of blocking the event loop.
+def _fetch_page(id: int) -> Dict[str, Any]:
+    """Read a page row from Supabase and cache it under its ETag."""
     page = (
         Supabase.client()
         .table("pages")
-        .select("id,title,content,symbol_id")
+        .select("id,title,content,symbol_id,updated_at")
         .eq("id", id)
         .single()
         .execute()
@@ -175,39 +275,257 @@ async def read_page(id: int = Query(..., gt=0)):
     )
     if not page:
         raise HTTPException(status_code=404, detail="Page not found")
-    return page
+    updated_at = page.pop("updated_at", None)
+    etag = get_page_cache().put(id, page, updated_at)
+    return {"row": page, "etag": etag, "updated_at": updated_at}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@app.get("/read")
+def read_page(
+    id: int = Query(..., gt=0),
+    if_none_match: Optional[str] = Header(None),
+):
+    cache = get_page_cache()
+    entry, fresh = cache.get(id)
+    if entry is None:
+        entry = _fetch_page(id)
+    elif not fresh:
+        # Only updated_at crosses the wire unless the page actually changed
+        rows = (
+            Supabase.client()
+            .table("pages")
+            .select("updated_at")
+            .eq("id", id)
+            .execute()
+            .data
+        )
+        if rows and rows[0].get("updated_at") == entry["updated_at"]:
+            cache.touch(id)
+        else:
+            cache.invalidate(id)
+            entry = _fetch_page(id)
+
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": f"public, max-age={get_settings().read_max_age_s}",
+    }
+    if _etag_matches(if_none_match, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(entry["row"], headers=headers)
+
+
+MAX_PAGES_PER_REQUEST = 100
+
+
+@app.get("/pages")
+def read_pages(
+    ids: Optional[str] = Query(None, description="Comma-separated page ids"),
+    start: Optional[int] = Query(None, gt=0, description="First id of a range"),
+    end: Optional[int] = Query(None, gt=0, description="Last id of a range"),
+    prefetch: int = Query(
+        0, ge=0, le=20, description="Also return this many pages either side"
+    ),
+):
+    """Fetch several pages in one request.
+
+    Pages come from the in-process page cache where fresh, and everything else
+    from a single ``in`` query. ``prefetch`` widens the window so a reader
+    paging sequentially already holds the next and previous pages.
+    """
+    too_many = HTTPException(
+        status_code=400,
+        detail=f"At most {MAX_PAGES_PER_REQUEST} pages per request",
+    )
+    wanted = set()
+    if ids:
+        try:
+            wanted.update(int(i) for i in ids.split(",") if i.strip())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be integers")
+    if start is not None or end is not None:
+        if start is None or end is None or end < start:
+            raise HTTPException(status_code=400, detail="Invalid page range")
+        # checked before the range is materialised, prefetch span included
+        if end + prefetch - max(1, start - prefetch) + 1 > MAX_PAGES_PER_REQUEST:
+            raise too_many
+        wanted.update(range(start, end + 1))
+    if not wanted or min(wanted) < 1:
+        raise HTTPException(status_code=400, detail="No valid page ids requested")
+    if len(wanted) > MAX_PAGES_PER_REQUEST:
+        raise too_many
+    if prefetch:
+        # neighbours of each requested page, not the whole span between them
+        wanted.update(
+            n
+            for page_id in list(wanted)
+            for n in range(max(1, page_id - prefetch), page_id + prefetch + 1)
+        )
+    if len(wanted) > MAX_PAGES_PER_REQUEST:
+        raise too_many
+
+    cache = get_page_cache()
+    pages: Dict[int, Dict[str, Any]] = {}
+    for page_id in wanted:
+        entry, fresh = cache.get(page_id)
+        if fresh:
+            pages[page_id] = entry["row"]
+
+    missing = sorted(wanted - pages.keys())
+    if missing:
+        rows = (
+            Supabase.client()
+            .table("pages")
+            .select("id,title,content,symbol_id,updated_at")
+            .in_("id", missing)
+            .execute()
+            .data
+        )
+        for row in rows:
+            updated_at = row.pop("updated_at", None)
+            cache.put(row["id"], row, updated_at)
+            pages[row["id"]] = row
+
+    return {
+        "pages": [pages[i] for i in sorted(pages)],
+        "missing": sorted(wanted - pages.keys()),
+    }
 
 
 # OpenAI model name constant
 OPENAI_MODEL = "gpt-4o"
 
+FALLBACK_ANSWER = "Gibsey is momentarily lost in the dream fog. Try again shortly."
+ERROR_ANSWER = (
+    "I'm sorry, I encountered an error while processing your question. "
+    "Please try again later."
+)
+
+
+def _build_prompt(question: str, hits: list) -> str:
+    """Render the retrieved pages and question into the GPT-4o prompt."""
+    context = "\n---\n".join(
+        f"Page {h['page_id']}: {textwrap.shorten(h.get('content', ''), 200, placeholder='...')}"
+        for h in hits
+    )
+    return (
+        "You are the narrator of a metafictional novel called Gibsey. "
+        "Answer in ≤120 words, remain poetic but precise.\n\n"
+        f"Context:\n{context}\n\nQuestion: {question}"
+    )
+
+
+async def _cached_answer(
+    req: AskRequest,
+) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+    """Look the question up in the semantic answer cache.
+
+    Returns the question vector (None when the caller bypassed the cache) and
+    the cached entry on a hit.
+    """
+    cache = get_answer_cache()
+    if req.bypass_cache:
+        cache.record_bypass()
+        return None, None
+    with span("answer_cache.lookup") as sp:
+        vec = await _embed(req.question)
+        hit = cache.lookup(vec, req.page_id)
+        sp.set(hit=hit is not None)
+    return vec, hit
+
+
+def _cache_hit_metadata(hit: Dict[str, Any], elapsed_ms: int) -> Dict[str, Any]:
+    return {
+        **hit["metadata"],
+        "tokens_used": 0,
+        "response_time_ms": elapsed_ms,
+        "cost_usd": 0.0,
+        "error": None,
+        "cache_hit": True,
+        "cache_score": round(hit["score"], 4),
+    }
+
+
+async def _seed_answer_cache(limit: int, concurrency: int = 8) -> None:
+    """Warm the answer cache with the most recent vault entries.
+
+    At most ``concurrency`` questions are embedded at once, so a large seed
+    doesn't burst the embeddings API at startup.
+    """
+    sb = await Supabase.aclient()
+    rows = (
+        await sb.table("vault")
+        .select("page_id, question, answer")
+        .order("created_at", desc=True)
+        .limit(limit)
+        .execute()
+    ).data or []
+    rows = [r for r in rows if r.get("question") and r.get("answer")]
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def embed(question: str) -> List[float]:
+        async with sem:
+            return await _embed(question)
+
+    vectors = await asyncio.gather(*(embed(r["question"]) for r in rows))
+    cache = get_answer_cache()
+    for row, vec in zip(rows, vectors):
+        cache.store(
+            vec,
+            row["page_id"],
+            row["answer"],
+            {"model": OPENAI_MODEL, "context_pages": [], "source": "vault"},
+        )
+    print(f"Answer cache warmed with {len(rows)} vault entries")
+
+
+def _log_error(question: str, error_msg: str) -> None:
+    log_entry = {
+        "timestamp": dt.datetime.utcnow().isoformat(),
+        "question": question,
+        "error": error_msg,
+        "type": "error",
+        "trace_id": current_trace_id(),
+    }
+    get_log_sink().write("errors", log_entry)
+
 
 @app.post("/ask", response_model=AskResponse)
 async def ask(req: AskRequest, response: Response):
     """Handle questions using RAG with GPT-4o and vector search."""
     try:
-        # 1. Fetch similar shards using vector search
-        hits = similar_pages(req.question, k=req.k or 3)
+        # 0. Reuse the answer to a near-identical question if we have one
+        t0 = time.perf_counter()
+        vec, hit = await _cached_answer(req)
+        if hit:
+            elapsed_ms = round((time.perf_counter() - t0) * 1000)
+            response.headers.update(
+                {"X-Cache": "HIT", "X-Latency-MS": str(elapsed_ms), "X-Cost-USD": "0"}
+            )
+            return {
+                "answer": hit["answer"],
+                "metadata": _cache_hit_metadata(hit, elapsed_ms),
+            }
 
-        # Create context from top hits
-        context = "\n---\n".join(
-            f"Page {h['page_id']}: {textwrap.shorten(h.get('content', ''), 200, placeholder='...')}"
-            for h in hits
-        )
+        # 1. Fetch similar shards using vector search
+        hits = await similar_pages(req.question, k=req.k or 3)
 
-        # 2. Build the prompt for GPT-4o
-        system_msg = (
-            "You are the narrator of a metafictional novel called Gibsey. "
-            "Answer in ≤120 words, remain poetic but precise.\n\n"
-            f"Context:\n{context}\n\nQuestion: {req.question}"
-        )
+        # 2. Build the prompt for GPT-4o from the top hits
+        with span("build_prompt", pages=len(hits)):
+            system_msg = _build_prompt(req.question, hits)
 
         # 3. Call GPT-4o with instrumentation
         client = get_openai_client()
 
         @instrument(OPENAI_MODEL)
-        def _chat_completion():
-            return client.chat.completions.create(
+        async def _chat_completion():
+            return await client.chat.completions.create(
                 model=OPENAI_MODEL,
                 messages=[{"role": "user", "content": system_msg}],
                 temperature=0.7,
@@ -215,20 +533,35 @@ async def ask(req: AskRequest, response: Response):
             )
 
         try:
-            resp = _chat_completion()
-            answer = resp.choices[0].message.content.strip()
-            metrics = resp._metrics  # Get metrics from the decorator
+            with span("llm", model=OPENAI_MODEL) as sp:
+                resp = await _chat_completion()
+                answer = resp.choices[0].message.content.strip()
+                metrics = resp._metrics  # Get metrics from the decorator
+                sp.set(
+                    prompt_tokens=metrics["prompt_tokens"],
+                    completion_tokens=metrics["completion_tokens"],
+                )
 
         except APIError as e:
             response.status_code = 503
             return {
-                "answer": "Gibsey is momentarily lost in the dream fog. Try again shortly.",
+                "answer": FALLBACK_ANSWER,
                 "metadata": {"error": str(e), "model": OPENAI_MODEL},
             }
 
+        context_pages = [h["page_id"] for h in hits]
+        if vec is not None:
+            get_answer_cache().store(
+                vec,
+                req.page_id,
+                answer,
+                {"model": OPENAI_MODEL, "context_pages": context_pages},
+            )
+
         # 4. Add observability headers
         response.headers.update(
             {
+                "X-Cache": "MISS" if vec is not None else "BYPASS",
                 "X-Latency-MS": str(metrics["elapsed_ms"]),
                 "X-Prompt-Tokens": str(metrics["prompt_tokens"]),
                 "X-Completion-Tokens": str(metrics["completion_tokens"]),
@@ -241,7 +574,7 @@ async def ask(req: AskRequest, response: Response):
             "answer": answer,
             "metadata": {
                 "model": OPENAI_MODEL,
-                "context_pages": [h["page_id"] for h in hits],
+                "context_pages": context_pages,
                 "tokens_used": metrics["prompt_tokens"] + metrics["completion_tokens"],
                 "response_time_ms": metrics["elapsed_ms"],
                 "cost_usd": metrics["cost_usd"],
@@ -255,20 +588,10 @@ async def ask(req: AskRequest, response: Response):
         response.status_code = 500
 
         # Log the error
-        log_dir = pathlib.Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        log_entry = {
-            "timestamp": dt.datetime.utcnow().isoformat(),
-            "question": req.question if "req" in locals() else "Unknown",
-            "error": error_msg,
-            "type": "error",
-        }
-        log_file = log_dir / f"errors-{dt.date.today()}.jsonl"
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        _log_error(req.question, error_msg)
 
         return {
-            "answer": "I'm sorry, I encountered an error while processing your question. Please try again later.",
+            "answer": ERROR_ANSWER,
             "metadata": {
                 "model": OPENAI_MODEL,
                 "context_pages": [],
@@ -278,28 +601,179 @@ async def ask(req: AskRequest, response: Response):
         }
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_answer(req: AskRequest) -> AsyncIterator[str]:
+    """Yield SSE frames: ``context``, then ``token`` deltas, then ``done``."""
+    try:
+        t0 = time.perf_counter()
+        vec, hit = await _cached_answer(req)
+        if hit:
+            metadata = _cache_hit_metadata(
+                hit, round((time.perf_counter() - t0) * 1000)
+            )
+            yield _sse("context", {"context_pages": metadata["context_pages"]})
+            yield _sse("token", {"delta": hit["answer"]})
+            yield _sse("done", metadata)
+            return
+
+        hits = await similar_pages(req.question, k=req.k or 3)
+        context_pages = [h["page_id"] for h in hits]
+        yield _sse("context", {"context_pages": context_pages})
+
+        client = get_openai_client()
+        t0 = time.perf_counter()
+        first_token_ms = None
+        usage = None
+        parts: List[str] = []
+        try:
+            with span("llm", model=OPENAI_MODEL, stream=True) as sp:
+                stream = await client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[
+                        {"role": "user", "content": _build_prompt(req.question, hits)}
+                    ],
+                    temperature=0.7,
+                    max_tokens=160,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    # the final chunk carries usage and no choices
+                    if getattr(chunk, "usage", None):
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if first_token_ms is None:
+                            first_token_ms = round((time.perf_counter() - t0) * 1000)
+                        parts.append(delta)
+                        yield _sse("token", {"delta": delta})
+                sp.set(first_token_ms=first_token_ms)
+        except APIError as e:
+            yield _sse(
+                "error",
+                {"answer": FALLBACK_ANSWER, "error": str(e), "model": OPENAI_MODEL},
+            )
+            return
+
+        metrics = log_usage(
+            OPENAI_MODEL, round((time.perf_counter() - t0) * 1000), usage
+        )
+        if vec is not None:
+            get_answer_cache().store(
+                vec,
+                req.page_id,
+                "".join(parts).strip(),
+                {"model": OPENAI_MODEL, "context_pages": context_pages},
+            )
+        yield _sse(
+            "done",
+            {
+                "model": OPENAI_MODEL,
+                "context_pages": context_pages,
+                "tokens_used": metrics["prompt_tokens"] + metrics["completion_tokens"],
+                "prompt_tokens": metrics["prompt_tokens"],
+                "completion_tokens": metrics["completion_tokens"],
+                "response_time_ms": metrics["elapsed_ms"],
+                "first_token_ms": first_token_ms,
+                "cost_usd": metrics["cost_usd"],
+                "error": None,
+            },
+        )
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error in /ask/stream endpoint: {error_msg}")
+        _log_error(req.question, error_msg)
+        yield _sse(
+            "error", {"answer": ERROR_ANSWER, "error": error_msg, "model": OPENAI_MODEL}
+        )
+
+
+@app.post("/ask/stream")
+async def ask_stream(req: AskRequest):
+    """Streaming /ask: context pages first, then tokens as GPT-4o emits them."""
+    return StreamingResponse(
+        _stream_answer(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    raw = json.dumps([row["created_at"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        dt.datetime.fromisoformat(created_at)  # reject anything but a timestamp
+        return created_at, int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @app.get("/vault/list", response_model=list[VaultEntry])
-async def list_vault_entries(
+def list_vault_entries(
+    response: Response,
     page: int = Query(1, gt=0, description="Page number, starting from 1"),
     limit: int = Query(
         20, gt=0, le=100, description="Number of items per page, max 100"
     ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page; overrides page"
+    ),
 ):
     """
     List vault entries with pagination.
     Returns the most recent entries first.
+
+    A full page sends an ``X-Next-Cursor`` header; pass it back as ``cursor``
+    to get the next page. Cursor pages seek on (created_at, id)
+    through idx_vault_created_id, so they cost the same at any depth and don't
+    shift when new entries arrive. ``page`` still works for offset pagination,
+    in the same (created_at, id) order.
     """
     try:
-        offset = (page - 1) * limit
-        response = (
-            Supabase.client()
-            .table("vault")
-            .select("id, question, answer, created_at")
-            .order("created_at", desc=True)
-            .range(offset, offset + limit - 1)
-            .execute()
+        query = (
+            Supabase.client().table("vault").select("id, question, answer, created_at")
         )
-        return response.data
+        if cursor:
+            created_at, row_id = _decode_cursor(cursor)
+            result = (
+                query.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+                )
+                # redundant with the or_, but gives the index a range bound
+                .lte("created_at", created_at)
+                .order("created_at", desc=True)
+                .order("id", desc=True)
+                .limit(limit)
+                .execute()
+            )
+        else:
+            offset = (page - 1) * limit
+            result = (
+                query.order("created_at", desc=True)
+                .order("id", desc=True)  # tiebreak, so equal timestamps don't repeat
+                .range(offset, offset + limit - 1)
+                .execute()
+            )
+
+        rows = result.data
+        next_cursor = _encode_cursor(rows[-1]) if len(rows) == limit else None
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return rows
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching vault entries: {str(e)}"
@@ -309,7 +783,9 @@ async def list_vault_entries(
 @app.post("/vault/save", status_code=202)
 async def save_to_vault(req: VaultSaveRequest):
     """Save a vault entry by publishing an event to Kafka."""
+    event_id = req.event_id or str(uuid.uuid4())
     payload = {
+        "event_id": event_id,
         "page_id": req.page_id,
         "question": req.question,
         "answer": req.answer,
@@ -319,7 +795,11 @@ async def save_to_vault(req: VaultSaveRequest):
 
     try:
         await publish_gift_event(payload)
-        return {"status": "queued", "message": "Gift event queued for processing"}
+        return {
+            "status": "queued",
+            "message": "Gift event queued for processing",
+            "event_id": event_id,
+        }
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to queue gift event: {str(e)}"
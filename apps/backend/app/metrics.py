@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import bisect
 import datetime as dt
 import functools
-import json
-import pathlib
+import inspect
+import threading
 import time
-from typing import Any, Callable
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .logsink import get_log_sink
 
 
 # current OpenAI pricing (USD per 1k tokens — adjust as needed)
@@ -13,44 +17,268 @@ PRICE = {
     "text-embedding-3-small": {"prompt": 0.00002, "completion": 0.0},
     "gpt-4o": {"prompt": 0.01, "completion": 0.03},
 }
+CHAT_MODELS = {"gpt-4o"}  # their calls are the "llm" stage of /ask
 
-LOG_DIR = pathlib.Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
 
+# ---------------------------------------------------------------------------
+# In-process metrics registry, rendered at /metrics in Prometheus text format.
+# Recording is a dict lookup and a few adds under a lock, so it stays on in
+# production; nothing is exported until /metrics is scraped.
 
-def instrument(model_name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
-    """Decorator that times the wrapped fn and logs token cost."""
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], key: LabelKey, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, key)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            v[i] += 1
+            v[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        v = self._values.get(tuple(str(labels[n]) for n in self.labelnames))
+        return int(sum(v[:-1])) if v else 0
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, v in items:
+            cumulative = 0.0
+            for bound, n in zip((*self.buckets, "+Inf"), v[:-1]):
+                cumulative += n
+                le = _labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {v[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from ``collect()``: ``{label values: number}``.
+
+    Without a ``collect`` callable the gauge holds whatever ``set()`` stored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelKey, float]]] = None,
+    ):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self.collect = collect or (lambda: dict(self._values))
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[tuple(str(labels[n]) for n in self.labelnames)] = value
+
+    def value(self, **labels: Any) -> float:
+        return self.collect().get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        lines += [
+            f"{self.name}{_labels(self.labelnames, k)} {v}"
+            for k, v in self.collect().items()
+        ]
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric: Any) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines += metric.render()
+            except Exception as e:  # a broken gauge must not hide the rest
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "gibsey_http_requests_total",
+        "HTTP requests by route and status",
+        ["method", "route", "status"],
+    )
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram(
+        "gibsey_http_request_duration_seconds",
+        "HTTP request latency by route",
+        ["method", "route"],
+    )
+)
+ASK_STAGE_LATENCY = REGISTRY.register(
+    Histogram(
+        "gibsey_ask_stage_duration_seconds",
+        "Latency of the /ask pipeline stages (embed, vector_search, llm)",
+        ["stage"],
+    )
+)
+OPENAI_TOKENS = REGISTRY.register(
+    Counter("gibsey_openai_tokens_total", "OpenAI tokens used", ["model", "kind"])
+)
+OPENAI_COST = REGISTRY.register(
+    Counter("gibsey_openai_cost_usd_total", "Estimated OpenAI spend", ["model"])
+)
+EMBED_QUEUE_DEPTH = REGISTRY.register(
+    Gauge("gibsey_embed_queue_depth", "Queries waiting in the embedding batcher")
+)
+EMBED_BATCH_SIZE = REGISTRY.register(
+    Histogram(
+        "gibsey_embed_batch_size",
+        "Queries coalesced into one embedding call",
+        buckets=(1, 2, 4, 8, 16, 32, 64),
+    )
+)
+EMBED_BATCH_WAIT = REGISTRY.register(
+    Histogram(
+        "gibsey_embed_batch_wait_seconds",
+        "Time a query waited in the embedding batcher before its batch was sent",
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+    )
+)
+KAFKA_PUBLISH_LATENCY = REGISTRY.register(
+    Histogram(
+        "gibsey_kafka_publish_duration_seconds",
+        "Gift event publish latency: enqueue, and enqueue to broker ack",
+        ["phase", "outcome"],
+    )
+)
+
+
+def log_usage(model_name: str, elapsed_ms: int, usage: Any) -> Dict[str, Any]:
+    """Cost out one OpenAI call and queue it for the daily metrics log.
+
+    ``usage`` is the OpenAI usage object (or None when the API omitted it);
+    embedding responses have no completion tokens.
+    """
     price = PRICE[model_name]
+    prompt_t = int(getattr(usage, "prompt_tokens", 0) or 0)
+    comp_t = int(getattr(usage, "completion_tokens", 0) or 0)
+    cost = round((prompt_t * price["prompt"] + comp_t * price["completion"]) / 1000, 6)
+
+    log_obj = {
+        "ts": dt.datetime.utcnow().isoformat() + "Z",
+        "model": model_name,
+        "elapsed_ms": elapsed_ms,
+        "prompt_tokens": prompt_t,
+        "completion_tokens": comp_t,
+        "cost_usd": cost,
+    }
+    OPENAI_TOKENS.inc(prompt_t, model=model_name, kind="prompt")
+    OPENAI_TOKENS.inc(comp_t, model=model_name, kind="completion")
+    OPENAI_COST.inc(cost, model=model_name)
+    if model_name in CHAT_MODELS:
+        ASK_STAGE_LATENCY.observe(elapsed_ms / 1000, stage="llm")
+
+    # printed and appended to logs/openai-<date>.jsonl off the request path
+    get_log_sink().write("openai", log_obj, echo=True)
+    return log_obj
+
+
+def instrument(model_name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator that times the wrapped fn and logs token cost.
+
+    Works on both plain functions and coroutine functions; the async wrapper
+    awaits the call so the timing covers the full round trip.
+    """
+
+    def record(resp: Any, t0: float) -> Any:
+        elapsed_ms = round((time.perf_counter() - t0) * 1000)
+        # attach metrics dict so caller can forward to headers
+        resp._metrics = log_usage(  # type: ignore[attr-defined]
+            model_name, elapsed_ms, getattr(resp, "usage", None)
+        )
+        return resp
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                return record(await func(*args, **kwargs), t0)
+
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             t0 = time.perf_counter()
-            resp = func(*args, **kwargs)
-            elapsed_ms = round((time.perf_counter() - t0) * 1000)
-
-            usage = getattr(resp, "usage", None)  # OpenAI objects expose usage
-            prompt_t = usage.prompt_tokens if usage else 0
-            comp_t = usage.completion_tokens if usage else 0
-            cost = round(
-                (prompt_t * price["prompt"] + comp_t * price["completion"]) / 1000, 6
-            )
-
-            log_obj = {
-                "ts": dt.datetime.utcnow().isoformat() + "Z",
-                "model": model_name,
-                "elapsed_ms": elapsed_ms,
-                "prompt_tokens": prompt_t,
-                "completion_tokens": comp_t,
-                "cost_usd": cost,
-            }
-            print("[metrics]", json.dumps(log_obj))
-            log_file = LOG_DIR / f"openai-{dt.date.today()}.jsonl"
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_obj) + "\n")
-            # attach metrics dict so caller can forward to headers
-            resp._metrics = log_obj  # type: ignore[attr-defined]
-            return resp
+            return record(func(*args, **kwargs), t0)
 
         return wrapper
 
@@ -0,0 +1,78 @@
+"""Retry/dead-letter routing for gift events that fail to reach the vault.
+
+A failed event is re-published to the next retry tier, each tier a topic of
+its own with a longer delay (``VAULT_RETRY_DELAYS``, seconds, comma-separated).
+Consumers of a tier hold an event until its ``not_before`` time, so a slow
+or flaky database backs up the retry topics instead of ``gift_events``.
+Once the tiers are exhausted the event goes to ``gift_events.dlq`` with the
+last failure reason and the attempt count; ``scripts/replay_dlq.py`` puts
+dead-lettered events back on the main topic.
+
+Retry state travels inside the event under ``_retry`` and is ignored when
+the row is written.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+GIFT_EVENTS_TOPIC = "gift_events"
+DLQ_TOPIC = "gift_events.dlq"
+RETRY_DELAYS = [
+    float(d) for d in os.getenv("VAULT_RETRY_DELAYS", "5,30,300").split(",") if d
+]
+RETRY_TIERS: List[Tuple[str, float]] = [
+    (f"{GIFT_EVENTS_TOPIC}.retry.{i}", delay)
+    for i, delay in enumerate(RETRY_DELAYS, start=1)
+]
+
+
+def retry_topics() -> List[str]:
+    return [topic for topic, _ in RETRY_TIERS]
+
+
+def strip_retry(event: Dict[str, Any]) -> Dict[str, Any]:
+    """The event as originally published, without retry bookkeeping."""
+    return {k: v for k, v in event.items() if k != "_retry"}
+
+
+def due_at(event: Dict[str, Any]) -> float:
+    """Epoch seconds before which a retried event must not be processed."""
+    return event.get("_retry", {}).get("not_before", 0.0)
+
+
+def route_failure(
+    event: Dict[str, Any],
+    reason: str,
+    now: Optional[float] = None,
+    retryable: bool = True,
+) -> Tuple[str, Dict[str, Any]]:
+    """Pick the topic a failed event goes to next and stamp its retry state.
+
+    Args:
+        event: The event that failed, possibly already carrying ``_retry``
+        reason: Why the write failed
+        now: Current epoch time (defaults to ``time.time()``)
+        retryable: False sends the event straight to the DLQ (e.g. bad JSON)
+
+    Returns:
+        Tuple[str, Dict]: The destination topic and the event to publish there
+    """
+    now = time.time() if now is None else now
+    prior = event.get("_retry", {})
+    n = prior.get("attempts", 0) + 1
+    meta = {
+        "attempts": n,
+        "reason": reason,
+        "first_failed_at": prior.get("first_failed_at", now),
+        "last_failed_at": now,
+    }
+
+    if retryable and n <= len(RETRY_TIERS):
+        topic, delay = RETRY_TIERS[n - 1]
+        meta["not_before"] = now + delay
+    else:
+        topic = DLQ_TOPIC
+
+    return topic, {**strip_retry(event), "_retry": meta}
@@ -8,6 +8,7 @@ class AskRequest(BaseModel):
     page_id: int = Field(1, gt=0)  # default to shard 1 for now
     question: str = Field(..., min_length=1, max_length=512)
     k: Optional[int] = Field(3, gt=0, le=5)  # how many shards to fetch
+    bypass_cache: bool = False  # force a fresh answer from the model
 
 
 class AskResponse(BaseModel):
@@ -32,3 +33,5 @@ class VaultSaveRequest(BaseModel):
     page_id: int
     question: str
     answer: str
+    # Idempotency key: resending the same event_id never creates a second row
+    event_id: Optional[str] = Field(None, min_length=1, max_length=128)
@@ -0,0 +1,135 @@
+"""Lightweight request tracing.
+
+``span(name, **attributes)`` opens a timed span nested under whatever span is
+current; the current span travels in a ``ContextVar``, so it follows the
+request through awaits, ``asyncio.to_thread`` and background tasks without
+being passed around. The HTTP middleware opens the root span, taking the trace
+ID from an incoming W3C ``traceparent`` or ``X-Request-ID`` header when there
+is one, and echoes it back as ``X-Trace-ID``.
+
+Finished spans are queued on the log sink as ``logs/traces-<date>.jsonl``,
+one JSON object per span with OTLP-style ids and nanosecond timestamps, so
+they can be grepped by trace ID or shipped to a collector later.
+"""
+
+from __future__ import annotations
+
+import re
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import get_settings
+from .logsink import get_log_sink
+
+
+_current: ContextVar[Optional["Span"]] = ContextVar("gibsey_span", default=None)
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "status",
+        "start_ns",
+        "end_ns",
+        "_t0",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._t0 = time.perf_counter_ns()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    s = _current.get()
+    return s.trace_id if s else None
+
+
+def parse_incoming(headers: Any) -> Tuple[Optional[str], Optional[str]]:
+    """``(trace_id, parent_span_id)`` from request headers, if supplied."""
+    match = TRACEPARENT.match(headers.get("traceparent", ""))
+    if match:
+        return match.group(1), match.group(2)
+    request_id = headers.get("x-request-id", "")
+    if REQUEST_ID.match(request_id):
+        return request_id, None
+    return None, None
+
+
+@contextmanager
+def span(
+    name: str,
+    trace_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    **attributes: Any,
+) -> Iterator[Span]:
+    """Time a block as a child of the current span (or as a new root).
+
+    ``trace_id``/``parent_id`` are only used for a root span, to continue a
+    trace started by the caller.
+    """
+    parent = _current.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    s = Span(name, trace_id or secrets.token_hex(16), parent_id, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "error"
+        s.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end()
+        try:
+            _current.reset(token)
+        except ValueError:
+            # exited from another context (e.g. a generator closed elsewhere)
+            _current.set(parent)
+        if get_settings().tracing_enabled:
+            get_log_sink().write("traces", s.to_dict())
@@ -1,11 +1,32 @@
+import asyncio
 import os
-from typing import Dict, List, Optional
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from openai import OpenAI
-from supabase import Client
+from openai import AsyncOpenAI
+from supabase import AsyncClient
 
+from .cache import get_embedding_cache
 from .config import get_settings
 from .db import Supabase
+from .embeddings import (
+    EmbeddingProvider,
+    LocalEmbeddings,
+    OpenAIEmbeddings,
+    provider_names,
+)
+from .index import get_local_index
+from .lexical import get_lexical_index, reciprocal_rank_fusion
+from .metrics import (
+    ASK_STAGE_LATENCY,
+    EMBED_BATCH_SIZE,
+    EMBED_BATCH_WAIT,
+    EMBED_QUEUE_DEPTH,
+    log_usage,
+)
+from .tracing import span
 
 
 MODEL = "text-embedding-3-small"
@@ -14,52 +35,278 @@ MODEL = "text-embedding-3-small"
 _default_client = None
 
 
-def get_openai_client() -> OpenAI:
-    """Get the OpenAI client, creating it if it doesn't exist."""
+def get_openai_client() -> AsyncOpenAI:
+    """Get the async OpenAI client, creating it if it doesn't exist."""
     global _default_client
     if _default_client is None:
-        _default_client = OpenAI(
+        _default_client = AsyncOpenAI(
             api_key=os.environ.get("OPENAI_API_KEY") or get_settings().openai_api_key,
             timeout=30.0,  # Add a timeout to prevent hanging
         )
     return _default_client
 
 
-def _embed(text: str, client: Optional[OpenAI] = None) -> List[float]:
-    """Return OpenAI embedding vector for the query string.
+class EmbeddingBatcher:
+    """Coalesce concurrent single-text embedding requests into one call.
+
+    Requests queue for at most ``max_wait_ms`` (or until ``max_batch`` are
+    waiting), then go to the query provider as a single list of texts (one
+    ``embeddings.create`` call, or one batched forward pass locally); each
+    caller gets back its own vector.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = 16,
+        max_wait_ms: float = 5.0,
+        client: Optional[AsyncOpenAI] = None,
+    ):
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._provider = (
+            OpenAIEmbeddings(lambda: client, MODEL, log_usage) if client else None
+        )
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.requests = 0
+        self.errors = 0
+        self.batch_sizes: Counter = Counter()
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((text, fut, time.perf_counter()))
+        EMBED_QUEUE_DEPTH.set(len(self._pending))
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch)
+        return await fut
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        EMBED_QUEUE_DEPTH.set(0)
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        now = time.perf_counter()
+        for _, _, queued_at in batch:
+            waited = (now - queued_at) * 1000
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+            EMBED_BATCH_WAIT.observe(waited / 1000)
+        self.batches += 1
+        self.requests += len(batch)
+        self.batch_sizes[len(batch)] += 1
+        EMBED_BATCH_SIZE.observe(len(batch))
+
+        # identical questions in one window only cost one input
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            provider = self._provider or get_query_provider()
+            vectors = dict(zip(texts, await provider.embed(texts)))
+            for text, fut, _ in batch:
+                if not fut.done():
+                    fut.set_result(vectors[text])
+        except Exception as e:
+            self.errors += 1
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._pending),
+            "batches": self.batches,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_batch_size": (
+                round(self.requests / self.batches, 2) if self.batches else 0.0
+            ),
+            "batch_sizes": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "avg_wait_ms": (
+                round(self.wait_ms_total / self.requests, 3) if self.requests else 0.0
+            ),
+            "max_wait_ms": round(self.wait_ms_max, 3),
+        }
+
+
+@lru_cache
+def get_embedding_provider(name: str) -> EmbeddingProvider:
+    """The process-wide provider called ``name`` ("openai" or "local")."""
+    if name == "openai":
+        # resolved per call so tests can swap the client
+        return OpenAIEmbeddings(lambda: get_openai_client(), MODEL, log_usage)
+    if name == "local":
+        return LocalEmbeddings(get_settings().local_embedding_model)
+    raise ValueError(f"Unknown embedding provider: {name!r}")
+
+
+def get_query_provider() -> EmbeddingProvider:
+    """Provider that embeds questions, chosen by ``EMBEDDING_PROVIDER``."""
+    return get_embedding_provider(get_settings().embedding_provider)
+
+
+def write_providers() -> List[EmbeddingProvider]:
+    """Providers the page-embedding job fills; both while dual-writing."""
+    s = get_settings()
+    names = provider_names(s.embedding_provider, s.embedding_dual_write)
+    return [get_embedding_provider(n) for n in names]
+
+
+@lru_cache
+def get_embedding_batcher() -> EmbeddingBatcher:
+    s = get_settings()
+    return EmbeddingBatcher(
+        max_batch=s.embed_batch_max_size, max_wait_ms=s.embed_batch_max_wait_ms
+    )
+
+
+async def _embed(text: str, client: Optional[AsyncOpenAI] = None) -> List[float]:
+    """Return the query provider's embedding vector for the query string.
+
+    Vectors are served from the embedding cache when possible, so repeated
+    questions never reach the provider; cache keys include the model, so
+    switching providers never serves a vector from the other one. Misses go
+    through the shared ``EmbeddingBatcher`` unless a client is passed
+    explicitly.
 
     Args:
         text: The text to embed
         client: Optional OpenAI client to use (for testing)
     """
-    if client is None:
-        client = get_openai_client()
-    resp = client.embeddings.create(model=MODEL, input=text)
-    return resp.data[0].embedding
+    if client is not None:
+        provider: EmbeddingProvider = OpenAIEmbeddings(lambda: client, MODEL, log_usage)
+    else:
+        provider = get_query_provider()
+    with span("embed", provider=provider.name, model=provider.model) as sp:
+        cache = get_embedding_cache()
+        # the shared tier reads and commits SQLite, so keep both off the loop
+        vec = await asyncio.to_thread(cache.get, text, provider.model)
+        sp.set(cache_hit=vec is not None)
+        if vec is not None:
+            return vec
+
+        with ASK_STAGE_LATENCY.time(stage="embed"):
+            if client is None and get_settings().embed_batch_max_wait_ms > 0:
+                sp.set(batched=True)
+                vec = await get_embedding_batcher().embed(text)
+            else:
+                vec = await provider.embed_one(text)
+        await asyncio.to_thread(cache.put, text, provider.model, vec)
+        return vec
+
 
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
 
-def similar_pages(
-    query: str, k: int = 3, client: Optional[OpenAI] = None
+
+async def similar_pages(
+    query: str,
+    k: int = 3,
+    client: Optional[AsyncOpenAI] = None,
+    mode: Optional[str] = None,
 ) -> List[Dict]:
-    """Return top‑k pages ordered by cosine similarity.
+    """Return the top‑k pages for ``query``.
+
+    ``mode`` (default ``RETRIEVAL_MODE``) is "vector" for cosine similarity,
+    "lexical" for BM25/full-text, or "hybrid" to run both in parallel over
+    ``HYBRID_CANDIDATES`` each and merge them with reciprocal rank fusion.
 
     Args:
         query: The text to find similar pages for
         k: Number of results to return (default: 3)
         client: Optional OpenAI client to use (for testing)
+        mode: Retrieval mode, overriding the setting
 
     Returns:
-        List of dicts with id, title, content and similarity score
+        List of dicts with id, title, content and score (similarity, BM25 or
+        fused score depending on the mode)
     """
-    vec = _embed(query, client=client)
-    sb: Client = Supabase.client()
+    settings = get_settings()
+    backend = settings.vector_backend
+    mode = mode or settings.retrieval_mode
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode!r}")
+    with span("similar_pages", k=k, backend=backend, mode=mode) as sp:
+        if mode == "vector":
+            results = await _search(query, k, backend, client)
+        elif mode == "lexical":
+            results = await _lexical_search(query, k, backend)
+        else:
+            depth = max(k, settings.hybrid_candidates)
+            dense, sparse = await asyncio.gather(
+                _search(query, depth, backend, client),
+                _lexical_search(query, depth, backend),
+            )
+            results = reciprocal_rank_fusion(
+                {"vector": dense, "lexical": sparse}, k, settings.rrf_k
+            )
+        sp.set(results=len(results))
+        return results
+
+
+async def _lexical_search(query: str, k: int, backend: str) -> List[Dict]:
+    if backend == "local":
+        # first call tokenises every page; afterwards this is sub-millisecond
+        index = await asyncio.to_thread(get_lexical_index)
+        with ASK_STAGE_LATENCY.time(stage="lexical_search"), span(
+            "lexical_search", backend="local", k=k
+        ):
+            return index.search(query, k)
+
+    try:
+        sb: AsyncClient = await Supabase.aclient()
+        with ASK_STAGE_LATENCY.time(stage="lexical_search"), span(
+            "lexical_search", backend="supabase", rpc="match_pages_text", k=k
+        ):
+            response = await sb.rpc(
+                "match_pages_text", {"query_text": query, "match_k": k}
+            ).execute()
+        results = response.data or []
+        for result in results:
+            result.setdefault("page_id", result.get("id"))
+        return results
+    except Exception as e:
+        # hybrid mode falls back to the vector hits alone
+        print(f"Error in lexical search: {str(e)}")
+        return []
+
+
+async def _search(
+    query: str, k: int, backend: str, client: Optional[AsyncOpenAI]
+) -> List[Dict]:
+    vec = await _embed(query, client=client)
+    # search the column the query provider's vectors live in
+    provider = get_query_provider()
+    if backend == "local":
+        # first call loads the matrix from Supabase; afterwards this is free
+        index = await asyncio.to_thread(get_local_index, provider.column)
+        with ASK_STAGE_LATENCY.time(stage="vector_search"), span(
+            "vector_search", backend="local", k=k
+        ):
+            return index.search(vec, k)
+
+    sb: AsyncClient = await Supabase.aclient()
 
     try:
         # Execute the RPC call and get the response
-        response = sb.rpc(
-            "match_pages",  # Postgres function for vector similarity
-            {"query_embedding": vec, "match_k": k},
-        ).execute()
+        with ASK_STAGE_LATENCY.time(stage="vector_search"), span(
+            "vector_search", backend="supabase", rpc=provider.rpc, k=k
+        ):
+            response = await sb.rpc(
+                provider.rpc,  # Postgres function for vector similarity
+                {"query_embedding": vec, "match_k": k},
+            ).execute()
 
         # Ensure each result has a page_id field
         results = response.data or []
@@ -5,6 +5,7 @@ CREATE TABLE IF NOT EXISTS vault (
     question TEXT NOT NULL,
     answer TEXT NOT NULL,
     symbol_id VARCHAR(255),
+    event_id VARCHAR(128),  -- idempotency key; redelivered events are skipped
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -14,3 +15,9 @@ CREATE INDEX IF NOT EXISTS idx_vault_page_id ON vault (page_id);
 
 -- Create an index on symbol_id for faster lookups
 CREATE INDEX IF NOT EXISTS idx_vault_symbol_id ON vault (symbol_id);
+
+-- Keyset index for /vault/list: newest first, id breaks created_at ties
+CREATE INDEX IF NOT EXISTS idx_vault_created_id ON vault (created_at DESC, id DESC);
+
+-- One row per gift event, however many times it is delivered
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vault_event_id ON vault (event_id);
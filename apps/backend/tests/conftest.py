@@ -1,9 +1,11 @@
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.cache import AnswerCache, EmbeddingCache, PageCache
 from app.config import Settings
+from app.logsink import LogSink
 
 
 # Set up test environment variables before importing anything that might use them
@@ -28,19 +30,55 @@ def mock_settings():
         yield settings
 
 
+@pytest.fixture(autouse=True)
+def embedding_cache():
+    """Give every test an empty, memory-only embedding cache."""
+    cache = EmbeddingCache(path=None)
+    with patch("app.vector.get_embedding_cache", return_value=cache):
+        yield cache
+
+
+@pytest.fixture(autouse=True)
+def answer_cache():
+    """Give every test an empty semantic answer cache."""
+    cache = AnswerCache()
+    with patch("app.main.get_answer_cache", return_value=cache):
+        yield cache
+
+
+@pytest.fixture(autouse=True)
+def page_cache():
+    """Give every test an empty /read page cache."""
+    cache = PageCache()
+    with patch("app.main.get_page_cache", return_value=cache):
+        yield cache
+
+
+@pytest.fixture(autouse=True)
+def log_sink(tmp_path):
+    """Send JSONL logs to a per-test directory instead of ./logs."""
+    sink = LogSink(directory=str(tmp_path / "logs"), flush_interval_s=0.05)
+    with patch("app.metrics.get_log_sink", return_value=sink), patch(
+        "app.main.get_log_sink", return_value=sink
+    ), patch("app.tracing.get_log_sink", return_value=sink):
+        yield sink
+    sink.close()
+
+
 @pytest.fixture
 def mock_supabase():
     """Mock Supabase client."""
     with patch("app.vector.Supabase") as mock_supabase:
         mock_client = MagicMock()
         mock_supabase.client.return_value = mock_client
+        mock_supabase.aclient = AsyncMock(return_value=mock_client)
         yield mock_client
 
 
 @pytest.fixture
 def mock_openai():
     """Mock OpenAI client."""
-    with patch("app.vector.OpenAI") as mock_openai:
+    with patch("app.vector.AsyncOpenAI") as mock_openai:
         mock_client = MagicMock()
         mock_openai.return_value = mock_client
         yield mock_client
@@ -1,10 +1,14 @@
+import asyncio
+import json
 import os
-from unittest.mock import MagicMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+from app.main import _seed_answer_cache, app
 
 
 client = TestClient(app)
@@ -23,7 +27,9 @@ def mock_similar_pages():
         {"page_id": 2, "content": "Sample content 2"},
     ]
 
-    with patch("app.main.similar_pages") as mock:
+    with patch("app.main.similar_pages") as mock, patch(
+        "app.main._embed", return_value=[0.1, 0.2, 0.3]
+    ):
         # Mock return value for similar_pages
         mock.return_value = mock_return
         yield mock
@@ -46,7 +52,7 @@ def mock_openai():
         mock_response.usage.completion_tokens = 20
         mock_response.usage.total_tokens = 30
 
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         yield mock_client
 
@@ -90,13 +96,13 @@ def test_ask_endpoint_error_handling():
     assert response.status_code == 422  # Validation error
 
 
-@patch("app.vector.get_openai_client")
-def test_ask_endpoint_openai_error(mock_get_client):
+@patch("app.main.get_openai_client")
+def test_ask_endpoint_openai_error(mock_get_client, mock_similar_pages):
     """Test error handling when OpenAI API fails."""
     # Setup mock OpenAI client to raise an error
     mock_client = MagicMock()
     mock_get_client.return_value = mock_client
-    mock_client.chat.completions.create.side_effect = Exception("API error")
+    mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
 
     test_data = {"page_id": 1, "question": "What is the meaning of life?", "k": 3}
 
@@ -106,3 +112,136 @@ def test_ask_endpoint_openai_error(mock_get_client):
     assert response.status_code == 500
     data = response.json()
     assert "error" in data["metadata"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_asks_overlap(mock_openai):
+    """Slow retrieval and completion calls must not serialize requests."""
+    delay = 0.2
+
+    async def slow_similar_pages(question, k):
+        await asyncio.sleep(delay)
+        return [{"page_id": 1, "content": "Sample content 1"}]
+
+    async def slow_completion(**kwargs):
+        await asyncio.sleep(delay)
+        return mock_openai.chat.completions.create.return_value
+
+    mock_openai.chat.completions.create.side_effect = slow_completion
+    n = 5
+
+    with patch("app.main.similar_pages", side_effect=slow_similar_pages), patch(
+        "app.main._embed", side_effect=lambda q: [float(q[1:]), 1.0]
+    ):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as ac:
+            t0 = time.perf_counter()
+            responses = await asyncio.gather(
+                *(ac.post("/ask", json={"question": f"q{i}"}) for i in range(n))
+            )
+            elapsed = time.perf_counter() - t0
+
+    assert all(r.status_code == 200 for r in responses)
+    # run one after another this would take n * 2 * delay = 2s
+    assert elapsed < n * 2 * delay / 2
+
+
+def _sse_events(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_ask_stream(mock_similar_pages, mock_openai):
+    """Context arrives first, then token deltas, then the metrics summary."""
+
+    def chunk(content=None, usage=None):
+        c = MagicMock()
+        c.usage = usage
+        c.choices = [] if content is None else [MagicMock()]
+        if content is not None:
+            c.choices[0].delta.content = content
+        return c
+
+    async def fake_stream():
+        yield chunk("Test ")
+        yield chunk("answer")
+        yield chunk(usage=MagicMock(prompt_tokens=10, completion_tokens=20))
+
+    mock_openai.chat.completions.create = AsyncMock(return_value=fake_stream())
+
+    response = client.post("/ask/stream", json={"question": "Who is the Author?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert [name for name, _ in events] == ["context", "token", "token", "done"]
+    assert events[0][1] == {"context_pages": [1, 2]}
+    assert "".join(data["delta"] for name, data in events if name == "token") == (
+        "Test answer"
+    )
+    done = events[-1][1]
+    assert done["tokens_used"] == 30
+    assert done["cost_usd"] == round((10 * 0.01 + 20 * 0.03) / 1000, 6)
+    assert mock_openai.chat.completions.create.call_args.kwargs["stream"] is True
+
+
+def test_ask_reuses_answer_for_near_duplicate(
+    mock_similar_pages, mock_openai, answer_cache
+):
+    """A paraphrase on the same page is answered from the semantic cache."""
+    first = client.post("/ask", json={"page_id": 1, "question": "Who wrote this?"})
+    with patch("app.main._embed", return_value=[0.1, 0.2, 0.31]):
+        second = client.post(
+            "/ask", json={"page_id": 1, "question": "Who is the writer?"}
+        )
+        other_page = client.post(
+            "/ask", json={"page_id": 2, "question": "Who is the writer?"}
+        )
+        bypassed = client.post(
+            "/ask",
+            json={"page_id": 1, "question": "Who is the writer?", "bypass_cache": True},
+        )
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json()["answer"] == "Test answer"
+    assert second.json()["metadata"]["cache_hit"] is True
+    assert second.json()["metadata"]["context_pages"] == [1, 2]
+    assert other_page.headers["X-Cache"] == "MISS"
+    assert bypassed.headers["X-Cache"] == "BYPASS"
+    assert mock_openai.chat.completions.create.call_count == 3
+    assert answer_cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "bypassed": 1,
+        "hit_ratio": 0.3333,
+        "size": 2,  # bypassed answers are not stored
+    }
+
+
+@pytest.mark.asyncio
+async def test_answer_cache_seed_caps_concurrent_embeds(answer_cache):
+    """Warm-up embeds vault questions a few at a time, not all at once."""
+    rows = [{"page_id": 1, "question": f"q{i}", "answer": "a"} for i in range(10)]
+    sb = MagicMock()
+    query = sb.table.return_value.select.return_value.order.return_value
+    query.limit.return_value.execute = AsyncMock(return_value=MagicMock(data=rows))
+    in_flight, peak = 0, 0
+
+    async def embed(question):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [1.0, float(len(question))]
+
+    with patch("app.main.Supabase") as supabase, patch("app.main._embed", embed):
+        supabase.aclient = AsyncMock(return_value=sb)
+        await _seed_answer_cache(10, concurrency=3)
+
+    assert peak == 3
+    assert answer_cache.stats()["size"] == 10
@@ -0,0 +1,116 @@
+"""Tests for the query-embedding cache."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from app.cache import AnswerCache, EmbeddingCache
+from app.vector import MODEL, _embed
+
+
+def test_normalized_questions_share_an_entry():
+    cache = EmbeddingCache(path=None)
+    cache.put("What is the secret of the glyph?", MODEL, [0.1, 0.2])
+
+    assert cache.get("  what is the SECRET of the glyph? ", MODEL) == [0.1, 0.2]
+    assert cache.get("What is the secret of the glyph?", "other-model") is None
+    assert cache.stats()["hits_memory"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction_and_ttl():
+    cache = EmbeddingCache(path=None, max_entries=2)
+    cache.put("a", MODEL, [1.0])
+    cache.put("b", MODEL, [2.0])
+    cache.get("a", MODEL)  # a is now most recently used
+    cache.put("c", MODEL, [3.0])
+
+    assert cache.get("b", MODEL) is None
+    assert cache.get("a", MODEL) == [1.0]
+
+    expired = EmbeddingCache(path=None, ttl_s=0)
+    expired.put("a", MODEL, [1.0])
+    assert expired.get("a", MODEL) is None
+
+
+def test_persistent_tier_is_shared(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    EmbeddingCache(path=path).put("shared question", MODEL, [0.5, -0.25])
+
+    other_worker = EmbeddingCache(path=path)
+    assert other_worker.get("shared question", MODEL) == [0.5, -0.25]
+    assert other_worker.stats()["hits_persistent"] == 1
+    # promoted into the memory tier on first read
+    assert other_worker.get("shared question", MODEL) == [0.5, -0.25]
+    assert other_worker.stats()["hits_memory"] == 1
+
+
+def test_expired_rows_are_purged_on_write(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path=path, ttl_s=60, purge_interval_s=0)
+    cache.put("old", MODEL, [1.0])
+    cache._db.execute("UPDATE embedding_cache SET created_at = created_at - 120")
+    cache.put("new", MODEL, [2.0])
+
+    keys = {row[0] for row in cache._db.execute("SELECT key FROM embedding_cache")}
+    assert keys == {cache.key("new", MODEL)}
+
+
+@pytest.mark.asyncio
+async def test_embed_skips_network_on_hit(embedding_cache):
+    client = MagicMock()
+    client.embeddings.create = AsyncMock()
+    client.embeddings.create.return_value.data = [MagicMock(embedding=[0.3, 0.4])]
+
+    assert await _embed("Who is the Author?", client=client) == [0.3, 0.4]
+    assert await _embed("who is the author?", client=client) == [0.3, 0.4]
+
+    client.embeddings.create.assert_called_once()
+    assert embedding_cache.stats()["hit_ratio"] == 0.5
+
+
+def test_answer_cache_threshold_scope_and_eviction():
+    cache = AnswerCache(threshold=0.9, max_entries=2)
+    cache.store([1.0, 0.0], 1, "first", {"context_pages": [1]})
+
+    hit = cache.lookup([0.99, 0.05], 1)
+    assert hit["answer"] == "first" and hit["score"] > 0.9
+    assert cache.lookup([0.0, 1.0], 1) is None  # too far away
+    assert cache.lookup([1.0, 0.0], 2) is None  # different page
+
+    cache.store([0.0, 1.0], 1, "second", {})
+    cache.store([0.7, 0.7], 1, "third", {})
+    assert cache.lookup([1.0, 0.0], 1) is None  # evicted as least recent
+
+    expired = AnswerCache(ttl_s=0)
+    expired.store([1.0, 0.0], 1, "stale", {})
+    assert expired.lookup([1.0, 0.0], 1) is None
+
+
+def test_answer_cache_scope_matrix_survives_growth_and_eviction():
+    cache = AnswerCache(threshold=0.99, max_entries=12)
+    basis = np.eye(16)
+    for i in range(16):  # grows past the initial 8 rows, evicts 0..3
+        cache.store(basis[i].tolist(), i % 2, f"answer {i}", {})
+    cache.store([1.0] + [0.0] * 15, 7, "other page", {})  # evicts 4
+
+    assert cache.stats()["size"] == 12
+    for i in range(16):
+        hit = cache.lookup(basis[i].tolist(), i % 2)
+        assert (hit or {}).get("answer") == (f"answer {i}" if i > 4 else None)
+    assert cache.lookup(basis[0].tolist(), 7)["answer"] == "other page"
+
+
+def test_answer_cache_expires_oldest_entries_first(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.cache.time", MagicMock(time=lambda: clock[0]))
+    cache = AnswerCache(threshold=0.9, ttl_s=60)
+    cache.store([1.0, 0.0], 1, "old", {})
+    clock[0] += 30
+    cache.store([0.0, 1.0], 1, "new", {})
+    clock[0] += 40
+
+    assert cache.lookup([1.0, 0.0], 1) is None
+    assert cache.lookup([0.0, 1.0], 1)["answer"] == "new"
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,102 @@
+"""Tests for embedding provider selection and dual-write."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app import vector
+from app.embeddings import EmbeddingProvider, LocalEmbeddings, OpenAIEmbeddings
+from app.vector import _embed, get_embedding_provider, similar_pages, write_providers
+
+
+class FakeEncoder:
+    """Stands in for a SentenceTransformer: 4-dim vectors from text length."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, normalize_embeddings, convert_to_numpy):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0, 0.0, 0.0] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def local_provider(mock_settings):
+    provider = LocalEmbeddings("test-minilm", encoder=FakeEncoder())
+    mock_settings.embedding_provider = "local"
+    mock_settings.embed_batch_max_wait_ms = 0
+    with patch("app.vector.get_embedding_provider", return_value=provider):
+        yield provider
+
+
+@pytest.mark.asyncio
+async def test_local_provider_embeds_queries_without_openai(local_provider):
+    with patch("app.vector.get_openai_client") as openai:
+        vec = await _embed("Who is the narrator?")
+        again = await _embed("Who is the narrator?")
+
+    assert vec == again == [20.0, 1.0, 0.0, 0.0]
+    assert local_provider._encoder.calls == [["Who is the narrator?"]]
+    openai.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cache_is_keyed_by_provider_model(local_provider, embedding_cache):
+    embedding_cache.put("q", "text-embedding-3-small", [9.0, 9.0])
+
+    assert await _embed("q") == [1.0, 1.0, 0.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_similar_pages_searches_the_provider_rpc(local_provider):
+    sb = MagicMock()
+    sb.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[{"id": 7}]))
+
+    with patch("app.vector.Supabase") as supabase:
+        supabase.aclient = AsyncMock(return_value=sb)
+        results = await similar_pages("q", k=1)
+
+    assert sb.rpc.call_args.args[0] == "match_pages_local"
+    assert results == [{"id": 7, "page_id": 7}]
+
+
+def test_dual_write_fills_both_providers(mock_settings):
+    assert [p.name for p in write_providers()] == ["openai"]
+
+    mock_settings.embedding_dual_write = True
+    providers = write_providers()
+
+    assert [(p.name, p.column) for p in providers] == [
+        ("openai", "embedding"),
+        ("local", "embedding_local"),
+    ]
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        get_embedding_provider("word2vec")
+
+
+@pytest.mark.asyncio
+async def test_openai_provider_reports_each_calls_tokens():
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(
+        return_value=MagicMock(
+            data=[MagicMock(embedding=[0.1]), MagicMock(embedding=[0.2])],
+            usage=MagicMock(total_tokens=12),
+        )
+    )
+    provider = OpenAIEmbeddings(lambda: client, vector.MODEL)
+
+    assert await provider.embed_with_usage(["a", "b"]) == ([[0.1], [0.2]], 12)
+    # per call, not a running total
+    assert await provider.embed_with_usage(["c"]) == ([[0.1], [0.2]], 12)
+
+
+def test_embedding_provider_requires_embed():
+    class Incomplete(EmbeddingProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,175 @@
+"""Tests for the local OpenAI / PostgREST / Kafka emulators.
+
+The HTTP emulators are driven through the real SDK clients so a wire-format
+mismatch shows up here rather than in a perf run.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI, RateLimitError
+from postgrest import SyncPostgrestClient
+
+from app import events
+from app.emulators import (
+    Faults,
+    MemoryBroker,
+    MemoryProducer,
+    broker,
+    openai_server,
+    postgrest,
+)
+from app.emulators.broker import decode
+
+
+def _openai(faults=None):
+    app = openai_server.create_app(faults)
+    return AsyncOpenAI(
+        api_key="emulated",
+        base_url="http://emulator/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_openai_embeddings_are_deterministic_unit_vectors():
+    client = _openai()
+
+    first = await client.embeddings.create(
+        model="text-embedding-3-small", input=["who is the narrator?", "other"]
+    )
+    again = await client.embeddings.create(
+        model="text-embedding-3-small", input="who is the narrator?"
+    )
+
+    vec = first.data[0].embedding
+    assert len(vec) == openai_server.EMBEDDING_DIM
+    assert np.linalg.norm(vec) == pytest.approx(1.0, abs=1e-5)
+    assert again.data[0].embedding == pytest.approx(vec)
+    assert first.data[1].embedding != pytest.approx(vec)
+
+
+@pytest.mark.asyncio
+async def test_openai_chat_streams_tokens_then_usage():
+    client = _openai()
+
+    stream = await client.chat.completions.create(
+        model="gpt-4o",
+        messages=[{"role": "user", "content": "Tell me about page 1"}],
+        max_tokens=20,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    parts, usage = [], None
+    async for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+
+    assert len(parts) > 1
+    assert usage.completion_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_openai_rate_limit_injection_raises_429():
+    client = _openai(Faults(rate_limit=1.0, retry_after=2))
+
+    with pytest.raises(RateLimitError) as exc:
+        await client.chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "hi"}]
+        )
+
+    assert exc.value.response.headers["Retry-After"] == "2"
+
+
+def test_postgrest_filters_order_and_rpc():
+    http = TestClient(postgrest.create_app(pages=20))
+    db = SyncPostgrestClient("http://testserver/rest/v1", http_client=http)
+    for i in range(4):
+        db.from_("vault").insert(
+            {"question": f"q{i}", "answer": "a", "created_at": f"2025-01-0{i + 1}"}
+        ).execute()
+
+    page = db.from_("pages").select("id,title").eq("id", 3).single().execute()
+    some = db.from_("pages").select("id").in_("id", [1, 2, 99]).execute()
+    # the /vault/list cursor seek, from the 3rd entry
+    older = (
+        db.from_("vault")
+        .select("id, question")
+        .or_('created_at.lt."2025-01-03",and(created_at.eq."2025-01-03",id.lt.3)')
+        .order("created_at", desc=True)
+        .order("id", desc=True)
+        .limit(5)
+        .execute()
+    )
+    hits = db.rpc("match_pages", {"query_embedding": [0.1] * 1536, "match_k": 2})
+
+    assert page.data == {"id": 3, "title": "Page 3"}
+    assert some.data == [{"id": 1}, {"id": 2}]
+    assert [r["question"] for r in older.data] == ["q1", "q0"]
+    assert [set(r) for r in hits.execute().data] == [
+        {"id", "title", "content", "score"}
+    ] * 2
+    assert http.get("/_emulator/stats").json()["outcomes"]["ok"] == 8
+
+
+def test_postgrest_full_text_rpc_ranks_by_bm25():
+    http = TestClient(postgrest.create_app(pages=20))
+    db = SyncPostgrestClient("http://testserver/rest/v1", http_client=http)
+
+    hits = db.rpc("match_pages_text", {"query_text": "Shard 7?", "match_k": 2})
+
+    assert [r["id"] for r in hits.execute().data][0] == 7
+
+
+@pytest.mark.asyncio
+async def test_memory_broker_receives_gift_events():
+    broker = MemoryBroker()
+    producer = MemoryProducer(broker, value_serializer=events._serialize)
+
+    async def get_producer():
+        return producer
+
+    with patch("app.events.get_kafka_producer", get_producer):
+        fut = await events.publish_gift_event({"page_id": 1, "question": "Q"})
+        record = await fut
+
+    assert decode(record) == {"page_id": 1, "question": "Q"}
+    assert record.headers[0][0] == "traceparent"
+    assert [r.offset for r in broker.fetch("gift_events", "vault")] == [0]
+    broker.commit("gift_events", "vault", 1)
+    assert broker.lag("gift_events", "vault") == 0
+
+
+@pytest.mark.asyncio
+async def test_install_routes_the_events_producer_to_the_broker():
+    try:
+        broker.install()
+        producer = await events.get_kafka_producer()
+        assert isinstance(producer, MemoryProducer)
+    finally:
+        await events.close_kafka_producer()
+        events.set_producer_factory(None)
+
+
+@pytest.mark.asyncio
+async def test_memory_producer_injects_errors_and_throttling():
+    broker = MemoryBroker()
+    failing = MemoryProducer(broker, Faults(error_rate=1.0))
+    throttled = MemoryProducer(broker, Faults(rate_limit=1.0, retry_after=0.05))
+
+    with pytest.raises(Exception, match="Injected broker error"):
+        await failing.send_and_wait("gift_events", b"x")
+
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    await throttled.send_and_wait("gift_events", b"y")
+
+    assert loop.time() - t0 >= 0.05
+    assert len(broker.topics["gift_events"]) == 1
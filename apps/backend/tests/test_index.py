@@ -0,0 +1,84 @@
+"""Tests for the in-process NumPy vector index."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.index import LocalVectorIndex, get_local_index
+from app.vector import similar_pages
+
+
+def _rows(n=50, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "id": i + 1,
+            "title": f"Page {i + 1}",
+            "content": f"content {i + 1}",
+            # pgvector values arrive as strings from PostgREST
+            "embedding": str(rng.normal(size=dim).tolist()),
+        }
+        for i in range(n)
+    ]
+
+
+def test_search_matches_brute_force_cosine():
+    rows = _rows()
+    index = LocalVectorIndex(rows + [{"id": 999, "embedding": None}])
+    query = np.random.default_rng(1).normal(size=8)
+
+    matrix = np.array([json.loads(r["embedding"]) for r in rows])
+    cosine = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+    expected = [int(i) + 1 for i in np.argsort(-cosine)[:5]]
+
+    results = index.search(query.tolist(), k=5)
+
+    assert len(index) == 50
+    assert [r["page_id"] for r in results] == expected
+    assert set(results[0]) == {"id", "title", "content", "score", "page_id"}
+    assert abs(results[0]["score"] - cosine.max()) < 1e-5
+
+
+def test_search_handles_small_and_empty_index():
+    assert LocalVectorIndex([]).search([0.1, 0.2], k=3) == []
+    assert len(LocalVectorIndex(_rows(n=2)).search([0.1] * 8, k=5)) == 2
+
+
+@pytest.mark.asyncio
+async def test_similar_pages_uses_local_backend(mock_settings):
+    client = MagicMock()
+    client.embeddings.create = AsyncMock()
+    client.embeddings.create.return_value.data = [MagicMock(embedding=[1.0] * 8)]
+    mock_settings.vector_backend = "local"
+
+    with patch("app.vector.get_local_index") as get_index, patch(
+        "app.vector.Supabase"
+    ) as supabase:
+        get_index.return_value = LocalVectorIndex(_rows())
+        results = await similar_pages("query", k=3, client=client)
+
+    assert len(results) == 3
+    supabase.aclient.assert_not_called()
+
+
+def test_local_index_is_rebuilt_once_stale(mock_settings):
+    mock_settings.local_index_ttl_s = 60
+    rows = _rows(n=3)
+    clock = MagicMock()
+    clock.monotonic.return_value = 1000.0
+
+    with patch("app.index.get_settings", return_value=mock_settings), patch(
+        "app.index.LocalVectorIndex.load",
+        side_effect=lambda column: LocalVectorIndex(rows),
+    ), patch("app.index._indexes", {}), patch("app.index.time", clock):
+        before = get_local_index()
+        rows.extend(_rows(n=4)[3:])  # page 4 embedded after startup
+        clock.monotonic.return_value += 30
+        fresh = get_local_index()
+        clock.monotonic.return_value += 30
+        rebuilt = get_local_index()
+
+    assert fresh is before
+    assert (len(before), len(rebuilt)) == (3, 4)
@@ -0,0 +1,109 @@
+"""Tests for BM25 retrieval and hybrid rank fusion."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.lexical import BM25Index, get_lexical_index, reciprocal_rank_fusion, tokenize
+from app.vector import similar_pages
+
+
+ROWS = [
+    {"id": 1, "title": "Page 1", "content": "The narrator walks into the garden."},
+    {"id": 2, "title": "Page 2", "content": "Scheherazade tells the narrator a story."},
+    {"id": 3, "title": "Page 3", "content": "A story about a garden and a story."},
+    {"id": 4, "title": "Page 4", "content": "The vault keeps what you give it."},
+]
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("Who is Scheherazade, in the story?") == ["scheherazade", "story"]
+
+
+def test_bm25_ranks_the_rare_name_first():
+    index = BM25Index(ROWS)
+
+    results = index.search("Who is Scheherazade in the story?", k=3)
+
+    assert [r["page_id"] for r in results] == [2, 3]
+    assert set(results[0]) == {"id", "title", "content", "score", "page_id"}
+    assert results[0]["score"] > results[1]["score"]
+    assert index.doc_freq("story") == 2
+
+
+def test_bm25_returns_nothing_without_shared_terms():
+    index = BM25Index(ROWS)
+
+    assert index.search("who is it?", k=3) == []
+    assert BM25Index([]).search("garden", k=3) == []
+
+
+def test_rrf_rewards_pages_found_by_both_retrievers():
+    vector = [{"id": 1, "page_id": 1}, {"id": 2, "page_id": 2}, {"id": 3, "page_id": 3}]
+    lexical = [{"id": 3, "page_id": 3}, {"id": 4, "page_id": 4}]
+
+    fused = reciprocal_rank_fusion({"vector": vector, "lexical": lexical}, k=3)
+
+    assert [r["page_id"] for r in fused] == [3, 1, 2]
+    assert fused[0]["score"] == pytest.approx(1 / 63 + 1 / 61)
+    assert (fused[0]["vector_rank"], fused[0]["lexical_rank"]) == (3, 1)
+    assert "lexical_rank" not in fused[1]
+
+
+def test_lexical_index_is_rebuilt_once_stale(mock_settings):
+    mock_settings.local_index_ttl_s = 60
+    rows = [dict(r) for r in ROWS]
+    clock = MagicMock()
+    clock.monotonic.return_value = 1000.0
+
+    with patch("app.lexical.get_settings", return_value=mock_settings), patch(
+        "app.lexical.BM25Index.load", side_effect=lambda: BM25Index(rows)
+    ), patch("app.lexical._index", None), patch("app.lexical.time", clock):
+        before = get_lexical_index()
+        rows.append({"id": 5, "title": "Page 5", "content": "Giallo arrives."})
+        clock.monotonic.return_value += 30
+        fresh = get_lexical_index()
+        clock.monotonic.return_value += 30
+        rebuilt = get_lexical_index()
+
+    assert fresh is before
+    assert before.search("Giallo") == []
+    assert [r["page_id"] for r in rebuilt.search("Giallo")] == [5]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_mode_fuses_vector_and_bm25_hits(mock_settings):
+    mock_settings.vector_backend = "local"
+    mock_settings.retrieval_mode = "hybrid"
+    dense = [{"id": i, "page_id": i, "score": 0.9} for i in (4, 1, 3)]
+
+    with patch("app.vector._search", AsyncMock(return_value=dense)) as search, patch(
+        "app.vector.get_lexical_index", return_value=BM25Index(ROWS)
+    ):
+        results = await similar_pages("Who is Scheherazade?", k=2)
+
+    # both retrievers are asked for hybrid_candidates hits before fusion
+    assert search.call_args.args[1] == mock_settings.hybrid_candidates
+    assert [r["page_id"] for r in results] == [4, 2]
+    assert results[1]["lexical_rank"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lexical_mode_uses_match_pages_text_rpc(mock_settings):
+    sb = MagicMock()
+    sb.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[{"id": 2}]))
+
+    with patch("app.vector.Supabase") as supabase:
+        supabase.aclient = AsyncMock(return_value=sb)
+        results = await similar_pages("Scheherazade", k=1, mode="lexical")
+
+    sb.rpc.assert_called_once_with(
+        "match_pages_text", {"query_text": "Scheherazade", "match_k": 1}
+    )
+    assert results == [{"id": 2, "page_id": 2}]
+
+
+@pytest.mark.asyncio
+async def test_unknown_retrieval_mode_is_rejected():
+    with pytest.raises(ValueError):
+        await similar_pages("q", mode="sparse")
@@ -0,0 +1,57 @@
+"""Tests for the buffered JSONL log writer."""
+
+import datetime as dt
+import json
+import time
+
+from app.logsink import LogSink
+from app.metrics import log_usage
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_close_flushes_everything_queued(tmp_path):
+    sink = LogSink(directory=str(tmp_path), batch_size=1000, flush_interval_s=60)
+    for i in range(250):
+        sink.write("errors", {"n": i})
+
+    sink.close()
+
+    rows = _read(tmp_path / f"errors-{dt.date.today()}.jsonl")
+    assert [r["n"] for r in rows] == list(range(250))
+    assert sink.stats()["written"] == 250
+    assert sink.stats()["queued"] == 0
+
+
+def test_full_batches_flush_without_waiting_for_the_interval(tmp_path):
+    sink = LogSink(directory=str(tmp_path), batch_size=10, flush_interval_s=60)
+    for i in range(10):
+        sink.write("openai", {"n": i})
+
+    deadline = time.monotonic() + 2
+    while sink.written < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert sink.written == 10  # well before the 60s interval
+    sink.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    sink = LogSink(directory=str(tmp_path), max_queue=1)
+    sink._ensure_started = lambda: None  # no writer thread draining the queue
+
+    sink.write("errors", {"n": 1})
+    sink.write("errors", {"n": 2})
+
+    assert sink.dropped == 1
+
+
+def test_log_usage_goes_through_the_sink(log_sink):
+    log_usage("gpt-4o", 12, None)
+    log_sink.close()
+
+    rows = _read(log_sink.directory / f"openai-{dt.date.today()}.jsonl")
+    assert rows[0]["model"] == "gpt-4o"
+    assert rows[0]["elapsed_ms"] == 12
@@ -0,0 +1,96 @@
+"""Tests for the in-process metrics registry and /metrics."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import (
+    EMBED_BATCH_SIZE,
+    EMBED_BATCH_WAIT,
+    HTTP_REQUESTS,
+    OPENAI_COST,
+    OPENAI_TOKENS,
+    Histogram,
+    log_usage,
+)
+from app.vector import MODEL, EmbeddingBatcher, _embed
+
+
+client = TestClient(app)
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("t_seconds", "test", ["stage"], buckets=(0.1, 1))
+    for v in (0.05, 0.5, 5):
+        h.observe(v, stage="embed")
+
+    text = "\n".join(h.render())
+
+    assert 't_seconds_bucket{stage="embed",le="0.1"} 1.0' in text
+    assert 't_seconds_bucket{stage="embed",le="1"} 2.0' in text
+    assert 't_seconds_bucket{stage="embed",le="+Inf"} 3.0' in text
+    assert 't_seconds_count{stage="embed"} 3.0' in text
+
+
+def test_metrics_endpoint_exposes_route_and_token_series():
+    before = HTTP_REQUESTS.value(method="GET", route="/health", status=200)
+    client.get("/health")
+    log_usage(
+        "gpt-4o", 250, type("U", (), {"prompt_tokens": 7, "completion_tokens": 3})
+    )
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert HTTP_REQUESTS.value(method="GET", route="/health", status=200) == before + 1
+    assert OPENAI_TOKENS.value(model="gpt-4o", kind="prompt") >= 7
+    body = response.text
+    assert (
+        'gibsey_http_request_duration_seconds_count{method="GET",route="/health"}'
+        in body
+    )
+    assert 'gibsey_ask_stage_duration_seconds_bucket{stage="llm"' in body
+    assert 'gibsey_cache_hit_ratio{cache="embedding"}' in body
+
+
+@pytest.mark.asyncio
+async def test_query_embedding_tokens_and_cost_are_recorded():
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(
+        return_value=MagicMock(
+            data=[MagicMock(embedding=[0.1, 0.2])],
+            usage=type("U", (), {"prompt_tokens": 50, "total_tokens": 50}),
+        )
+    )
+    tokens = OPENAI_TOKENS.value(model=MODEL, kind="prompt")
+    cost = OPENAI_COST.value(model=MODEL)
+
+    await _embed("Who keeps the vault?", client=client)
+
+    assert OPENAI_TOKENS.value(model=MODEL, kind="prompt") == tokens + 50
+    assert OPENAI_COST.value(model=MODEL) == pytest.approx(cost + 50 * 0.00002 / 1000)
+
+
+@pytest.mark.asyncio
+async def test_embedding_batcher_metrics_are_exported():
+    openai = MagicMock()
+    openai.embeddings.create = AsyncMock(
+        side_effect=lambda model, input: MagicMock(
+            data=[MagicMock(embedding=[1.0]) for _ in input], usage=None
+        )
+    )
+    batcher = EmbeddingBatcher(max_batch=3, max_wait_ms=1000, client=openai)
+    batches = EMBED_BATCH_SIZE.count()
+    waits = EMBED_BATCH_WAIT.count()
+
+    await asyncio.gather(*(batcher.embed(str(i)) for i in range(3)))
+    body = client.get("/metrics").text
+
+    assert EMBED_BATCH_SIZE.count() == batches + 1
+    assert EMBED_BATCH_WAIT.count() == waits + 3
+    assert "gibsey_embed_queue_depth 0" in body
+    assert 'gibsey_embed_batch_size_bucket{le="4"}' in body
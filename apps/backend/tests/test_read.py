@@ -0,0 +1,115 @@
+"""Tests for /read caching: ETags, 304s and the in-process page cache."""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+client = TestClient(app)
+
+PAGE = {
+    "id": 3,
+    "title": "Story",
+    "content": "The tunnel",
+    "symbol_id": 1,
+    "updated_at": "2025-01-01T00:00:00+00:00",
+}
+
+
+def _mock_pages(mocker, updated_at=PAGE["updated_at"]):
+    sb = mocker.MagicMock()
+    query = sb.table.return_value.select.return_value.eq.return_value
+    query.single.return_value.execute.return_value.data = dict(PAGE)
+    query.execute.return_value.data = [{"updated_at": updated_at}]
+    mocker.patch("app.main.Supabase.client", return_value=sb)
+    return query
+
+
+def test_read_sets_etag_and_serves_repeats_from_cache(mocker):
+    query = _mock_pages(mocker)
+
+    first = client.get("/read?id=3")
+    second = client.get("/read?id=3")
+
+    assert first.status_code == second.status_code == 200
+    assert "updated_at" not in first.json()
+    assert first.json()["content"] == "The tunnel"
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+    query.single.return_value.execute.assert_called_once()  # second was cached
+
+
+def test_read_if_none_match_returns_304(mocker):
+    _mock_pages(mocker)
+    etag = client.get("/read?id=3").headers["ETag"]
+
+    response = client.get("/read?id=3", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_read_revalidates_on_updated_at(mocker, page_cache):
+    page_cache.revalidate_s = 0  # every read past the first is stale
+    query = _mock_pages(mocker)
+
+    client.get("/read?id=3")
+    client.get("/read?id=3")  # updated_at unchanged: kept, no full fetch
+    assert query.single.return_value.execute.call_count == 1
+    assert page_cache.stats()["revalidated"] == 1
+
+    query.execute.return_value.data = [{"updated_at": "2025-02-01T00:00:00+00:00"}]
+    client.get("/read?id=3")  # page changed: refetched
+    assert query.single.return_value.execute.call_count == 2
+
+
+def test_pages_batch_uses_one_in_query_and_the_cache(mocker, page_cache):
+    page_cache.put(5, {"id": 5, "title": "T", "content": "five"}, "u5")
+    sb = mocker.MagicMock()
+    query = sb.table.return_value.select.return_value.in_.return_value
+    query.execute.return_value.data = [
+        {"id": i, "title": "T", "content": str(i), "updated_at": "u"} for i in (4, 6)
+    ]
+    mocker.patch("app.main.Supabase.client", return_value=sb)
+
+    response = client.get("/pages?ids=5&prefetch=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["id"] for p in data["pages"]] == [4, 5, 6]
+    assert data["missing"] == [3, 7]
+    sb.table.return_value.select.return_value.in_.assert_called_once_with(
+        "id", [3, 4, 6, 7]
+    )
+    assert page_cache.get(6)[1]  # fetched pages are cached for /read
+
+
+def test_pages_batch_prefetches_around_each_sparse_id(mocker):
+    sb = mocker.MagicMock()
+    query = sb.table.return_value.select.return_value.in_.return_value
+    query.execute.return_value.data = []
+    mocker.patch("app.main.Supabase.client", return_value=sb)
+
+    response = client.get("/pages?ids=1,50&prefetch=1")
+    far_apart = client.get("/pages?ids=1,500")
+
+    assert response.json()["missing"] == [1, 2, 49, 50, 51]
+    assert far_apart.status_code == 200
+    assert far_apart.json()["missing"] == [1, 500]
+
+
+def test_pages_batch_rejects_oversized_requests(mocker):
+    mocker.patch("app.main.Supabase.client")
+
+    assert client.get("/pages?start=1&end=500").status_code == 400
+    assert client.get("/pages?ids=a,b").status_code == 400
+
+
+def test_pages_batch_rejects_huge_ranges_before_building_them(mocker):
+    mocker.patch("app.main.Supabase.client")
+
+    # would take seconds and gigabytes if the set were built first
+    assert client.get("/pages?start=1&end=1000000000").status_code == 400
+    # a 100-page range is fine alone, but not once prefetch widens it
+    assert client.get("/pages?start=1&end=100&prefetch=1").status_code == 400
@@ -0,0 +1,36 @@
+"""Tests for retry/DLQ routing of failed gift events."""
+
+from app.retry import DLQ_TOPIC, RETRY_TIERS, due_at, route_failure, strip_retry
+
+
+EVENT = {"page_id": 1, "question": "Q", "answer": "A"}
+
+
+def test_failures_walk_the_tiers_then_dead_letter():
+    """Each failure moves one tier on, with that tier's delay, then to the DLQ."""
+    event = EVENT
+    for i, (tier, delay) in enumerate(RETRY_TIERS, start=1):
+        topic, event = route_failure(event, "database error: down", now=100.0 * i)
+        assert topic == tier
+        assert event["_retry"]["attempts"] == i
+        assert due_at(event) == 100.0 * i + delay
+        assert event["_retry"]["first_failed_at"] == 100.0
+
+    topic, event = route_failure(event, "database error: still down", now=1000.0)
+
+    assert topic == DLQ_TOPIC
+    assert event["_retry"]["attempts"] == len(RETRY_TIERS) + 1
+    assert event["_retry"]["reason"] == "database error: still down"
+    assert "not_before" not in event["_retry"]
+    assert strip_retry(event) == EVENT
+
+
+def test_non_retryable_failures_go_straight_to_dlq():
+    topic, event = route_failure({"raw": "{not json"}, "invalid JSON", retryable=False)
+
+    assert topic == DLQ_TOPIC
+    assert event["_retry"]["attempts"] == 1
+
+
+def test_fresh_events_are_due_immediately():
+    assert due_at(EVENT) == 0.0
@@ -0,0 +1,84 @@
+"""Tests for request tracing spans and the X-Trace-ID header."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.tracing import current_trace_id, span
+
+
+client = TestClient(app)
+
+
+def _spans(sink):
+    sink.close()
+    lines = []
+    for path in sink.directory.glob("traces-*.jsonl"):
+        lines += path.read_text().splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_spans_nest_under_the_current_span(log_sink):
+    with span("outer", step=1) as outer:
+        with span("inner") as inner:
+            assert current_trace_id() == outer.trace_id
+    assert current_trace_id() is None
+
+    spans = {s["name"]: s for s in _spans(log_sink)}
+    assert spans["inner"]["trace_id"] == spans["outer"]["trace_id"]
+    assert spans["inner"]["parent_span_id"] == outer.span_id
+    assert spans["outer"]["parent_span_id"] is None
+    assert spans["outer"]["attributes"] == {"step": 1}
+    assert inner.end_ns >= inner.start_ns
+
+
+def test_failed_span_records_the_error(log_sink):
+    try:
+        with span("boom"):
+            raise RuntimeError("nope")
+    except RuntimeError:
+        pass
+
+    (s,) = _spans(log_sink)
+    assert s["status"] == "error"
+    assert s["attributes"]["error"] == "RuntimeError: nope"
+
+
+def test_ask_echoes_trace_id_and_records_stage_spans(log_sink):
+    completion = MagicMock()
+    completion.choices = [MagicMock(message=MagicMock(content="An answer"))]
+    completion.usage = MagicMock(prompt_tokens=10, completion_tokens=5)
+    openai = MagicMock()
+    openai.chat.completions.create = AsyncMock(return_value=completion)
+    hits = [{"page_id": 1, "content": "text"}]
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    with patch("app.main._embed", AsyncMock(return_value=[0.1] * 4)), patch(
+        "app.main.similar_pages", AsyncMock(return_value=hits)
+    ), patch("app.main.get_openai_client", return_value=openai):
+        response = client.post(
+            "/ask",
+            json={"question": "Who is the narrator?"},
+            headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-ID"] == trace_id
+
+    spans = {s["name"]: s for s in _spans(log_sink) if s["trace_id"] == trace_id}
+    root = spans["POST /ask"]
+    assert root["parent_span_id"] == "00f067aa0ba902b7"
+    assert root["attributes"]["status"] == 200
+    for name in ("answer_cache.lookup", "build_prompt", "llm"):
+        assert spans[name]["parent_span_id"] == root["span_id"]
+    assert spans["llm"]["attributes"]["prompt_tokens"] == 10
+
+
+def test_requests_without_trace_context_get_a_fresh_trace_id():
+    first = client.get("/health").headers["X-Trace-ID"]
+    second = client.get("/health").headers["X-Trace-ID"]
+
+    assert len(first) == 32
+    assert first != second
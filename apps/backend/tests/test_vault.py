@@ -1,9 +1,11 @@
 """Tests for the vault endpoints."""
 
+import asyncio
 from datetime import datetime, timedelta
 
 from fastapi.testclient import TestClient
 
+from app import events
 from app.main import app
 
 
@@ -30,7 +32,7 @@ def test_list_vault_entries(mocker):
 
     # Mock the Supabase client
     mock_supabase = mocker.MagicMock()
-    mock_supabase.table.return_value.select.return_value.order.return_value.range.return_value.execute.return_value.data = (
+    mock_supabase.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value.execute.return_value.data = (
         mock_data
     )
     mocker.patch("app.main.Supabase.client", return_value=mock_supabase)
@@ -54,7 +56,10 @@ def test_list_vault_entries(mocker):
     mock_supabase.table.return_value.select.return_value.order.assert_called_once_with(
         "created_at", desc=True
     )
-    mock_supabase.table.return_value.select.return_value.order.return_value.range.assert_called_once_with(
+    mock_supabase.table.return_value.select.return_value.order.return_value.order.assert_called_once_with(
+        "id", desc=True
+    )
+    mock_supabase.table.return_value.select.return_value.order.return_value.order.return_value.range.assert_called_once_with(
         0, 1
     )  # 0 to (0+2-1)
 
@@ -63,7 +68,7 @@ def test_list_vault_entries_error_handling(mocker):
     """Test error handling in the /vault/list endpoint."""
     # Mock the Supabase client to raise an exception
     mock_supabase = mocker.MagicMock()
-    mock_supabase.table.return_value.select.return_value.order.return_value.range.return_value.execute.side_effect = Exception(
+    mock_supabase.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value.execute.side_effect = Exception(
         "Database error"
     )
     mocker.patch("app.main.Supabase.client", return_value=mock_supabase)
@@ -74,3 +79,105 @@ def test_list_vault_entries_error_handling(mocker):
     # Assertions
     assert response.status_code == 500
     assert "Error fetching vault entries" in response.text
+
+
+def test_save_does_not_wait_for_broker_ack(mocker):
+    """/vault/save returns once the event is enqueued, before delivery."""
+    pending = []
+
+    async def send(topic, value, headers=None):
+        fut = asyncio.get_running_loop().create_future()
+        pending.append((topic, value, fut))
+        return fut  # never resolved: the broker hasn't acked yet
+
+    mock_producer = mocker.MagicMock()
+    mock_producer.send = send
+    mocker.patch("app.events._producer", mock_producer)
+    before = events.delivery_stats["enqueued"]
+
+    response = client.post(
+        "/vault/save",
+        json={"page_id": 1, "question": "Q", "answer": "A"},
+    )
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    assert len(pending) == 1
+    topic, value, fut = pending[0]
+    assert topic == "gift_events"
+    assert value["question"] == "Q"
+    assert value["event_id"] == response.json()["event_id"]  # server-generated
+    assert not fut.done()
+    assert events.delivery_stats["enqueued"] == before + 1
+
+
+def test_save_keeps_client_event_id(mocker):
+    """A client-supplied idempotency key is published unchanged."""
+    sent = []
+
+    async def send(topic, value, headers=None):
+        sent.append(value)
+        return asyncio.get_running_loop().create_future()
+
+    mock_producer = mocker.MagicMock()
+    mock_producer.send = send
+    mocker.patch("app.events._producer", mock_producer)
+
+    body = {"page_id": 1, "question": "Q", "answer": "A", "event_id": "evt-123"}
+    first = client.post("/vault/save", json=body)
+    retry = client.post("/vault/save", json=body)
+
+    assert first.json()["event_id"] == retry.json()["event_id"] == "evt-123"
+    assert [v["event_id"] for v in sent] == ["evt-123", "evt-123"]
+
+
+def test_list_vault_entries_cursor(mocker):
+    """A full page returns X-Next-Cursor, which seeks on (created_at, id)."""
+    rows = [
+        {
+            "id": 9,
+            "question": "Q9",
+            "answer": "A9",
+            "created_at": "2025-01-02T00:00:00+00:00",
+        },
+        {
+            "id": 7,
+            "question": "Q7",
+            "answer": "A7",
+            "created_at": "2025-01-01T12:00:00+00:00",
+        },
+    ]
+    mock_supabase = mocker.MagicMock()
+    offset_query = mock_supabase.table.return_value.select.return_value
+    ordered = offset_query.order.return_value.order.return_value
+    ordered.range.return_value.execute.return_value.data = rows
+    mocker.patch("app.main.Supabase.client", return_value=mock_supabase)
+
+    first = client.get("/vault/list?limit=2")
+    cursor = first.headers["X-Next-Cursor"]
+
+    seek = offset_query.or_.return_value.lte.return_value.order.return_value
+    seek = seek.order.return_value
+    seek.limit.return_value.execute.return_value.data = rows[:1]
+    second = client.get(f"/vault/list?limit=2&cursor={cursor}")
+
+    assert [e["id"] for e in first.json()] == [9, 7]
+    assert second.status_code == 200
+    assert [e["id"] for e in second.json()] == [9]
+    assert "X-Next-Cursor" not in second.headers  # short page: no more rows
+    offset_query.or_.assert_called_once_with(
+        'created_at.lt."2025-01-01T12:00:00+00:00",'
+        'and(created_at.eq."2025-01-01T12:00:00+00:00",id.lt.7)'
+    )
+    offset_query.or_.return_value.lte.assert_called_once_with(
+        "created_at", "2025-01-01T12:00:00+00:00"
+    )
+    seek.limit.assert_called_once_with(2)
+
+
+def test_list_vault_entries_bad_cursor(mocker):
+    mocker.patch("app.main.Supabase.client")
+
+    response = client.get("/vault/list?cursor=not-a-cursor")
+
+    assert response.status_code == 400
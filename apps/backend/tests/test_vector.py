@@ -1,11 +1,12 @@
+import asyncio
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 # Import the module under test
-from app.vector import _embed, similar_pages
+from app.vector import EmbeddingBatcher, _embed, similar_pages
 
 
 # Set up environment variables
@@ -30,15 +31,18 @@ class MockEmbeddingResponse:
 
 
 # Create a mock OpenAI client for testing
-mock_client = MagicMock(spec=OpenAI)
+mock_client = MagicMock(spec=AsyncOpenAI)
 mock_client.embeddings = MagicMock()
-mock_client.embeddings.create.return_value = MockEmbeddingResponse([0.1, 0.2, 0.3])
+mock_client.embeddings.create = AsyncMock(
+    return_value=MockEmbeddingResponse([0.1, 0.2, 0.3])
+)
 
 
-def test_embed():
+@pytest.mark.asyncio
+async def test_embed():
     """Test the _embed function with a mock OpenAI client."""
     # Test the _embed function with our mock client
-    result = _embed("test query", client=mock_client)
+    result = await _embed("test query", client=mock_client)
 
     # Check the result
     assert result == [0.1, 0.2, 0.3]
@@ -49,17 +53,20 @@ def test_embed():
     )
 
 
-def test_similar_pages():
+@pytest.mark.asyncio
+async def test_similar_pages():
     """Test the similar_pages function with mocked dependencies."""
     # Create a fresh mock client for this test
-    test_client = MagicMock(spec=OpenAI)
+    test_client = MagicMock(spec=AsyncOpenAI)
     test_client.embeddings = MagicMock()
-    test_client.embeddings.create.return_value = MockEmbeddingResponse([0.1, 0.2, 0.3])
+    test_client.embeddings.create = AsyncMock(
+        return_value=MockEmbeddingResponse([0.1, 0.2, 0.3])
+    )
 
     # Mock the Supabase client
     with patch("app.vector.Supabase") as mock_supabase_class:
         mock_supabase = MagicMock()
-        mock_supabase_class.client.return_value = mock_supabase
+        mock_supabase_class.aclient = AsyncMock(return_value=mock_supabase)
 
         # Mock the RPC call chain
         mock_rpc = MagicMock()
@@ -68,11 +75,11 @@ def test_similar_pages():
             {"id": 1, "title": "Test", "content": "Test content", "score": 0.95},
             {"id": 2, "title": "Test 2", "content": "More content", "score": 0.9},
         ]
-        mock_rpc.execute.return_value = mock_execute
+        mock_rpc.execute = AsyncMock(return_value=mock_execute)
         mock_supabase.rpc.return_value = mock_rpc
 
         # Test the function with our mock client
-        results = similar_pages("test query", k=2, client=test_client)
+        results = await similar_pages("test query", k=2, client=test_client)
 
         # Assertions
         assert len(results) == 2
@@ -83,40 +90,91 @@ def test_similar_pages():
         )
 
 
-def test_similar_pages_empty_result():
+@pytest.mark.asyncio
+async def test_similar_pages_empty_result():
     """Test similar_pages with empty result from database."""
     # Create a fresh mock client for this test
-    test_client = MagicMock(spec=OpenAI)
+    test_client = MagicMock(spec=AsyncOpenAI)
     test_client.embeddings = MagicMock()
-    test_client.embeddings.create.return_value = MockEmbeddingResponse([0.1, 0.2, 0.3])
+    test_client.embeddings.create = AsyncMock(
+        return_value=MockEmbeddingResponse([0.1, 0.2, 0.3])
+    )
 
     # Mock the Supabase client
     with patch("app.vector.Supabase") as mock_supabase_class:
         mock_supabase = MagicMock()
-        mock_supabase_class.client.return_value = mock_supabase
+        mock_supabase_class.aclient = AsyncMock(return_value=mock_supabase)
 
         # Mock empty result
         mock_rpc = MagicMock()
         mock_execute = MagicMock()
         mock_execute.data = []
-        mock_rpc.execute.return_value = mock_execute
+        mock_rpc.execute = AsyncMock(return_value=mock_execute)
         mock_supabase.rpc.return_value = mock_rpc
 
         # Test the function with our mock client
-        results = similar_pages("test query", client=test_client)
+        results = await similar_pages("test query", client=test_client)
 
         # Assertions
         assert results == []
         mock_supabase.rpc.assert_called_once()
 
 
-def test_embed_error_handling():
+@pytest.mark.asyncio
+async def test_embed_error_handling():
     """Test error handling in _embed function."""
     # Create a fresh mock client for this test
-    test_client = MagicMock(spec=OpenAI)
+    test_client = MagicMock(spec=AsyncOpenAI)
     test_client.embeddings = MagicMock()
-    test_client.embeddings.create.side_effect = Exception("API Error")
+    test_client.embeddings.create = AsyncMock(side_effect=Exception("API Error"))
 
     # Test that the exception is raised
     with pytest.raises(Exception, match="API Error"):
-        _embed("test query", client=test_client)
+        await _embed("test query", client=test_client)
+
+
+def _batch_client():
+    """Mock client whose embedding for each input is [len(input)]."""
+    client = MagicMock(spec=AsyncOpenAI)
+    client.embeddings = MagicMock()
+
+    async def create(model, input):
+        resp = MagicMock()
+        resp.data = [MockEmbeddingData([float(len(t))]) for t in input]
+        return resp
+
+    client.embeddings.create = AsyncMock(side_effect=create)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_concurrent_requests():
+    """Concurrent embeds inside one window share a single API call."""
+    client = _batch_client()
+    batcher = EmbeddingBatcher(max_batch=16, max_wait_ms=20, client=client)
+    texts = ["a" * n for n in range(1, 11)] + ["aaa"]
+
+    vectors = await asyncio.gather(*(batcher.embed(t) for t in texts))
+
+    assert vectors == [[float(len(t))] for t in texts]
+    client.embeddings.create.assert_called_once()
+    # the duplicate "aaa" is only sent once
+    assert len(client.embeddings.create.call_args.kwargs["input"]) == 10
+    stats = batcher.stats()
+    assert stats["batch_sizes"] == {"11": 1}
+    assert stats["queue_depth"] == 0
+    assert stats["max_wait_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_at_max_batch_and_propagates_errors():
+    client = _batch_client()
+    batcher = EmbeddingBatcher(max_batch=4, max_wait_ms=1000, client=client)
+
+    await asyncio.gather(*(batcher.embed(str(i)) for i in range(8)))
+    assert client.embeddings.create.call_count == 2
+
+    client.embeddings.create.side_effect = Exception("API Error")
+    with pytest.raises(Exception, match="API Error"):
+        await asyncio.gather(*(batcher.embed(str(i)) for i in range(4)))
+    assert batcher.stats()["errors"] == 1
@@ -13,6 +13,16 @@ const appRouter = t.router({
     if (!r.ok) throw new Error('failed to fetch page');
     return r.json();
   }),
+  pages: t.procedure
+    .input(z.object({ ids: z.array(z.number()).min(1), prefetch: z.number().optional() }))
+    .query(async ({ input }) => {
+      const base = process.env.API_BASE || 'http://localhost:8000';
+      const params = new URLSearchParams({ ids: input.ids.join(',') });
+      if (input.prefetch) params.set('prefetch', String(input.prefetch));
+      const r = await fetch(`${base}/pages?${params}`);
+      if (!r.ok) throw new Error('failed to fetch pages');
+      return r.json();
+    }),
   section: t.procedure.input(z.object({ pageId: z.number() })).query(async ({ input }) => {
     const base = process.env.API_BASE || 'http://localhost:8000';
     const r = await fetch(`${base}/sections?page_id=${input.pageId}`);
@@ -1,5 +1,5 @@
 import { useState } from "react";
-import { ask, saveVault } from "./lib/api";
+import { askStream, saveVault } from "./lib/api";
 import VaultTimeline from "./components/VaultTimeline";
 import PageDisplay from "./components/PageDisplay";
 import Navigation from "./components/Navigation";
@@ -13,9 +13,11 @@ export default function App() {
   
   const submit = async () => {
     setLoadingQ(true);
+    setAnswer("");
     try {
-      const resp = await ask(question);
-      setAnswer(resp.answer);
+      await askStream(question, {
+        onToken: (delta) => setAnswer((prev) => (prev ?? "") + delta),
+      });
     } catch (e) {
       alert((e as Error).message);
     } finally {
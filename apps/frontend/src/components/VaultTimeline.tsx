@@ -12,34 +12,36 @@ export default function VaultTimeline() {
   const [entries, setEntries] = useState<VaultEntry[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-  useEffect(() => {
-    const fetchEntries = async () => {
-      try {
-        setLoading(true);
-        const response = await fetch(
-          `/api/vault/list?limit=20`
-        );
-        
-        if (!response.ok) {
-          throw new Error(`Error: ${response.status}`);
-        }
-        
-        const data = await response.json();
-        setEntries(data);
-        setError(null);
-      } catch (err) {
-        console.error("Failed to fetch vault entries:", err);
-        setError("Failed to load vault entries. Please try again later.");
-      } finally {
-        setLoading(false);
+  const fetchEntries = async (cursor?: string) => {
+    try {
+      setLoading(true);
+      const params = new URLSearchParams({ limit: "20" });
+      if (cursor) params.set("cursor", cursor);
+      const response = await fetch(`/api/vault/list?${params}`);
+      
+      if (!response.ok) {
+        throw new Error(`Error: ${response.status}`);
       }
-    };
+      
+      const data: VaultEntry[] = await response.json();
+      setEntries((prev) => (cursor ? [...prev, ...data] : data));
+      setNextCursor(response.headers.get("X-Next-Cursor"));
+      setError(null);
+    } catch (err) {
+      console.error("Failed to fetch vault entries:", err);
+      setError("Failed to load vault entries. Please try again later.");
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
     fetchEntries();
   }, []);
 
-  if (loading) {
+  if (loading && entries.length === 0) {
     return (
       <div className="mt-8 text-center text-gray-500">
         Loading vault entries...
@@ -103,6 +105,18 @@ export default function VaultTimeline() {
           </div>
         ))}
       </div>
+
+      {nextCursor && (
+        <div className="text-center">
+          <button
+            onClick={() => fetchEntries(nextCursor)}
+            disabled={loading}
+            className="px-4 py-2 text-sm text-blue-600 dark:text-blue-400 hover:underline disabled:opacity-50"
+          >
+            {loading ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -1,8 +1,32 @@
-export async function readPage(id: number) {
+// Pages fetched ahead of time by readPage's prefetch window
+const pageCache = new Map<number, any>();
+// The corpus is pages 1..710; there is nothing to prefetch past either end
+const FIRST_PAGE = 1;
+const LAST_PAGE = 710;
+
+export async function readPages(ids: number[], prefetch = 0) {
   const base = import.meta.env.VITE_API_BASE;
-  const r = await fetch(`${base}/read?id=${id}`);
-  if (!r.ok) throw new Error("Failed to fetch shard");
-  return r.json();
+  const params = new URLSearchParams({ ids: ids.join(",") });
+  if (prefetch) params.set("prefetch", String(prefetch));
+  const r = await fetch(`${base}/pages?${params}`);
+  if (!r.ok) throw new Error("Failed to fetch shards");
+  const { pages } = await r.json();
+  for (const page of pages) pageCache.set(page.id, page);
+  return pages;
+}
+
+export async function readPage(id: number, prefetch = 5) {
+  if (!pageCache.has(id)) {
+    await readPages([id], prefetch);
+    if (!pageCache.has(id)) throw new Error("Failed to fetch shard");
+  }
+  const page = pageCache.get(id);
+  // Refill the window before the reader reaches its edge
+  const next = Math.min(id + prefetch, LAST_PAGE);
+  const prev = Math.max(id - prefetch, FIRST_PAGE);
+  if (prefetch && (!pageCache.has(next) || !pageCache.has(prev)))
+    readPages([id], prefetch).catch(() => {});
+  return page;
 }
 
 export async function ask(question: string) {
@@ -19,12 +43,61 @@ export async function ask(question: string) {
   return json;
 }
 
-export async function saveVault(page_id: number, q: string, a: string) {
+type AskStreamHandlers = {
+  onContext?: (pages: number[]) => void;
+  onToken: (delta: string) => void;
+};
+
+// Streams /ask/stream (Server-Sent Events over a POST body, so EventSource is
+// not usable). Resolves with the final metadata event.
+export async function askStream(question: string, handlers: AskStreamHandlers) {
+  const base = import.meta.env.VITE_API_BASE;
+  const t0 = performance.now();
+  const r = await fetch(`${base}/ask/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify({ question, page_id: 1 }),
+  });
+  if (!r.ok || !r.body) throw new Error("Ask failed");
+
+  const reader = r.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  let firstToken = true;
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      const event = /^event: (.*)$/m.exec(frame)?.[1];
+      const data = JSON.parse(/^data: (.*)$/m.exec(frame)?.[1] ?? "null");
+      if (event === "context") handlers.onContext?.(data.context_pages);
+      else if (event === "token") {
+        if (firstToken) {
+          console.log(`🕒 /ask first token: ${Math.round(performance.now() - t0)} ms`);
+          firstToken = false;
+        }
+        handlers.onToken(data.delta);
+      } else if (event === "done") return data;
+      else if (event === "error") throw new Error(data.answer);
+    }
+  }
+  throw new Error("Stream ended unexpectedly");
+}
+
+export async function saveVault(
+  page_id: number,
+  q: string,
+  a: string,
+  event_id: string = crypto.randomUUID(), // reuse when retrying the same save
+) {
   const base = import.meta.env.VITE_API_BASE;
   const r = await fetch(`${base}/vault/save`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ page_id, question: q, answer: a }),
+    body: JSON.stringify({ page_id, question: q, answer: a, event_id }),
   });
   if (!r.ok) throw new Error("Vault save failed");
 }
\ No newline at end of file
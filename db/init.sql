@@ -9,10 +9,27 @@ CREATE TABLE IF NOT EXISTS pages (
   title TEXT NOT NULL,
   content TEXT NOT NULL,
   embedding VECTOR(1536),
+  content_hash TEXT,     -- sha256 of the content the embedding was built from
+  embedding_model TEXT,  -- model that produced the embedding
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Columns added after the initial schema. content_hash/embedding_model stay
+-- NULL (never backfilled) until embed_seed.py writes them with a fresh vector.
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS embedding_model TEXT;
+-- Local CPU embedding provider, written alongside the OpenAI vectors
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS embedding_local VECTOR(384);
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS embedding_local_hash TEXT;
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS embedding_local_model TEXT;
+-- Full-text search for lexical / hybrid retrieval
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR
+  GENERATED ALWAYS AS (
+    to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))
+  ) STORED;
+CREATE INDEX IF NOT EXISTS idx_pages_content_tsv ON pages USING GIN (content_tsv);
+
 -- Create vault table for storing user interactions
 CREATE TABLE IF NOT EXISTS vault (
   id BIGSERIAL PRIMARY KEY,
@@ -20,11 +37,16 @@ CREATE TABLE IF NOT EXISTS vault (
   page_id BIGINT REFERENCES pages(id) ON DELETE CASCADE,
   question TEXT,
   answer TEXT,
+  event_id TEXT,  -- idempotency key of the gift event that wrote the row
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+ALTER TABLE vault ADD COLUMN IF NOT EXISTS event_id TEXT;
+
 -- Create indexes
 CREATE INDEX IF NOT EXISTS idx_vault_user_ts ON vault(user_id, created_at DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vault_event_id ON vault(event_id);
+CREATE INDEX IF NOT EXISTS idx_vault_created_id ON vault(created_at DESC, id DESC);  -- /vault/list cursor
 CREATE INDEX IF NOT EXISTS idx_pages_embedding ON pages USING ivfflat (embedding vector_cosine_ops);
 
 -- Create function to update updated_at timestamp
@@ -0,0 +1,8 @@
+-- Track what each stored embedding was computed from, so embed_seed.py can
+-- re-embed exactly the pages whose content or embedding model changed.
+alter table pages add column if not exists content_hash text;     -- sha256 hex of content
+alter table pages add column if not exists embedding_model text;
+
+-- No backfill: nothing records whether an existing vector still matches its
+-- page's current content, so both columns start NULL and the first
+-- incremental run re-embeds every page once.
@@ -0,0 +1,29 @@
+-- Full-text index over pages for lexical / hybrid retrieval
+-- (RETRIEVAL_MODE=lexical|hybrid with VECTOR_BACKEND=supabase).
+alter table pages add column if not exists content_tsv tsvector
+  generated always as (
+    to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))
+  ) stored;
+create index if not exists idx_pages_content_tsv on pages using gin (content_tsv);
+
+-- match_pages_text(query_text, match_k): pages sharing any (stemmed,
+-- non-stopword) term with the question, ranked by ts_rank_cd. Terms are
+-- OR-ed: natural questions rarely have every word on one page.
+create or replace function match_pages_text(query_text text, match_k int = 3)
+returns table (
+  id        bigint,
+  title     text,
+  content   text,
+  score     float
+) language sql stable as $$
+  with q as (
+    select to_tsquery('simple', string_agg(quote_literal(lexeme), ' | ')) as query
+    from unnest(tsvector_to_array(to_tsvector('english', query_text))) as lexeme
+  )
+  select p.id, p.title, p.content, ts_rank_cd(p.content_tsv, q.query)::float as score
+  from pages p, q
+  where q.query is not null
+    and p.content_tsv @@ q.query
+  order by score desc
+  limit match_k;
+$$;
@@ -0,0 +1,23 @@
+-- Side-by-side vectors from the local CPU embedding provider
+-- (EMBEDDING_PROVIDER=local, all-MiniLM-L6-v2 → 384 dims). The OpenAI
+-- columns are untouched, so reads can flip between providers and back.
+-- Match the dimension to LOCAL_EMBEDDING_MODEL if you change it.
+alter table pages add column if not exists embedding_local vector(384);
+alter table pages add column if not exists embedding_local_hash text;   -- sha256 hex of content
+alter table pages add column if not exists embedding_local_model text;
+
+-- match_pages over the local vectors (same result shape as match_pages)
+create or replace function match_pages_local(query_embedding vector, match_k int = 3)
+returns table (
+  id        bigint,
+  title     text,
+  content   text,
+  score     float
+) language sql stable as $$
+  select id, title, content,
+         1 - (embedding_local <=> query_embedding) as score
+  from pages
+  where embedding_local is not null
+  order by embedding_local <=> query_embedding
+  limit match_k;
+$$;
@@ -0,0 +1,5 @@
+-- Composite index behind /vault/list cursor pagination. Each page seeks to
+-- (created_at, id) < cursor and reads `limit` rows in index order, so deep
+-- pages cost the same as the first one.
+create index concurrently if not exists idx_vault_created_id
+  on vault(created_at desc, id desc);
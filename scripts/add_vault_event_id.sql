@@ -0,0 +1,6 @@
+-- Give every gift event an idempotency key so redeliveries can't duplicate
+-- vault rows. Inserts use ON CONFLICT (event_id) DO NOTHING; existing rows
+-- keep a NULL key, which never conflicts.
+alter table vault add column if not exists event_id text;
+
+create unique index concurrently if not exists idx_vault_event_id on vault(event_id);
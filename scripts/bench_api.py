@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""Load-test the backend API and compare runs.
+
+``run`` drives /ask, /read, /vault/list and /vault/save from a pool of
+closed-loop workers with a weighted request mix. It reports p50/p95/p99
+latency, RPS and error rate as JSON, both overall and per endpoint.
+
+By default the app runs in-process. OpenAI, Supabase and Kafka are replaced by
+stubs that sleep for a jittered latency, so runs need no keys or network and
+measure the backend's own overhead (caching, batching, threadpool contention)
+under realistic waits. Pass --base-url to load a running server instead.
+
+``compare`` diffs two saved runs. It exits 1 when p95/p99 grow by more than
+--threshold or the error rate rises, so CI can gate on it.
+
+usage: bench_api.py run [--concurrency 20] [--duration 10]
+                        [--mix ask=1,read=4,vault_list=2,vault_save=1]
+                        [--latency openai=400,embed=60,supabase=15,kafka=3]
+                        [--base-url http://localhost:8000] [--out run.json]
+       bench_api.py compare base.json new.json [--threshold 0.1]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import ExitStack, redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+
+
+# Add backend to path before importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "backend"))
+
+
+ENDPOINTS = ("ask", "read", "vault_list", "vault_save")
+DEFAULT_MIX = "ask=1,read=4,vault_list=2,vault_save=1"
+DEFAULT_LATENCY = "openai=400,embed=60,supabase=15,kafka=3"
+PAGES = 710
+EMBED_DIM = 1536
+
+
+def parse_pairs(spec, kind):
+    pairs = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        pairs[name.strip()] = kind(value)
+    return pairs
+
+
+# --- Stubbed dependencies --------------------------------------------------
+
+
+class Latency:
+    """Jittered waits: the mean in ms, with a 20% normal spread."""
+
+    def __init__(self, means_ms):
+        self.means = means_ms
+
+    def seconds(self, name):
+        mean = self.means.get(name, 0)
+        return max(random.gauss(mean, mean * 0.2), 0) / 1000
+
+
+def fake_vector(text):
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+    vec = np.random.default_rng(seed).standard_normal(EMBED_DIM)
+    return (vec / np.linalg.norm(vec)).tolist()
+
+
+def page_row(page_id):
+    return {
+        "id": page_id,
+        "title": f"Page {page_id}",
+        "content": f"Shard {page_id} of the Gibsey corpus. " * 20,
+        "symbol_id": page_id % 16 + 1,
+        "updated_at": "2025-01-01T00:00:00+00:00",
+    }
+
+
+def vault_rows(n, offset=0):
+    return [
+        {
+            "id": 100000 - offset - i,
+            "question": f"Question {offset + i}",
+            "answer": "An answer from the vault.",
+            "created_at": f"2025-01-01T00:{(offset + i) % 60:02d}:00+00:00",
+        }
+        for i in range(n)
+    ]
+
+
+class StubQuery:
+    """Just enough of the PostgREST query builder for the endpoints."""
+
+    def __init__(self, table, latency):
+        self.table, self.latency = table, latency
+        self.columns, self.ids, self.one, self.count = "", [], False, 20
+        self.offset = 0
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.ids = [int(value)]
+        return self
+
+    def in_(self, column, values):
+        self.ids = [int(v) for v in values]
+        return self
+
+    def single(self):
+        self.one = True
+        return self
+
+    def limit(self, n):
+        self.count = n
+        return self
+
+    def range(self, start, end):
+        self.offset, self.count = start, end - start + 1
+        return self
+
+    def or_(self, *args):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def _data(self):
+        if self.table == "vault":
+            return vault_rows(self.count, self.offset)
+        rows = [page_row(i) for i in self.ids if 0 < i <= PAGES]
+        if self.columns == "updated_at":
+            rows = [{"updated_at": r["updated_at"]} for r in rows]
+        if self.one:
+            return rows[0] if rows else None
+        return rows
+
+    def execute(self):
+        # sync endpoints run in the threadpool, so a blocking wait is faithful
+        time.sleep(self.latency.seconds("supabase"))
+        return SimpleNamespace(data=self._data())
+
+
+class StubRpc:
+    def __init__(self, params, latency):
+        self.params, self.latency = params, latency
+
+    async def execute(self):
+        await asyncio.sleep(self.latency.seconds("supabase"))
+        k = self.params["match_k"]
+        start = random.randint(1, PAGES - k)
+        rows = [
+            {**page_row(i), "similarity": 0.9 - 0.01 * n}
+            for n, i in enumerate(range(start, start + k))
+        ]
+        return SimpleNamespace(data=rows)
+
+
+class StubSupabase:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def client(self):
+        return self
+
+    async def aclient(self):
+        return self
+
+    def table(self, name):
+        return StubQuery(name, self.latency)
+
+    def rpc(self, name, params):
+        return StubRpc(params, self.latency)
+
+
+class StubOpenAI:
+    def __init__(self, latency):
+        self.latency = latency
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+
+    async def _embed(self, model, input):
+        await asyncio.sleep(self.latency.seconds("embed"))
+        texts = [input] if isinstance(input, str) else input
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=fake_vector(t)) for t in texts]
+        )
+
+    async def _chat(self, **kwargs):
+        await asyncio.sleep(self.latency.seconds("openai"))
+        return SimpleNamespace(
+            choices=[
+                SimpleNamespace(
+                    message=SimpleNamespace(content="A poetic but precise answer.")
+                )
+            ],
+            usage=SimpleNamespace(prompt_tokens=420, completion_tokens=90),
+        )
+
+
+class StubProducer:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def send(self, topic, value, headers=None):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        loop.call_later(self.latency.seconds("kafka"), fut.set_result, None)
+        return fut
+
+
+def stub_dependencies(stack, latency):
+    """Patch the app's clients with the stubs for the rest of the run."""
+    supabase, openai = StubSupabase(latency), StubOpenAI(latency)
+    producer = StubProducer(latency)
+
+    async def get_producer():
+        return producer
+
+    for target, value in [
+        ("app.main.Supabase", supabase),
+        ("app.vector.Supabase", supabase),
+        ("app.main.get_openai_client", lambda: openai),
+        ("app.vector.get_openai_client", lambda: openai),
+        ("app.events.get_kafka_producer", get_producer),
+    ]:
+        stack.enter_context(patch(target, value))
+
+
+# --- Load generation -------------------------------------------------------
+
+
+def build_request(endpoint, rng, args):
+    if endpoint == "ask":
+        question = f"What does shard {rng.randrange(args.questions)} reveal?"
+        body = {"question": question, "bypass_cache": args.bypass_cache}
+        return "POST", "/ask", {"json": body}
+    if endpoint == "read":
+        return "GET", "/read", {"params": {"id": rng.randint(1, args.pages)}}
+    if endpoint == "vault_list":
+        return "GET", "/vault/list", {"params": {"limit": 20}}
+    body = {"page_id": rng.randint(1, PAGES), "question": "Q?", "answer": "A."}
+    return "POST", "/vault/save", {"json": body}
+
+
+async def worker(client, deadline, budget, mix, rng, args, samples):
+    names, weights = zip(*mix.items())
+    while time.perf_counter() < deadline and budget["left"] != 0:
+        budget["left"] -= 1
+        endpoint = rng.choices(names, weights)[0]
+        method, path, kwargs = build_request(endpoint, rng, args)
+        t0 = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples[endpoint].append((time.perf_counter() - t0, ok))
+
+
+async def drive(client, args, mix, duration, requests):
+    samples = defaultdict(list)
+    budget = {"left": requests or -1}
+    deadline = time.perf_counter() + duration if duration else float("inf")
+    t0 = time.perf_counter()
+    await asyncio.gather(
+        *(
+            worker(
+                client,
+                deadline,
+                budget,
+                mix,
+                random.Random(args.seed + i),
+                args,
+                samples,
+            )
+            for i in range(args.concurrency)
+        )
+    )
+    return samples, time.perf_counter() - t0
+
+
+def summarize(samples, elapsed):
+    latencies = np.array([s for s, _ in samples]) * 1000
+    errors = sum(1 for _, ok in samples if not ok)
+    if not len(latencies):
+        return {"requests": 0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4),
+        "rps": round(len(samples) / elapsed, 1),
+        "mean_ms": round(float(latencies.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(latencies.max()), 2),
+    }
+
+
+async def run(args):
+    mix = {k: v for k, v in parse_pairs(args.mix, float).items() if v > 0}
+    unknown = set(mix) - set(ENDPOINTS)
+    if unknown:
+        sys.exit(f"unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+
+    with ExitStack() as stack:
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        else:
+            scratch = stack.enter_context(tempfile.TemporaryDirectory())
+            # the app echoes usage logs; keep stdout for the report
+            stack.enter_context(redirect_stdout(sys.stderr))
+            os.environ.update(
+                {
+                    "SUPABASE_URL": "http://stub.invalid",
+                    "OPENAI_API_KEY": "stub",
+                    "EMBEDDING_CACHE_PATH": "",
+                    "LOG_DIR": scratch,
+                }
+            )
+            from app.logsink import close_log_sink
+            from app.main import app
+
+            stack.callback(close_log_sink)  # before the scratch dir goes
+            stub_dependencies(stack, Latency(parse_pairs(args.latency, float)))
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://bench",
+                timeout=args.timeout,
+            )
+
+        async with client:
+            if args.warmup:
+                await drive(client, args, mix, args.warmup, 0)
+            samples, elapsed = await drive(
+                client, args, mix, args.duration, args.requests
+            )
+
+    report = {
+        "config": {
+            "target": args.base_url or "in-process (stubbed dependencies)",
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "mix": mix,
+            "latency_ms": None if args.base_url else parse_pairs(args.latency, float),
+            "bypass_cache": args.bypass_cache,
+        },
+        "overall": summarize([s for v in samples.values() for s in v], elapsed),
+        "endpoints": {
+            name: summarize(samples[name], elapsed)
+            for name in ENDPOINTS
+            if samples.get(name)
+        },
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    print(text)
+
+
+# --- Comparison ------------------------------------------------------------
+
+
+def compare(args):
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    sections = {"overall": (base["overall"], new["overall"])}
+    for name in ENDPOINTS:
+        if name in base["endpoints"] and name in new["endpoints"]:
+            sections[name] = (base["endpoints"][name], new["endpoints"][name])
+
+    diff, regressions = {}, []
+    for name, (b, n) in sections.items():
+        row = {}
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"):
+            change = n[metric] - b[metric]
+            row[metric] = {
+                "base": b[metric],
+                "new": n[metric],
+                "change": round(change, 4),
+                "change_pct": round(100 * change / b[metric], 1) if b[metric] else None,
+            }
+        for metric in ("p95_ms", "p99_ms"):
+            if b[metric] and n[metric] > b[metric] * (1 + args.threshold):
+                regressions.append(f"{name}.{metric}")
+        if n["error_rate"] > b["error_rate"] + args.error_threshold:
+            regressions.append(f"{name}.error_rate")
+        diff[name] = row
+
+    print(json.dumps({"diff": diff, "regressions": regressions}, indent=2))
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="load the API and report latency/RPS")
+    r.add_argument("--concurrency", type=int, default=20)
+    r.add_argument("--duration", type=float, default=10, help="seconds; 0 = no limit")
+    r.add_argument("--requests", type=int, default=0, help="stop after N; 0 = no cap")
+    r.add_argument("--warmup", type=float, default=1, help="unrecorded seconds first")
+    r.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight pairs")
+    r.add_argument(
+        "--latency", default=DEFAULT_LATENCY, help="stub mean latency per dependency"
+    )
+    r.add_argument("--questions", type=int, default=50, help="distinct /ask questions")
+    r.add_argument("--pages", type=int, default=200, help="distinct /read page ids")
+    r.add_argument("--bypass-cache", action="store_true", help="skip answer cache")
+    r.add_argument("--base-url", help="load a running server instead of stubs")
+    r.add_argument("--timeout", type=float, default=30)
+    r.add_argument("--seed", type=int, default=1)
+    r.add_argument("--out", help="also write the report to this file")
+
+    c = sub.add_parser("compare", help="diff two saved runs")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed p95/p99 growth (0.1=10%%)"
+    )
+    c.add_argument("--error-threshold", type=float, default=0.01)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(compare(args))
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmark vault write throughput of the Faust worker.
+
+Compares the old agent loop (a fresh SQLAlchemy session, one INSERT and one
+commit per event, copied below from the worker before batching) with the
+batched multi-row INSERT over the asyncpg pool that the agent now uses. Needs
+DATABASE_URL pointing at a database with the vault table; benchmark rows are
+deleted afterwards.
+
+usage: bench_vault_writes.py [--events 1000] [--batch 100]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+
+# Add backend to path before importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "backend"))
+
+from app import faust_worker
+
+
+MARKER = "bench-vault-writes"
+
+# the pre-batching worker's engine and session factory, unchanged
+engine = create_engine(faust_worker.DATABASE_URL)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def make_events(n):
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "page_id": 1,
+            "question": f"{MARKER} {i}",
+            "answer": "42",
+            "symbol_id": None,
+            "created_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+async def save_to_vault(event):
+    """The old per-event write: its own session, INSERT, commit, close."""
+    db = SessionLocal()
+    try:
+        query = """
+        INSERT INTO vault (page_id, question, answer, symbol_id, created_at, updated_at)
+        VALUES (:page_id, :question, :answer, :symbol_id, :created_at, NOW())
+        RETURNING id;
+        """
+        result = db.execute(
+            text(query),
+            {
+                "page_id": event.get("page_id"),
+                "question": event.get("question"),
+                "answer": event.get("answer"),
+                "symbol_id": event.get("symbol_id"),
+                "created_at": event.get(
+                    "created_at", datetime.now(timezone.utc).isoformat()
+                ),
+            },
+        )
+        db.commit()
+        return result.fetchone()[0]
+    finally:
+        db.close()
+
+
+async def one_by_one(events):
+    for event in events:
+        await save_to_vault(event)
+
+
+async def batched(events, size):
+    for i in range(0, len(events), size):
+        await faust_worker.save_batch_to_vault(events[i : i + size])
+
+
+async def timed(label, coro, n):
+    t0 = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - t0
+    return {"mode": label, "events": n, "events_per_sec": round(n / elapsed, 1)}
+
+
+async def cleanup():
+    pool = await faust_worker.open_pool()
+    await pool.execute("DELETE FROM vault WHERE question LIKE $1", f"{MARKER}%")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=faust_worker.BATCH_SIZE)
+    args = parser.parse_args()
+
+    await faust_worker.open_pool()
+    results = []
+    try:
+        results.append(
+            await timed("per-event", one_by_one(make_events(args.events)), args.events)
+        )
+        results.append(
+            await timed(
+                f"batch={args.batch}",
+                batched(make_events(args.events), args.batch),
+                args.events,
+            )
+        )
+    finally:
+        await cleanup()
+        metrics = faust_worker.pool_metrics()
+        await faust_worker.close_pool()
+        engine.dispose()
+
+    speedup = results[1]["events_per_sec"] / results[0]["events_per_sec"]
+    print(
+        json.dumps(
+            {"results": results, "speedup": round(speedup, 1), "pool": metrics},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
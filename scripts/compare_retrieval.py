@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Compare vector-only, lexical and hybrid retrieval offline.
+
+Runs every question through ``similar_pages(mode=...)`` for each mode against
+the configured backend (VECTOR_BACKEND / EMBEDDING_PROVIDER as in .env) and
+reports precision@k, hit@k, MRR and latency per mode as JSON, plus the hybrid
+deltas against vector-only.
+
+Questions come from ``--queries`` (JSONL, one ``{"question": ..., "relevant":
+[page ids]}`` per line) or, by default, are synthesised from the corpus: rare
+capitalised names (in at most ``--max-df`` pages) become "Who or what is
+<Name>?", and the pages mentioning the name are the relevant set. That is the
+exact-name case cosine search struggles with, so it is a lower bound on what
+hybrid buys for real questions, not a substitute for a labelled set.
+
+usage: compare_retrieval.py [--queries q.jsonl] [--n 50] [--k 3]
+           [--modes vector,lexical,hybrid] [--max-df 3] [--seed 0]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+# Add backend to path before importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "backend"))
+
+from app.lexical import BM25Index, tokenize
+from app.vector import RETRIEVAL_MODES, similar_pages
+
+
+NAME = re.compile(r"\b[A-Z][a-z]{4,}\b")
+
+
+def load_queries(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthesise_queries(index: BM25Index, n: int, max_df: int, seed: int) -> List[Dict]:
+    """Exact-name questions whose answers are the pages mentioning the name."""
+    pages: Dict[str, set] = {}
+    for page_id, title, content in zip(index.ids, index.titles, index.contents):
+        text = f"{title or ''} {content or ''}"
+        terms = set(tokenize(text))
+        for name in set(NAME.findall(text)):
+            term = name.lower()
+            if term in terms and 0 < index.doc_freq(term) <= max_df:
+                pages.setdefault(name, set()).add(int(page_id))
+
+    names = sorted(pages)
+    random.Random(seed).shuffle(names)
+    return [
+        {"question": f"Who or what is {name}?", "relevant": sorted(pages[name])}
+        for name in names[:n]
+    ]
+
+
+def score(ranked: List[int], relevant: set, k: int) -> Dict[str, float]:
+    top = ranked[:k]
+    hits = [page_id in relevant for page_id in top]
+    first = next((i for i, hit in enumerate(hits, start=1) if hit), None)
+    return {
+        "precision": sum(hits) / k,
+        "hit": float(any(hits)),
+        "mrr": 1.0 / first if first else 0.0,
+    }
+
+
+async def run_mode(mode: str, queries: List[Dict], k: int) -> Dict[str, float]:
+    metrics: Dict[str, List[float]] = {"precision": [], "hit": [], "mrr": []}
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        results = await similar_pages(q["question"], k=k, mode=mode)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ranked = [r.get("page_id", r.get("id")) for r in results]
+        for name, value in score(ranked, set(q["relevant"]), k).items():
+            metrics[name].append(value)
+
+    # the first call per mode pays for index loads / connection setup
+    steady = latencies[1:] or latencies
+    return {
+        f"precision@{k}": round(float(np.mean(metrics["precision"])), 4),
+        f"hit@{k}": round(float(np.mean(metrics["hit"])), 4),
+        "mrr": round(float(np.mean(metrics["mrr"])), 4),
+        "latency_ms_mean": round(float(np.mean(steady)), 2),
+        "latency_ms_p95": round(float(np.percentile(steady, 95)), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", help="JSONL of {question, relevant}")
+    parser.add_argument("--n", type=int, default=50, help="synthesised questions")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--modes", default=",".join(RETRIEVAL_MODES))
+    parser.add_argument("--max-df", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.queries:
+        queries = load_queries(args.queries)
+    else:
+        index = await asyncio.to_thread(BM25Index.load)
+        queries = synthesise_queries(index, args.n, args.max_df, args.seed)
+    if not queries:
+        sys.exit("No queries to run")
+
+    report = {"queries": len(queries), "k": args.k, "modes": {}}
+    for mode in args.modes.split(","):
+        report["modes"][mode] = await run_mode(mode, queries, args.k)
+
+    modes = report["modes"]
+    if "vector" in modes and "hybrid" in modes:
+        report["hybrid_vs_vector"] = {
+            metric: round(modes["hybrid"][metric] - modes["vector"][metric], 4)
+            for metric in modes["vector"]
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,8 +5,15 @@ create table if not exists vault (
   page_id   bigint references pages(id) on delete cascade,
   question  text,
   answer    text,
+  event_id  text,     -- idempotency key of the gift event
   created_at timestamp with time zone default now()
 );
 
 -- optional basic index for later querying
-create index if not exists idx_vault_user_ts on vault(user_id, created_at desc);
\ No newline at end of file
+create index if not exists idx_vault_user_ts on vault(user_id, created_at desc);
+
+-- keyset pagination for /vault/list: (created_at, id) newest first
+create index if not exists idx_vault_created_id on vault(created_at desc, id desc);
+
+-- redelivered gift events are skipped via ON CONFLICT (event_id)
+create unique index if not exists idx_vault_event_id on vault(event_id);
\ No newline at end of file
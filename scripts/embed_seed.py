@@ -1,73 +1,259 @@
 #!/usr/bin/env python3
-"""Embed any pages whose embedding is NULL.
-usage: embed_seed.py [--dry] [--batch 10]
+"""Embed any pages whose embedding is missing or stale.
+
+A page is stale when the sha256 of its content no longer matches the
+``content_hash`` stored with its embedding, or when it was embedded with a
+different model. Unchanged pages are skipped without any API call (run
+scripts/add_pages_content_hash.sql once to add the columns; the first run
+after that re-embeds every page, since no hash is recorded yet).
+
+Pages are embedded by the ``EMBEDDING_PROVIDER`` provider. With
+``EMBEDDING_DUAL_WRITE=true`` they get both the OpenAI and the local CPU
+vectors, side by side in their own columns and checked for staleness
+separately (run scripts/add_pages_local_embedding.sql first).
+
+Rows are read with keyset pagination (no 1000-row cap), embedded with several
+batches in flight at once, and written back with per-row updates of just the
+vector, hash and model columns. Progress is checkpointed after every page of
+rows, so an interrupted run resumes where it stopped.
+
+usage: embed_seed.py [--dry] [--batch 10] [--concurrency 4] [--reset]
 """
 import argparse
+import asyncio
+import hashlib
 import json
 import math
 import os
 import sys
 import time
+from collections import Counter
+from pathlib import Path
 
 from dotenv import load_dotenv
-from openai import APIError, OpenAI
-from supabase import create_client
+from openai import APIError, AsyncOpenAI
+from supabase import acreate_client
+
 
+# Add backend to path before importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "backend"))
 
-MODEL = "text-embedding-3-small"
-PRICE_PER_1K = 0.00002  # USD for small model
+# app.embeddings is standalone: no settings, numpy or other app modules, so
+# the cron job only needs python-dotenv, supabase and openai
+from app.embeddings import (
+    DEFAULT_LOCAL_MODEL,
+    LocalEmbeddings,
+    OpenAIEmbeddings,
+    provider_names,
+)
+
+
+PRICE_PER_1K = 0.00002  # USD for text-embedding-3-small
 
 load_dotenv()
 SB_URL = os.getenv("SUPABASE_URL")
 SB_KEY = os.getenv("SUPABASE_ANON_KEY")
-OPENAI_KEY = os.getenv("OPENAI_API_KEY")
-if not (SB_URL and SB_KEY and OPENAI_KEY):
-    sys.exit("🛑  Missing env vars (SUPABASE_URL, SUPABASE_ANON_KEY, OPENAI_API_KEY)")
 
-sb = create_client(SB_URL, SB_KEY)
-client = OpenAI(api_key=OPENAI_KEY)
+
+def make_provider(name: str):
+    if name == "openai":
+        client = AsyncOpenAI()  # OPENAI_API_KEY / OPENAI_BASE_URL from the env
+        return OpenAIEmbeddings(lambda: client)
+    if name == "local":
+        return LocalEmbeddings(os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL))
+    sys.exit(f"🛑  Unknown EMBEDDING_PROVIDER: {name}")
+
+
+# same settings (and defaults) as the backend's EMBEDDING_* config
+NAMES = provider_names(
+    os.getenv("EMBEDDING_PROVIDER", "openai").lower(),
+    os.getenv("EMBEDDING_DUAL_WRITE", "").lower() in ("1", "true", "yes", "on"),
+)
+if not (SB_URL and SB_KEY and (os.getenv("OPENAI_API_KEY") or "openai" not in NAMES)):
+    sys.exit("🛑  Missing env vars (SUPABASE_URL, SUPABASE_ANON_KEY, OPENAI_API_KEY)")
+PROVIDERS = [make_provider(name) for name in NAMES]
 
 parser = argparse.ArgumentParser()
 parser.add_argument(
     "--dry", action="store_true", help="don't call OpenAI, just estimate cost"
 )
-parser.add_argument("--batch", type=int, default=10)
+parser.add_argument("--batch", type=int, default=10, help="texts per API call")
+parser.add_argument(
+    "--concurrency", type=int, default=4, help="embedding batches in flight"
+)
+parser.add_argument(
+    "--page-size", type=int, default=1000, help="rows fetched per query"
+)
+parser.add_argument("--checkpoint", default=".embed_checkpoint.json")
+parser.add_argument(
+    "--reset", action="store_true", help="ignore any existing checkpoint"
+)
 args = parser.parse_args()
 
-rows = (
-    sb.table("pages")
-    .select("id, content")
-    .is_("embedding", "null")
-    .limit(1000)
-    .execute()
-    .data
-)
-print(f"🔎 {len(rows)} rows need embeddings")
 
-total_tokens = 0
-for i in range(0, len(rows), args.batch):
-    chunk = rows[i : i + args.batch]
+def content_hash(text: str) -> str:
+    # must match encode(sha256(convert_to(content, 'UTF8')), 'hex') in SQL
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def is_stale(row: dict, provider, missing: set) -> bool:
+    return (
+        row["id"] in missing
+        or row.get(provider.hash_column) != content_hash(row["content"])
+        or row.get(provider.model_column) != provider.model
+    )
+
+
+def load_checkpoint() -> dict:
+    if args.reset or not os.path.exists(args.checkpoint):
+        return {"last_id": 0, "rows": 0, "tokens": 0}
+    with open(args.checkpoint, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(state: dict) -> None:
+    tmp = args.checkpoint + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, args.checkpoint)  # atomic, so a crash never truncates it
+
+
+async def embed_batch(provider, sb, sem, chunk, stats) -> None:
     texts = [r["content"] for r in chunk]
     if args.dry:
-        # rough 1 token ≈ 4 chars
-        tokens = sum(math.ceil(len(t) / 4) for t in texts)
-        total_tokens += tokens
-        continue
-    backoff = 1
+        if provider.name == "openai":
+            # rough 1 token ≈ 4 chars
+            stats["tokens"] += sum(math.ceil(len(t) / 4) for t in texts)
+        stats["rows"] += len(chunk)
+        stats["by_provider"][provider.name] += len(chunk)
+        return
+
+    async with sem:
+        backoff = 1
+        while True:
+            try:
+                # this call's own usage: batches of one provider run concurrently
+                vectors, tokens = await provider.embed_with_usage(texts)
+                break
+            except APIError:
+                print(f"OpenAI error → retry in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+        # only this provider's columns are written: a page edited since it was
+        # read keeps its new title/content, and its stored hash (of the text
+        # that was embedded) marks it stale for the next run
+        await asyncio.gather(
+            *(
+                sb.table("pages")
+                .update(
+                    {
+                        provider.column: vec,
+                        provider.hash_column: content_hash(r["content"]),
+                        provider.model_column: provider.model,
+                    }
+                )
+                .eq("id", r["id"])
+                .execute()
+                for r, vec in zip(chunk, vectors)
+            )
+        )
+
+    stats["tokens"] += tokens
+    stats["rows"] += len(chunk)
+    stats["by_provider"][provider.name] += len(chunk)
+    print(
+        f"· ids {chunk[0]['id']}–{chunk[-1]['id']} embedded with {provider.name} "
+        f"({len(chunk)} rows)"
+    )
+
+
+async def main() -> None:
+    sb = await acreate_client(SB_URL, SB_KEY)
+    sem = asyncio.Semaphore(args.concurrency)
+    for provider in PROVIDERS:
+        provider.load()  # local model weights load once, up front
+    print(f"🧮 providers: {', '.join(f'{p.name} ({p.model})' for p in PROVIDERS)}")
+
+    state = load_checkpoint()
+    if state["last_id"]:
+        print(f"↻ resuming after id {state['last_id']}")
+    run = {"rows": 0, "tokens": 0, "skipped": 0, "by_provider": Counter()}
+    t0 = time.perf_counter()
+
     while True:
-        try:
-            resp = client.embeddings.create(model=MODEL, input=texts)
+        tracked = [c for p in PROVIDERS for c in (p.hash_column, p.model_column)]
+        page = (
+            await sb.table("pages")
+            .select(", ".join(["id", "title", "content", *tracked]))
+            .gt("id", state["last_id"])
+            .order("id")
+            .limit(args.page_size)
+            .execute()
+        ).data
+        if not page:
+            break
+        jobs = []
+        stale_ids = set()
+        for provider in PROVIDERS:
+            # embeddings nulled by hand are always redone, whatever the hash says
+            missing = {
+                r["id"]
+                for r in (
+                    await sb.table("pages")
+                    .select("id")
+                    .is_(provider.column, "null")
+                    .gte("id", page[0]["id"])
+                    .lte("id", page[-1]["id"])
+                    .execute()
+                ).data
+            }
+            rows = [r for r in page if is_stale(r, provider, missing)]
+            stale_ids.update(r["id"] for r in rows)
+            print(
+                f"🔎 ids {page[0]['id']}–{page[-1]['id']}: {len(rows)} need "
+                f"{provider.name} embeddings, {len(page) - len(rows)} unchanged"
+            )
+            jobs += [
+                embed_batch(provider, sb, sem, rows[i : i + args.batch], run)
+                for i in range(0, len(rows), args.batch)
+            ]
+        run["skipped"] += len(page) - len(stale_ids)
+
+        before = dict(run)
+        await asyncio.gather(*jobs)
+
+        state["last_id"] = page[-1]["id"]
+        if not args.dry:
+            state["rows"] += run["rows"] - before["rows"]
+            state["tokens"] += run["tokens"] - before["tokens"]
+            save_checkpoint(state)
+        if len(page) < args.page_size:
             break
-        except APIError:
-            print(f"OpenAI error → retry in {backoff}s")
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 60)
-    total_tokens += resp.usage.total_tokens
-    for r, emb in zip(chunk, resp.data):
-        sb.table("pages").update({"embedding": emb.embedding}).eq(
-            "id", r["id"]
-        ).execute()
-        print(f"· id {r['id']} embedded (dims={len(emb.embedding)})")
-
-usd = (total_tokens / 1000) * PRICE_PER_1K
-print(json.dumps({"tokens": total_tokens, "usd_estimate": round(usd, 4)}, indent=2))
+
+    elapsed = time.perf_counter() - t0
+    if not args.dry and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)  # finished cleanly; next run starts fresh
+
+    usd = (run["tokens"] / 1000) * PRICE_PER_1K
+    print(
+        json.dumps(
+            {
+                "rows": run["rows"],
+                "by_provider": dict(run["by_provider"]),
+                "tokens": run["tokens"],
+                "rows_incl_resumed": state["rows"] if not args.dry else run["rows"],
+                "skipped_unchanged": run["skipped"],
+                "usd_estimate": round(usd, 4),
+                "seconds": round(elapsed, 2),
+                "rows_per_sec": round(run["rows"] / elapsed, 1) if elapsed else None,
+                "tokens_per_sec": (
+                    round(run["tokens"] / elapsed, 1) if elapsed else None
+                ),
+            },
+            indent=2,
+        )
+    )
+
+
+asyncio.run(main())
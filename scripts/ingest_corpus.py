@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Stream cleaned_normalised.txt into the pages table.
+
+Pages are delimited by ``###Page N###`` markers; ``**bold**`` lines open a new
+section whose title carries forward to the following pages. The file is read
+line by line and rows are written with one bulk upsert per batch, so memory
+stays flat no matter how large the corpus is.
+
+usage: ingest_corpus.py [--file cleaned_normalised.txt] [--batch 100] [--dry]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+PAGE_MARKER = re.compile(r"^###Page (\d+)###$")
+BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+
+def parse_title(line: str) -> Optional[str]:
+    """Return the section title for a heading line, or None for body text.
+
+    ``**Story** **Chapter 1- The Tunnel**`` becomes ``Story — Chapter 1- The
+    Tunnel``.
+    """
+    parts = BOLD.findall(line)
+    if not parts or BOLD.sub("", line).strip():
+        return None
+    return " — ".join(p.strip() for p in parts)
+
+
+def iter_pages(lines: Iterable[str]) -> Iterator[Dict]:
+    """Yield ``{id, title, content}`` dicts from a stream of corpus lines."""
+    page_id: Optional[int] = None
+    title = "Untitled"
+    body: List[str] = []
+
+    def page() -> Dict:
+        return {"id": page_id, "title": title, "content": "\n".join(body).strip()}
+
+    for raw in lines:
+        line = raw.rstrip("\n")
+        marker = PAGE_MARKER.match(line.strip())
+        if marker:
+            if page_id is not None:
+                yield page()
+            page_id = int(marker.group(1))
+            body = []
+            continue
+
+        heading = parse_title(line.strip())
+        if heading:
+            title = heading
+        elif page_id is not None:
+            body.append(line)
+
+    if page_id is not None:
+        yield page()
+
+
+def batched(it: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    it = iter(it)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", default="cleaned_normalised.txt")
+    parser.add_argument("--batch", type=int, default=100, help="rows per upsert")
+    parser.add_argument(
+        "--dry", action="store_true", help="parse only, don't write to Supabase"
+    )
+    args = parser.parse_args()
+
+    sb = None
+    if not args.dry:
+        from dotenv import load_dotenv
+        from supabase import create_client
+
+        load_dotenv()
+        SB_URL = os.getenv("SUPABASE_URL")
+        SB_KEY = os.getenv("SUPABASE_ANON_KEY")
+        if not (SB_URL and SB_KEY):
+            sys.exit("🛑  Missing env vars (SUPABASE_URL, SUPABASE_ANON_KEY)")
+        sb = create_client(SB_URL, SB_KEY)
+
+    total = 0
+    chars = 0
+    t0 = time.perf_counter()
+    with open(args.file, "r", encoding="utf-8") as f:
+        for chunk in batched(iter_pages(f), args.batch):
+            if sb is not None:
+                sb.table("pages").upsert(chunk, on_conflict="id").execute()
+            total += len(chunk)
+            chars += sum(len(r["content"]) for r in chunk)
+            rate = total / (time.perf_counter() - t0)
+            print(
+                f"· pages {chunk[0]['id']}–{chunk[-1]['id']} "
+                f"{'parsed' if args.dry else 'upserted'} ({rate:.0f} pages/s)"
+            )
+
+    elapsed = time.perf_counter() - t0
+    print(
+        json.dumps(
+            {
+                "pages": total,
+                "chars": chars,
+                "seconds": round(elapsed, 2),
+                "pages_per_sec": round(total / elapsed, 1) if elapsed else None,
+            },
+            indent=2,
+        )
+    )
+    if not args.dry:
+        print("\nNext step: python scripts/embed_seed.py")
+
+
+if __name__ == "__main__":
+    main()
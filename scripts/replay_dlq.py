@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Re-inject dead-lettered gift events into gift_events.
+
+Reads gift_events.dlq up to its current end, strips the retry state so each
+event gets a fresh set of retry tiers, and publishes the events back onto
+gift_events in bulk. Offsets are committed for the replay group only after
+every event in a batch is acknowledged, so an interrupted replay resumes where
+it stopped. Events that fail again come back through the tiers to the DLQ.
+
+Undecodable originals (DLQ records carrying ``raw`` instead of an event) can't
+be replayed; they are appended to ``--parked`` (JSONL) before their offsets
+are committed, and counted separately in the summary.
+
+usage: replay_dlq.py [--bootstrap localhost:9092] [--limit N] [--dry]
+           [--parked dlq_unreplayable.jsonl]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+
+# Add backend to path before importing app modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "backend"))
+
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition
+
+from app.retry import DLQ_TOPIC, GIFT_EVENTS_TOPIC, strip_retry
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bootstrap", default="localhost:9092")
+    parser.add_argument("--group", default="gibsey-dlq-replay")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=0, help="0 replays everything")
+    parser.add_argument(
+        "--dry", action="store_true", help="summarise the DLQ, publish nothing"
+    )
+    parser.add_argument(
+        "--parked",
+        default="dlq_unreplayable.jsonl",
+        help="where undecodable DLQ records are written",
+    )
+    args = parser.parse_args()
+
+    consumer = AIOKafkaConsumer(
+        DLQ_TOPIC,
+        bootstrap_servers=args.bootstrap,
+        group_id=None if args.dry else args.group,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        value_deserializer=lambda v: json.loads(v.decode("utf-8")),
+    )
+    producer = AIOKafkaProducer(
+        bootstrap_servers=args.bootstrap,
+        value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        enable_idempotence=True,
+        linger_ms=20,
+    )
+    await consumer.start()
+    await producer.start()
+
+    replayed = parked = 0
+    reasons = Counter()
+    try:
+        # Snapshot the end so events that land in the DLQ mid-replay wait
+        # for the next run instead of looping forever
+        while not consumer.assignment():
+            await asyncio.sleep(0.1)
+        end = await consumer.end_offsets(list(consumer.assignment()))
+
+        while [tp for tp, off in end.items() if await consumer.position(tp) < off]:
+            batches = await consumer.getmany(timeout_ms=1000, max_records=args.batch)
+            records = [
+                r for tp, rs in batches.items() for r in rs if r.offset < end[tp]
+            ]
+            if args.limit:
+                records = records[: args.limit - replayed]
+            if not records:
+                continue
+
+            for r in records:
+                meta = r.value.get("_retry", {})
+                reasons[meta.get("reason", "unknown").split(":")[0]] += 1
+            # undecodable originals can't replay
+            raw = [r for r in records if "raw" in r.value]
+            events = [r for r in records if "raw" not in r.value]
+            parked += len(raw)
+            if args.dry:
+                replayed += len(events)
+            else:
+                if raw:
+                    with open(args.parked, "a", encoding="utf-8") as f:
+                        for r in raw:
+                            f.write(json.dumps(r.value) + "\n")
+                    print(f"⚠️  parked {len(raw)} undecodable events in {args.parked}")
+                futures = [
+                    await producer.send(GIFT_EVENTS_TOPIC, value=strip_retry(r.value))
+                    for r in events
+                ]
+                await asyncio.gather(*futures)
+                await consumer.commit(
+                    {
+                        TopicPartition(r.topic, r.partition): r.offset + 1
+                        for r in records
+                    }
+                )
+                replayed += len(futures)
+                print(f"· replayed {replayed} events")
+
+            if args.limit and replayed >= args.limit:
+                break
+    finally:
+        await producer.stop()
+        await consumer.stop()
+
+    print(
+        json.dumps(
+            {
+                "mode": "dry" if args.dry else "replay",
+                "events": replayed,
+                "unreplayable": parked,
+                "by_reason": dict(reasons),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
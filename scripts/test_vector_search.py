@@ -3,6 +3,7 @@
 Test the vector search functionality manually.
 Usage: python test_vector_search.py "Your query text here"
 """
+import asyncio
 import json
 import sys
 from pathlib import Path
@@ -28,7 +29,7 @@ if __name__ == "__main__":
     print(f"Searching for pages similar to: '{query}'")
 
     try:
-        results = similar_pages(query, k=3)
+        results = asyncio.run(similar_pages(query, k=3))
         print(json.dumps(results, indent=2))
 
         if results:
@@ -125,7 +125,7 @@ def main():
     print("✅ Done! Shards have been updated in the database.")
     print("\nNext steps:")
     print(
-        "1. Run the embedding script to update the embeddings for the full shard content:"
+        "1. Run the embedding script; it re-embeds only the shards whose content changed:"
     )
     print("   python scripts/embed_seed.py")
 